@@ -1,12 +1,31 @@
-from flask import Flask, request, render_template, redirect, url_for, flash, jsonify
+from flask import Flask, request, render_template, redirect, url_for, flash, jsonify, Response, stream_with_context, g
 import mysql.connector
 import os
 import logging
-import uuid
+import threading
+from time import perf_counter, sleep
+from datetime import datetime
 from dotenv import load_dotenv
 from backend.calculators.fsi_calculator import FSICalculator
-from backend.calculators.area_statement_calculator import calculate_area_statement
-from backend.utils.required_ids import fetch_required_ids
+from backend.calculators.fsi_result_cache import FSIResultCache
+from backend.calculators.fsi_sensitivity import FSISensitivity
+from backend.calculators.fsi_batch import FSIBatchEvaluator, read_ndjson
+from backend.calculators.setback_calculator import SetbackCalculator
+from backend.jobs.calculation_queue import CalculationQueue, QUEUED, COMPLETED, FAILED
+from backend.utils.required_ids import fetch_required_ids, fsi_group_cache, preload_fsi_groups
+from backend.utils.reference_data import ReferenceData
+from backend.utils.project_submission import ProjectSubmission
+from backend.utils.static_assets import register_static_assets
+from backend.utils.uploads import UploadRequest, store_upload
+from backend.utils.db import DB_CONFIG, db_pool, get_connection
+from backend.utils.project_ids import ProjectIdAllocator
+from backend.utils.project_listing import parse_project_query, list_projects
+from backend.utils.project_export import EXPORT_FORMATS, parse_export_query, export_projects
+from backend.utils.metrics import REGISTRY, CONTENT_TYPE, Counter, Histogram
+from backend.utils.structured_logging import PAYLOAD_LOGGER, configure_logging, correlation_id, new_correlation_id
+from backend.utils.project_columns import (
+    PROJECT_DETAILS_COLUMNS, AREA_STATEMENT_COLUMNS, FSI_COLUMNS, SETBACK_COLUMNS, get_fsi_values, get_setback_values
+)
 
 # Load environment variables
 load_dotenv()
@@ -15,56 +34,264 @@ app = Flask(__name__,
     template_folder='../frontend/templates',
     static_folder='../frontend/static'
 )
+# Stream uploaded files to the upload folder while they are parsed
+app.request_class = UploadRequest
+# Serve the built, precompressed assets (python -m backend.jobs.build_static_assets)
+register_static_assets(app)
 app.config.update(
     SECRET_KEY=os.getenv('SECRET_KEY'),
     UPLOAD_FOLDER=os.getenv('UPLOAD_FOLDER'),
     MAX_CONTENT_LENGTH=int(os.getenv('MAX_CONTENT_LENGTH')),
+    # 'sequential' inserts then updates step by step, 'transactional' computes
+    # everything first and persists the project with a single INSERT, 'async'
+    # stores the form data and calculates on a background worker
+    SUBMIT_MODE=os.getenv('SUBMIT_MODE', 'sequential'),
+    # Browser cache lifetime of the /api reference data responses, in seconds
+    REFERENCE_DATA_MAX_AGE=int(os.getenv('REFERENCE_DATA_MAX_AGE', 3600)),
+    # Re-read the FSI columns after update_fsi_details and log them (debugging only)
+    VERIFY_FSI_UPDATES=os.getenv('VERIFY_FSI_UPDATES', 'false').lower() == 'true',
+)
+
+# JSON log lines, formatted and written on a background thread
+configure_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    filename=os.getenv('LOG_FILE') or None,
+    payload_sample_rate=float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.01)),
 )
+# Form data and calculator inputs/results, logged for a sample of the requests
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
 
-# Set up logging configuration
-logging.basicConfig(level=logging.DEBUG)
+# Metrics served at /metrics (FSI rule and connection pool metrics live with their modules)
+REQUEST_SECONDS = Histogram(
+    'citiwise_http_request_duration_seconds', "Time to handle a request, by route and status code",
+    ['method', 'route', 'status']
+)
+DB_STATEMENT_SECONDS = Histogram(
+    'citiwise_db_statement_duration_seconds', "Execution time of the project_details SQL statements", ['statement']
+)
+UPLOAD_BYTES = Counter(
+    'citiwise_upload_bytes_total', "Bytes of uploaded files, by whether they were stored or rejected", ['result']
+)
+UPLOAD_SECONDS = Histogram(
+    'citiwise_upload_store_seconds', "Time to type check and store an uploaded file", ['result']
+)
+
+# Initialize FSICalculator ('memory' serves the DCR rule tables from an in-process index)
+fsi_calculator = FSICalculator(
+    DB_CONFIG,
+    pool=db_pool,
+    engine=os.getenv('FSI_ENGINE', 'sql'),
+    refresh_interval=int(os.getenv('FSI_RULE_REFRESH_SECONDS', 60)),
+    typed_ranges=os.getenv('FSI_TYPED_RANGES', 'false').lower() == 'true'
+)
+# Results for plots whose rule inputs fall in the same rule table brackets are shared
+fsi_result_cache = FSIResultCache(
+    fsi_calculator,
+    maxsize=int(os.getenv('FSI_RESULT_CACHE_SIZE', 50000)),
+    maxbytes=int(os.getenv('FSI_RESULT_CACHE_MAX_BYTES', 33554432))
+)
+# One in-memory copy of the rule tables in sql mode too, shared with the batch evaluator
+fsi_batch_evaluator = FSIBatchEvaluator(
+    fsi_calculator,
+    chunk_size=int(os.getenv('FSI_BATCH_CHUNK_SIZE', 5000)),
+    rule_index=fsi_result_cache.rule_index
+)
+fsi_sensitivity = FSISensitivity(fsi_batch_evaluator)
+# Boundary margins, looked up for all four sides at once in an in-memory index of
+# dcr_setback_margins, kept apart from the FSI rule tables
+setback_calculator = SetbackCalculator(db_pool, refresh_interval=int(os.getenv('FSI_RULE_REFRESH_SECONDS', 60)))
+
+# Index the form's reference data for submission checks and the filtered /api endpoints
+reference_data = ReferenceData().load()
+
+# Warm the council fsi_Group cache so submissions skip the tblmaster_council query
+preload_fsi_groups()
+
+# project_id values, reserved in blocks from project_id_sequence and set in each INSERT
+project_ids = ProjectIdAllocator(get_connection, block_size=int(os.getenv('PROJECT_ID_BLOCK_SIZE', 50)))
+
+# Process id for which warm_up() last succeeded
+_warmed_pid = None
+_warm_up_lock = threading.Lock()
+
+def preload_shared_data(reload=False):
+    """
+    Load the DCR rule tables and build the FSI caches' indexes over them
+
+    Under gunicorn (gunicorn.conf.py) this runs in the master once the app is
+    imported, so workers fork with the reference data, council fsi_Groups and
+    rule tables already in memory and share those pages copy-on-write.
+
+    :param reload: Also re-read the reference data and council fsi_Groups, and
+                   check the rule tables for changes right away (gunicorn SIGHUP)
+    :return: True if the rule tables are loaded
+    """
+    if reload:
+        reference_data.load()
+        preload_fsi_groups()
+    try:
+        # Setbacks are not needed to serve; without their table only setbacks fail
+        setback_calculator.preload(force=reload)
+    except Exception as e:
+        app.logger.warning("Could not preload setback rules: %s", e)
+    try:
+        fsi_result_cache.preload(force=reload)
+        fsi_batch_evaluator.preload()
+    except Exception as e:
+        app.logger.warning("Could not preload FSI rule tables: %s", e)
+        return False
+    return True
 
-# Database configuration from environment variables
-DB_CONFIG = {
-    "host": os.getenv('DB_HOST'),
-    "user": os.getenv('DB_USER'),
-    "password": os.getenv('DB_PASSWORD'),
-    "database": os.getenv('DB_NAME')
-}
+def warm_up():
+    """
+    Get this process ready to serve: shared data loaded and the connection pool filled
 
-# Initialize FSICalculator
-fsi_calculator = FSICalculator(DB_CONFIG)
+    Runs once per process; gunicorn workers call it before accepting
+    requests, and /health/ready calls it until it succeeds.
+
+    :return: True once the process is ready
+    """
+    global _warmed_pid
+    if _warmed_pid == os.getpid():
+        return True
+    with _warm_up_lock:
+        if _warmed_pid == os.getpid():
+            return True
+        if not preload_shared_data():
+            return False
+        try:
+            # Connections inherited from a parent process are dropped, not shared
+            db_pool.prefill()
+        except mysql.connector.Error as e:
+            app.logger.warning("Could not open database connections: %s", e)
+            return False
+        _warmed_pid = os.getpid()
+        if app.config['SUBMIT_MODE'] == 'async':
+            # Only the async mode stores calculation_status; a worker that dies
+            # takes its queued jobs with it, so every process sweeps for them
+            threading.Thread(
+                target=_sweep_stale_calculations, args=(CALCULATION_SWEEP_SECONDS,),
+                name='calculation-sweep', daemon=True
+            ).start()
+        app.logger.info("Process %s warmed up", _warmed_pid)
+    return True
+
+@app.before_request
+def start_request_timer():
+    g.request_started = perf_counter()
+    # Reuse the id of an upstream proxy so log lines can be joined across services
+    new_correlation_id(request.headers.get('X-Request-ID', '')[:64])
+
+@app.after_request
+def record_request_duration(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Labelled by the URL rule, not the path, to keep one series per route
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(perf_counter() - started)
+    if correlation_id.get():
+        response.headers['X-Request-ID'] = correlation_id.get()
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 @app.route('/')
 def health_check():
     return jsonify({"status": "Citiwise API is running"}), 200
 
-@app.route('/submit', methods=['GET', 'POST'])
-def submit_form():
-    if request.method == 'POST':
-        try:
-            applicant_type = request.form.get('applicant_type', '').strip()
-            # Add form processing logic here
-            return jsonify({"success": True, "message": "Form submitted successfully"}), 200
-        except Exception as e:
-            app.logger.error(f"Error during form submission: {e}")
-            abort(500, description="An unexpected error occurred during form submission.")
-    return render_template('index.html')
+@app.route('/health/ready')
+def readiness_check():
+    if not warm_up():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True}), 200
+
+@app.route('/health/db-pool')
+def db_pool_stats():
+    return jsonify(db_pool.stats()), 200
+
+@app.route('/health/project-ids')
+def project_id_stats():
+    return jsonify(project_ids.stats()), 200
+
+@app.route('/health/caches')
+def cache_stats():
+    return jsonify({"council_fsi_group": fsi_group_cache.stats(), "fsi_results": fsi_result_cache.stats()}), 200
+
+@app.route('/health/calculation-queue')
+def calculation_queue_stats():
+    return jsonify(calculation_queue.stats()), 200
+
+@app.route('/fsi/batch', methods=['POST'])
+def fsi_batch():
+    """
+    Calculate FSI for a JSON array or an NDJSON stream of project_details
+
+    Results stream back as NDJSON, one line per input in input order.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonlines'):
+        rows = read_ndjson(request.stream)
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            return jsonify({"success": False, "message": "Expected a JSON array or NDJSON stream of project details"}), 400
+
+    return Response(stream_with_context(fsi_batch_evaluator.iter_ndjson(rows)), mimetype='application/x-ndjson')
+
+@app.route('/fsi/sensitivity', methods=['POST'])
+def fsi_sensitivity_surface():
+    """
+    FSI of one site (JSON project_details) over every road width and plot area
+
+    Regions are rectangles of road width and plot area intervals with the FSI
+    result that applies inside them, taken from the rule table breakpoints.
+    """
+    project_details = request.get_json(silent=True)
+    if not isinstance(project_details, dict):
+        return jsonify({"success": False, "message": "Expected a JSON object of project details"}), 400
 
-def get_float_value(value):
-    """Helper function to convert values to float"""
     try:
-        return float(value) if value else 0.0
-    except (ValueError, TypeError):
-        return 0.0
+        return jsonify(fsi_sensitivity.surface(project_details)), 200
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        app.logger.error("Error calculating FSI sensitivity: %s", e)
+        return jsonify({"success": False, "message": "FSI rule tables unavailable"}), 503
+
+
+# Function to serve one filtered slice of the reference data with an ETag
+def reference_data_response(collection, parameter):
+    value = request.args.get(parameter, type=int)
+    if value is None:
+        return jsonify({"success": False, "message": f"{parameter} must be an integer"}), 400
+
+    cached = reference_data.filtered(collection, value)
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['REFERENCE_DATA_MAX_AGE']
+    return response.make_conditional(request)
 
+@app.route('/api/uses')
+def api_uses():
+    return reference_data_response('uses', 'zone_id')
 
-# Function to connect to the database
+@app.route('/api/city-specific-areas')
+def api_city_specific_areas():
+    return reference_data_response('city_specific_area', 'council_id')
+
+@app.route('/api/building-subtypes')
+def api_building_subtypes():
+    return reference_data_response('building_subtype', 'bldgtype_id')
+
+
+# Function to check a connection out of the shared pool (close() returns it)
 def connect_to_database():
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        return get_connection()
     except mysql.connector.Error as e:
-        app.logger.error(f"Error connecting to the database: {e}")
+        app.logger.error("Error connecting to the database: %s", e)
         flash(f"Database connection error: {e}")
         return None
 
@@ -72,6 +299,8 @@ def connect_to_database():
 def insert_project_details_basic(data):
     connection = None
     try:
+        # Before checking out the insert's connection, as a block reservation needs its own
+        project_id = project_ids.allocate()
         connection = connect_to_database()
         if connection is None:
             flash("Failed to connect to the database.")
@@ -80,36 +309,22 @@ def insert_project_details_basic(data):
         cursor = connection.cursor()
 
         # SQL Insert Query
-        insert_query = """
-        INSERT INTO project_details_test2 (
-            applicant_type, applicant_name, contact_no, email, project_name, site_address, dp_rp_part_plan, 
-            google_image, ulb_rp_special_authority, special_scheme, regularization, type_of_development, 
-            incentive_fsi, incentive_fsi_rating, type_of_proposal, hilly_site, flood_affected_area, location, 
-            electrical_line, electrical_line_voltage, plot_layout_type, reservation_area_affected, 
-            reservation_area_sqm, crz_status, zone, uses_id, survey_type, survey_number, village_name, 
-            area_plot_site_sqm, area_plot_ownership_sqm, area_plot_measurement_sqm, pro_rata_fsi, class_of_land, 
-            dp_rp_road_affected, dp_rp_road_area_sqm, city_specific_area_id, building_height, redevelopment_proposal, 
-            plot_width, tod, building_type_id, building_subtype_id, front_boundary_type, road_details_front, 
-            road_details_front_meters, left_boundary_type, road_details_left, road_details_left_meters, 
-            right_boundary_type, road_details_right, road_details_right_meters, rear_boundary_type, 
-            road_details_rear, road_details_rear_meters, ulb_type, council_id, taluka_id, crz_location, zone_id, 
-            zone_landuser_id, uses_name, uses_zone_id, city_specific_area_name, city_specific_area_areaCode, 
-            city_specific_area_councilId, building_type_name, building_type_proposalId, building_subtype_name, 
-            building_subtype_bldgtypeID) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        columns = ('project_id',) + PROJECT_DETAILS_COLUMNS
+        insert_query = f"""
+        INSERT INTO project_details_test2 ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
         """
             
-        cursor.execute(insert_query, data)
+        with DB_STATEMENT_SECONDS.labels('insert_project_details').time():
+            cursor.execute(insert_query, (project_id,) + tuple(data))
         connection.commit()
-        app.logger.info("Inserted project details successfully.")
+        app.logger.info("Inserted project details for project ID %s", project_id)
 
-        project_id = cursor.lastrowid  # Capture the inserted project ID for later use
-        return project_id
+        row_id = cursor.lastrowid  # Capture the inserted row ID for later use
+        return row_id
 
     except mysql.connector.Error as e:
-        app.logger.error(f"Error inserting project details: {e}")
+        app.logger.error("Error inserting project details: %s", e)
         flash(f"Error inserting project details: {e}")
         return None
     finally:
@@ -134,12 +349,13 @@ def update_project_details_with_ids(project_id, fsi_group):
         SET fsi_group = %s 
         WHERE id = %s
         """
-        cursor.execute(update_query, (fsi_group, project_id))
+        with DB_STATEMENT_SECONDS.labels('update_fsi_group').time():
+            cursor.execute(update_query, (fsi_group, project_id))
         connection.commit()
         return True
 
     except mysql.connector.Error as e:
-        app.logger.error(f"Error updating project details with required IDs: {e}")
+        app.logger.error("Error updating project details with required IDs: %s", e)
         flash(f"Error updating project details with required IDs: {e}")
         return False
     finally:
@@ -147,8 +363,8 @@ def update_project_details_with_ids(project_id, fsi_group):
             cursor.close()
             connection.close()
 
-# Helper function to update area statement in the database
-def update_area_statement(project_id, area_statement):
+# Helper function to update area statement and setbacks in the database
+def update_area_statement(project_id, area_statement, setback_results=None):
     connection = None
     try:
         connection = connect_to_database()
@@ -158,8 +374,8 @@ def update_area_statement(project_id, area_statement):
 
         cursor = connection.cursor()
 
-        # Update the project details with calculated area statement
-        update_query = """
+        # Update the project details with calculated area statement and setbacks
+        update_query = f"""
         UPDATE project_details_test2 
         SET 
             area_of_plot = %s,
@@ -179,37 +395,41 @@ def update_area_statement(project_id, area_statement):
             recreational_open_space_a = %s,
             recreational_open_space_b = %s,
             recreational_open_space_c = %s,
-            recreational_open_space_d = %s
+            recreational_open_space_d = %s,
+            {', '.join(f'{column} = %s' for column in SETBACK_COLUMNS)}
         WHERE id = %s
         """
         
-        cursor.execute(update_query, (
-            area_statement.get('area_of_plot'),
-            area_statement.get('area_as_per_ownership_document'),
-            area_statement.get('area_as_per_tilr_or_city_survey_measurement_sheet'),
-            area_statement.get('area_as_per_demarcated_drawing_area'),
-            area_statement.get('deductions'),
-            area_statement.get('deductions_a'),
-            area_statement.get('deductions_b'),
-            area_statement.get('balance_area_of_plot'),
-            area_statement.get('amenity_space_proposed'),
-            area_statement.get('amenity_space_proposed_a'),
-            area_statement.get('amenity_space_proposed_b'),
-            area_statement.get('amenity_space_proposed_c'),
-            area_statement.get('net_plot_area'),
-            area_statement.get('recreational_open_space'),
-            area_statement.get('recreational_open_space_a'),
-            area_statement.get('recreational_open_space_b'),
-            area_statement.get('recreational_open_space_c'),
-            area_statement.get('recreational_open_space_d'),
-            project_id
-        ))
+        area_statement = area_statement or {}
+        with DB_STATEMENT_SECONDS.labels('update_area_statement').time():
+            cursor.execute(update_query, (
+                area_statement.get('area_of_plot'),
+                area_statement.get('area_as_per_ownership_document'),
+                area_statement.get('area_as_per_tilr_or_city_survey_measurement_sheet'),
+                area_statement.get('area_as_per_demarcated_drawing_area'),
+                area_statement.get('deductions'),
+                area_statement.get('deductions_a'),
+                area_statement.get('deductions_b'),
+                area_statement.get('balance_area_of_plot'),
+                area_statement.get('amenity_space_proposed'),
+                area_statement.get('amenity_space_proposed_a'),
+                area_statement.get('amenity_space_proposed_b'),
+                area_statement.get('amenity_space_proposed_c'),
+                area_statement.get('net_plot_area'),
+                area_statement.get('recreational_open_space'),
+                area_statement.get('recreational_open_space_a'),
+                area_statement.get('recreational_open_space_b'),
+                area_statement.get('recreational_open_space_c'),
+                area_statement.get('recreational_open_space_d'),
+                *get_setback_values(setback_results),
+                project_id
+            ))
         connection.commit()
-        app.logger.info(f"Area statement updated for project ID {project_id}")
+        app.logger.info("Area statement updated for project ID %s", project_id)
         return True
 
     except mysql.connector.Error as e:
-        app.logger.error(f"Error updating area statement: {e}")
+        app.logger.error("Error updating area statement: %s", e)
         flash(f"Error updating area statement: {e}")
         return False
     finally:
@@ -228,8 +448,7 @@ def update_fsi_details(project_id, fsi_results):
             return False
 
         cursor = connection.cursor()
-        app.logger.info(f"Updating FSI details for project {project_id}: {fsi_results}")
-
+        payload_logger.info("Updating FSI details for project %s", project_id, extra={'fsi_results': fsi_results})
 
         # SQL Update Query for FSI details
         update_query = """
@@ -242,26 +461,22 @@ def update_fsi_details(project_id, fsi_results):
         WHERE id = %s
         """
         
-        values = (
-            float(fsi_results.get('basic_fsi', 0)) if fsi_results.get('basic_fsi') is not None else None,
-            float(fsi_results.get('premium_fsi', 0)) if fsi_results.get('premium_fsi') is not None else None,
-            float(fsi_results.get('tdr', 0)) if fsi_results.get('tdr') is not None else None,
-            str(fsi_results.get('remarks_fsi', 'NA')),
-            project_id
-        )
+        values = get_fsi_values(fsi_results) + (project_id,)
         
-        cursor.execute(update_query, values)
+        with DB_STATEMENT_SECONDS.labels('update_fsi_details').time():
+            cursor.execute(update_query, values)
         connection.commit()
         
-        # Verify the update
-        cursor.execute("SELECT basic_fsi, premium_fsi, tdr FROM project_details_test2 WHERE id = %s", (project_id,))
-        result = cursor.fetchone()
-        app.logger.info(f"Verification after FSI update: {result}")
+        # Verify the update: an extra round trip, so only when debugging
+        if app.config['VERIFY_FSI_UPDATES']:
+            with DB_STATEMENT_SECONDS.labels('verify_fsi_details').time():
+                cursor.execute("SELECT basic_fsi, premium_fsi, tdr FROM project_details_test2 WHERE id = %s", (project_id,))
+            app.logger.info("Verification after FSI update: %s", cursor.fetchone())
         
         return True
 
     except mysql.connector.Error as e:
-        app.logger.error(f"Database error in update_fsi_details: {e}")
+        app.logger.error("Database error in update_fsi_details: %s", e)
         flash(f"Error updating FSI details: {e}")
         return False
     finally:
@@ -270,195 +485,439 @@ def update_fsi_details(project_id, fsi_results):
             connection.close()
 
 
-# Function to handle file uploads
+# Helper function to insert a fully calculated project with a single statement
+def insert_project_details_full(data, fsi_group, area_statement, fsi_results, setback_results=None):
+    """
+    Persist the form data together with every computed column in one transaction
+
+    :param data: Form data tuple in PROJECT_DETAILS_COLUMNS order
+    :param fsi_group: FSI group of the authority, or None
+    :param area_statement: calculate_area_statement result, or None
+    :param fsi_results: FSICalculator result without error, or None
+    :param setback_results: SetbackCalculator result without error, or None
+    :return: Inserted row id, or None on failure (nothing is written)
+    """
+    connection = None
+    try:
+        project_id = project_ids.allocate()
+        connection = connect_to_database()
+        if connection is None:
+            flash("Failed to connect to the database.")
+            return None
+
+        cursor = connection.cursor()
+
+        columns = (
+            ('project_id',) + PROJECT_DETAILS_COLUMNS + ('fsi_group',) + AREA_STATEMENT_COLUMNS + FSI_COLUMNS +
+            SETBACK_COLUMNS
+        )
+        values = (
+            (project_id,) +
+            tuple(data) +
+            (fsi_group,) +
+            tuple((area_statement or {}).get(column) for column in AREA_STATEMENT_COLUMNS) +
+            (get_fsi_values(fsi_results) if fsi_results else (None,) * len(FSI_COLUMNS)) +
+            get_setback_values(setback_results)
+        )
+        insert_query = f"""
+        INSERT INTO project_details_test2 ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+        """
+
+        with DB_STATEMENT_SECONDS.labels('insert_project_details_full').time():
+            cursor.execute(insert_query, values)
+        connection.commit()
+        app.logger.info("Inserted calculated project details for project ID %s", project_id)
+        return cursor.lastrowid
+
+    except mysql.connector.Error as e:
+        if connection is not None:
+            connection.rollback()
+        app.logger.error("Error inserting calculated project details: %s", e)
+        flash(f"Error inserting project details: {e}")
+        return None
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+# Helper function to insert the raw form data of an async submission
+def insert_project_details_queued(data):
+    """
+    Persist the form data with its calculations marked as queued
+
+    :param data: Form data tuple in PROJECT_DETAILS_COLUMNS order
+    :return: (row id, project_id) tuple, or None on failure
+    """
+    connection = None
+    try:
+        project_id = project_ids.allocate()
+        connection = connect_to_database()
+        if connection is None:
+            return None
+
+        cursor = connection.cursor()
+
+        columns = ('project_id',) + PROJECT_DETAILS_COLUMNS + ('calculation_status',)
+        insert_query = f"""
+        INSERT INTO project_details_test2 ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+        """
+        with DB_STATEMENT_SECONDS.labels('insert_project_details_queued').time():
+            cursor.execute(insert_query, (project_id,) + tuple(data) + (QUEUED,))
+        row_id = cursor.lastrowid
+        connection.commit()
+        app.logger.info("Queued project details for project ID %s", project_id)
+        return row_id, project_id
+
+    except mysql.connector.Error as e:
+        if connection is not None:
+            connection.rollback()
+        app.logger.error("Error inserting queued project details: %s", e)
+        return None
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# Helper function to store the calculations of an async submission
+def update_project_calculations(row_id, fsi_group, area_statement, fsi_results, setback_results, calculation_status):
+    """
+    Write every computed column and the calculation status with one UPDATE
+
+    Runs on calculation workers, outside any request, so errors are raised
+    instead of flashed.
+
+    :param row_id: project_details_test2.id of the project
+    :param fsi_group: FSI group of the authority, or None to leave it unchanged
+    :param area_statement: calculate_area_statement result, or None
+    :param fsi_results: FSICalculator result without error, or None
+    :param setback_results: SetbackCalculator result without error, or None
+    :param calculation_status: Final calculation status
+    """
+    connection = get_connection()
+    try:
+        cursor = connection.cursor()
+        assignments = ['fsi_group = COALESCE(%s, fsi_group)'] + [
+            f'{column} = %s'
+            for column in AREA_STATEMENT_COLUMNS + FSI_COLUMNS + SETBACK_COLUMNS + ('calculation_status',)
+        ]
+        values = (
+            (fsi_group,) +
+            tuple((area_statement or {}).get(column) for column in AREA_STATEMENT_COLUMNS) +
+            (get_fsi_values(fsi_results) if fsi_results else (None,) * len(FSI_COLUMNS)) +
+            get_setback_values(setback_results) +
+            (calculation_status, row_id)
+        )
+        with DB_STATEMENT_SECONDS.labels('update_project_calculations').time():
+            cursor.execute(
+                f"UPDATE project_details_test2 SET {', '.join(assignments)} WHERE id = %s",
+                values
+            )
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+# Setbacks are optional: without their table, or a rule for the plot, the project is saved with NULL setbacks
+def calculate_setbacks(submission):
+    """
+    Setbacks of a submission, skipped rather than failed when they cannot be calculated
+
+    :param submission: ProjectSubmission
+    :return: SetbackCalculator result without error, or None
+    """
+    setback_results = setback_calculator.calculate_setbacks(submission.setback_project_details())
+    if setback_results.get('error'):
+        app.logger.info("Setbacks skipped: %s", setback_results.get('remarks_setback'))
+        return None
+    return setback_results
+
+# Background job run by calculation_queue for each async submission
+def calculate_submission(job, row_id, submission):
+    """
+    Calculate fsi_group, area statement, FSI and setbacks of a queued project and store them
+
+    :param job: Job status dictionary of the calculation queue
+    :param row_id: project_details_test2.id of the project
+    :param submission: ProjectSubmission of the project
+    """
+    job['step'] = 'fsi_group'
+    fsi_group = fetch_required_ids(submission.ulb_rp_special_authority)
+    if not fsi_group:
+        job['errors'].append("Failed to calculate fsi_group.")
+
+    job['step'] = 'area_statement'
+    area_statement = submission.area_statement()
+    if not area_statement:
+        job['errors'].append("Failed to calculate area statement.")
+
+    job['step'] = 'fsi'
+    fsi_results = fsi_result_cache.calculate_fsi(submission.fsi_project_details())
+    if fsi_results.get('error'):
+        job['errors'].append(f"FSI calculation failed: {fsi_results.get('remarks_fsi')}")
+        fsi_results = None
+
+    job['step'] = 'setbacks'
+    setback_results = calculate_setbacks(submission)
+
+    job['step'] = 'saving'
+    update_project_calculations(
+        row_id, fsi_group, area_statement, fsi_results, setback_results, FAILED if job['errors'] else COMPLETED
+    )
+    job['step'] = None
+
+calculation_queue = CalculationQueue(
+    calculate_submission,
+    workers=int(os.getenv('CALCULATION_WORKERS', 4)),
+    max_pending=int(os.getenv('CALCULATION_QUEUE_SIZE', 100)),
+    status_ttl=float(os.getenv('CALCULATION_STATUS_TTL', 3600)),
+)
+# Projects still queued this long after submission were lost with the process
+# that queued them (crashed, OOM-killed, kill -9) and are marked failed
+CALCULATION_STALE_SECONDS = int(os.getenv('CALCULATION_STALE_SECONDS', 900))
+CALCULATION_SWEEP_SECONDS = int(os.getenv('CALCULATION_SWEEP_SECONDS', 60))
+
+# Helper function to fail async submissions whose calculation was lost
+def fail_stale_calculations(max_age=CALCULATION_STALE_SECONDS):
+    """
+    Mark projects queued for longer than max_age seconds as failed
+
+    Queued calculations only live in the memory of the process that accepted
+    them, so nothing else would ever finish these. The UPDATE is idempotent,
+    so every process can sweep; a calculation that still finishes afterwards
+    stores its results and final status as usual.
+
+    :param max_age: Seconds since submission after which a queued project is failed
+    :return: Number of projects marked failed
+    """
+    connection = get_connection()
+    try:
+        cursor = connection.cursor()
+        with DB_STATEMENT_SECONDS.labels('fail_stale_calculations').time():
+            cursor.execute(
+                """
+                UPDATE project_details_test2 SET calculation_status = %s
+                WHERE calculation_status = %s AND timestamp < NOW() - INTERVAL %s SECOND
+                """,
+                (FAILED, QUEUED, max_age)
+            )
+        count = cursor.rowcount
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+    if count:
+        app.logger.warning("Marked %d projects queued for over %ss as failed", count, max_age)
+    return count
+
+def _sweep_stale_calculations(interval):
+    while True:
+        try:
+            fail_stale_calculations()
+        except mysql.connector.Error as e:
+            app.logger.warning("Could not sweep stale calculations: %s", e)
+        sleep(interval)
+
+
+# Function to handle file uploads (stored content-addressed, type checked from the contents)
 def handle_file_upload(file, folder):
     if file and file.filename:
-        if file.content_type in ['image/jpeg', 'image/png', 'application/pdf']:
-            unique_filename = f"{uuid.uuid4()}_{file.filename}"
-            file_path = os.path.join(folder, unique_filename)
-            file.save(file_path)
-            return file_path
-        else:
+        started = perf_counter()
+        file_path, mime_type = store_upload(file, folder)
+        result = 'stored' if file_path is not None else 'rejected'
+        UPLOAD_SECONDS.labels(result).observe(perf_counter() - started)
+        UPLOAD_BYTES.labels(result).inc(getattr(file.stream, 'size', 0))
+        if file_path is None:
+            app.logger.warning("Rejected upload %s detected as %s", file.filename, mime_type)
             flash("Invalid file type.")
-            return None
+        return file_path
     return None
 
 
+# Route listing projects, newest first, one keyset page at a time
+@app.route('/projects')
+def projects():
+    """
+    List projects with optional filters and column projection
+
+    Filters: council_id, ulb_rp_special_authority, type_of_proposal, fsi_group,
+    created_from and created_to. fields is a comma-separated column list. Pass
+    the returned next_cursor as cursor to get the following page.
+    """
+    try:
+        query = parse_project_query(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    connection = None
+    try:
+        connection = get_connection()
+        with DB_STATEMENT_SECONDS.labels('list_projects').time():
+            rows, next_cursor = list_projects(connection, query)
+    except mysql.connector.Error as e:
+        app.logger.error("Error listing projects: %s", e)
+        return jsonify({"success": False, "message": "Database unavailable"}), 503
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+    return jsonify({"projects": rows, "next_cursor": next_cursor, "limit": query.limit}), 200
+
+# Route streaming every project matching the listing filters as a file
+@app.route('/projects/export')
+def projects_export():
+    """
+    Export projects as CSV, XLSX or Parquet (?format=), with the listing filters
+
+    All columns are exported unless fields is given. Rows are streamed from
+    the database and written as they arrive, on a connection outside the pool.
+    """
+    export_format = request.args.get('format', 'csv')
+    try:
+        query = parse_export_query(request.args)
+        chunks = export_projects(db_pool.open_dedicated, query, export_format)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except mysql.connector.Error as e:
+        app.logger.error("Error exporting projects: %s", e)
+        return jsonify({"success": False, "message": "Database unavailable"}), 503
+
+    filename = f"projects-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+# Route reporting the calculation progress and results of a project
+@app.route('/projects/<project_id>/status')
+def project_status(project_id):
+    """
+    Report the calculation status of a project and, once finished, its results
+
+    Jobs queued by this process report their current step; otherwise the
+    status stored with the project is used. Projects saved by the
+    synchronous submit modes have no stored status and count as completed.
+    """
+    # Read the job before the row, so a finished job's results are already stored
+    job = calculation_queue.status(project_id)
+
+    connection = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            f"""
+            SELECT calculation_status, fsi_group, {', '.join(AREA_STATEMENT_COLUMNS + FSI_COLUMNS + SETBACK_COLUMNS)}
+            FROM project_details_test2
+            WHERE project_id = %s
+            """,
+            (project_id,)
+        )
+        row = cursor.fetchone()
+    except mysql.connector.Error as e:
+        app.logger.error("Error fetching status of project %s: %s", project_id, e)
+        return jsonify({"success": False, "message": "Database unavailable"}), 503
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+    if row is None:
+        return jsonify({"success": False, "message": f"Project {project_id} not found"}), 404
+
+    status = {"project_id": project_id}
+    if job is not None:
+        status.update(
+            status=job['status'], step=job['step'], errors=job['errors'],
+            queued_at=job['queued_at'], finished_at=job['finished_at']
+        )
+    else:
+        status['status'] = row['calculation_status'] or COMPLETED
+
+    if status['status'] in (COMPLETED, FAILED):
+        status['results'] = {
+            'fsi_group': row['fsi_group'],
+            'area_statement': {column: row[column] for column in AREA_STATEMENT_COLUMNS},
+            'fsi': {column: row[column] for column in FSI_COLUMNS},
+            'setbacks': {column: row[column] for column in SETBACK_COLUMNS},
+        }
+    return jsonify(status), 200
+
+
 # Route for rendering the form and handling form submissions
 @app.route('/submit', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
         try:
-        
-            # Capture basic form inputs
-            applicant_type = request.form.get('applicant_type')
-            applicant_name = request.form.get('applicant_name')
-            contact_no = request.form.get('contact_no')
-            email = request.form.get('email')
-            project_name = request.form.get('project_name')
-            site_address = request.form.get('site_address')
+            # Fields that depend on the selected authority, zone, uses, area and
+            # building type are derived from their ids, not taken from the client
+            derived, errors = reference_data.resolve_selection(request.form)
+
+            # Parse and validate the whole form in one pass, reporting every problem at once
+            submission, form_errors = ProjectSubmission.parse(request.form, derived)
+            errors += form_errors
+            if errors:
+                flash('; '.join(errors))
+                return redirect(url_for('index'))
 
             # Set upload folder (ensure this folder exists)
-            upload_folder = 'uploads'
+            upload_folder = app.config['UPLOAD_FOLDER'] or 'uploads'
             os.makedirs(upload_folder, exist_ok=True)
 
-            # Handle file uploads
-            dp_rp_part_plan_path = handle_file_upload(request.files.get('dp_rp_part_plan'), upload_folder)
-            google_image_path = handle_file_upload(request.files.get('google_image'), upload_folder)
+            # Handle file uploads, default to None if not uploaded
+            submission.dp_rp_part_plan = handle_file_upload(request.files.get('dp_rp_part_plan'), upload_folder)
+            submission.google_image = handle_file_upload(request.files.get('google_image'), upload_folder)
+
+            # SQL parameters and FSI calculator input, both taken from the parsed submission
+            data = submission.params()
+            project_details = submission.fsi_project_details()
+
+            if app.config['SUBMIT_MODE'] == 'async':
+                # Answer as soon as the form data is stored; the calculations
+                # run on a calculation_queue worker
+                inserted = insert_project_details_queued(data)
+                if not inserted:
+                    return jsonify({"success": False, "message": "Failed to insert project details"}), 500
+                row_id, project_id = inserted
+
+                if not calculation_queue.submit(project_id, row_id, submission):
+                    app.logger.warning("Calculation queue full, calculating project ID %s in the request", project_id)
+                    calculation_queue.run(project_id, row_id, submission)
+
+                return jsonify({
+                    "status": "success",
+                    "project_id": project_id,
+                    "calculation_status": calculation_queue.status(project_id)['status'],
+                    "status_url": url_for('project_status', project_id=project_id),
+                }), 202
+
+            if app.config['SUBMIT_MODE'] == 'transactional':
+                # Everything below depends only on the form inputs, so compute
+                # first and write the finished row in a single transaction
+                fsi_group = fetch_required_ids(submission.ulb_rp_special_authority)
+                if not fsi_group:
+                    flash(f"Failed to calculate fsi_group.")
 
-            # Assign paths to data tuple, default to None if not uploaded
-            dp_rp_part_plan = dp_rp_part_plan_path if dp_rp_part_plan_path else None
-            google_image = google_image_path if google_image_path else None
-            
-            
-            ulb_rp_special_authority = request.form.get('ulb_rp_special_authority')
-            special_scheme = request.form.get('special_scheme')
-            regularization = request.form.get('regularization')
-            type_of_development = request.form.get('type_of_development')
-            incentive_fsi = request.form.get('incentive_fsi')
-            incentive_fsi_rating = request.form.get('incentive_fsi_rating') 
-            type_of_proposal = request.form.get('type_of_proposal')
-            hilly_site = request.form.get('hilly_site')
-            flood_affected_area = request.form.get('flood_affected_area')
-            location = request.form.get('location')
-            electrical_line = request.form.get('electrical_line')
-            electrical_line_voltage = request.form.get('electrical_line_voltage') 
-            plot_layout_type = request.form.get('plot_layout_type')
-            reservation_area_affected = request.form.get('reservation_area_affected')
-            reservation_area_sqm = request.form.get('reservation_area_sqm') 
-            crz_status = request.form.get('crz_status')
-            zone = request.form.get('zone')
-            uses_id = request.form.get('uses_id')
-            survey_type = request.form.get('survey_type')
-            survey_number = request.form.get('survey_number')
-            village_name = request.form.get('village_name')
-            area_plot_site_sqm = request.form.get('area_plot_site_sqm')
-            area_plot_ownership_sqm = request.form.get('area_plot_ownership_sqm')
-            area_plot_measurement_sqm = request.form.get('area_plot_measurement_sqm')
-            pro_rata_fsi = request.form.get('pro_rata_fsi')
-            class_of_land = request.form.get('class_of_land')
-            dp_rp_road_affected = request.form.get('dp_rp_road_affected')
-            dp_rp_road_area_sqm = request.form.get('dp_rp_road_area_sqm') 
-            city_specific_area_id = request.form.get('city_specific_area_id') 
-            building_height = request.form.get('building_height')
-            redevelopment_proposal = request.form.get('redevelopment_proposal')
-            plot_width = request.form.get('plot_width')
-            tod = request.form.get('tod')
-            building_type_id = request.form.get('building_type_id')
-            building_subtype_id = request.form.get('building_subtype_id')
-            front_boundary_type = request.form.get('front_boundary_type')
-            road_details_front = request.form.get('road_details_front')
-            road_details_front_meters = request.form.get('road_details_front_meters') 
-            left_boundary_type = request.form.get('left_boundary_type')
-            road_details_left = request.form.get('road_details_left')
-            road_details_left_meters = request.form.get('road_details_left_meters') 
-            if road_details_left_meters == '': 
-                road_details_left_meters = None
- 
-            right_boundary_type = request.form.get('right_boundary_type')
-            road_details_right = request.form.get('road_details_right')
-            road_details_right_meters = request.form.get('road_details_right_meters')
-            if road_details_right_meters == '': 
-                road_details_right_meters = None
-            rear_boundary_type = request.form.get('rear_boundary_type')
-            road_details_rear = request.form.get('road_details_rear')
-            road_details_rear_meters = request.form.get('road_details_rear_meters')
-            if road_details_rear_meters == '': 
-                road_details_rear_meters = None
-            ulb_type = request.form.get('ulb_type')
-            council_id = request.form.get('council_id')
-            taluka_id = request.form.get('taluka_id')
-            crz_location = request.form.get('crz_location')
-            zone_id = request.form.get('zone_id')
-            zone_landuser_id = request.form.get('zone_landuser_id')
-            uses_name = request.form.get('uses_name')
-            uses_zone_id = request.form.get('uses_zone_id')
-            city_specific_area_name = request.form.get('city_specific_area_name')
-            city_specific_area_areaCode = request.form.get('city_specific_area_areaCode')
-            city_specific_area_councilId = request.form.get('city_specific_area_councilId')
-            building_type_name = request.form.get('building_type_name')
-            building_type_proposalId = request.form.get('building_type_proposalId')
-            building_subtype_name = request.form.get('building_subtype_name')
-            building_subtype_bldgtypeID = request.form.get('building_subtype_bldgtypeID')
-
-
-            required_fields = {
-                'applicant_type': applicant_type,
-                'applicant_name': applicant_name,
-                'contact_no': contact_no,
-                'email': email,
-                'project_name': project_name,
-                'site_address': site_address,
-                'ulb_rp_special_authority': ulb_rp_special_authority,
-                'regularization': regularization,
-                'type_of_development': type_of_development,
-                'incentive_fsi': incentive_fsi,
-                'type_of_proposal': type_of_proposal,
-                'hilly_site': hilly_site,
-                'flood_affected_area': flood_affected_area,
-                'location': location,
-                'electrical_line': electrical_line,
-                'plot_layout_type': plot_layout_type,
-                'reservation_area_affected': reservation_area_affected,
-                'crz_status': crz_status,
-                'zone': zone,
-                'uses_id': uses_id,
-                'survey_type': survey_type,
-                'survey_number': survey_number,
-                'village_name': village_name,
-                'area_plot_site_sqm': area_plot_site_sqm,
-                'area_plot_ownership_sqm': area_plot_ownership_sqm,
-                'area_plot_measurement_sqm': area_plot_measurement_sqm,
-                'class_of_land': class_of_land,
-                'dp_rp_road_affected': dp_rp_road_affected,
-                'redevelopment_proposal': redevelopment_proposal,
-                'plot_width': plot_width,
-                'tod': tod,
-                'building_type_id': building_type_id,
-                'building_subtype_id': building_subtype_id,
-            }
-
-             # Validate required fields
-            missing_fields = [field for field, value in required_fields.items() if not value]
-            if missing_fields:
-                flash(f"Missing required fields: {', '.join(missing_fields)}")
-                return redirect(url_for('index'))
+                area_statement = submission.area_statement()
+                if not area_statement:
+                    flash("Failed to calculate area statement.")
 
-            # Data tuple to pass to insert_project_details_test2 function
-            data = (applicant_type, applicant_name, contact_no, email, project_name, site_address, dp_rp_part_plan,
-                    google_image, ulb_rp_special_authority, special_scheme, regularization, type_of_development,
-                    incentive_fsi, incentive_fsi_rating, type_of_proposal, hilly_site, flood_affected_area, location,
-                    electrical_line, electrical_line_voltage, plot_layout_type, reservation_area_affected, 
-                    reservation_area_sqm, crz_status, zone, uses_id, survey_type, survey_number, village_name, 
-                    area_plot_site_sqm, area_plot_ownership_sqm, area_plot_measurement_sqm, pro_rata_fsi, class_of_land, 
-                    dp_rp_road_affected, dp_rp_road_area_sqm, city_specific_area_id, building_height, redevelopment_proposal, 
-                    plot_width, tod, building_type_id, building_subtype_id, front_boundary_type, road_details_front, 
-                    road_details_front_meters, left_boundary_type, road_details_left, road_details_left_meters, 
-                    right_boundary_type, road_details_right, road_details_right_meters, rear_boundary_type, 
-                    road_details_rear, road_details_rear_meters, ulb_type, council_id, taluka_id, crz_location, zone_id, 
-                    zone_landuser_id, uses_name, uses_zone_id, city_specific_area_name, city_specific_area_areaCode, 
-                    city_specific_area_councilId, building_type_name, building_type_proposalId, building_subtype_name, 
-                    building_subtype_bldgtypeID)
-            
+                fsi_results = fsi_result_cache.calculate_fsi(project_details)
+                if fsi_results.get('error'):
+                    flash(f"FSI calculation failed: {fsi_results.get('remarks_fsi')}")
+                    fsi_results = None
+
+                setback_results = calculate_setbacks(submission)
 
-            # Create a project_details dictionary for FSI calculation
-            project_details = {
-                'council_id': int(council_id) if council_id else None,
-                'city_specific_area': city_specific_area_id,
-                'city_specific_area_areaCode': city_specific_area_areaCode,
-                'type_of_proposal': type_of_proposal,
-                'crz_status': crz_status,
-                'tod': tod,
-                'location': location,
-                'plot_layout_type': plot_layout_type,
-                'area_plot_site_sqm': get_float_value(area_plot_site_sqm),
-                'zone': zone,
-                'zone_id': zone_id,
-                'road_details_front_meters': get_float_value(road_details_front_meters),
-                'road_details_left_meters': get_float_value(road_details_left_meters),
-                'road_details_right_meters': get_float_value(road_details_right_meters),
-                'road_details_rear_meters': get_float_value(road_details_rear_meters)
-            }
+                project_id = insert_project_details_full(data, fsi_group, area_statement, fsi_results, setback_results)
+                if project_id:
+                    app.logger.info("Project ID %s saved with area statement, FSI and setback details", project_id)
+                    flash("Project details, area statement, FSI and setback details saved successfully.")
+                else:
+                    flash("Failed to insert project details")
+                return redirect(url_for('index'))
 
             # Insert basic project details into database
             project_id = insert_project_details_basic(data)
@@ -468,35 +927,37 @@ def index():
                 
             # After the data is inserted, fetch `fsi_group` using the `ulb_rp_special_autho    
             if project_id:
-                fsi_group = fetch_required_ids(ulb_rp_special_authority)
+                fsi_group = fetch_required_ids(submission.ulb_rp_special_authority)
 
                 if fsi_group:
                     update_project_details_with_ids(project_id, fsi_group)
-                    app.logger.info(f"Successfully updated fsi_group: {fsi_group} for project ID {project_id}")
+                    app.logger.info("Successfully updated fsi_group: %s for project ID %s", fsi_group, project_id)
                 else:
                     flash(f"Failed to calculate fsi_group.")
 
             if project_id:
-                # Perform area statement calculations
-                area_statement = calculate_area_statement(data)
-                
+                # Perform area statement and setback calculations, stored with one update
+                area_statement = submission.area_statement()
+                setback_results = calculate_setbacks(submission)
+
+                if area_statement or setback_results:
+                    update_area_statement(project_id, area_statement, setback_results)
                 if area_statement:
-                    update_area_statement(project_id, area_statement)
                     flash("Project details and area statement updated successfully.")
                 else:
                     flash("Failed to calculate area statement.")
             
 
             try:
-                app.logger.info(f"Calculating FSI with project details: {project_details}")
-                fsi_results = fsi_calculator.calculate_fsi(project_details)
+                payload_logger.info("Calculating FSI for project ID %s", project_id, extra={'project_details': project_details})
+                fsi_results = fsi_result_cache.calculate_fsi(project_details)
                 
                 if fsi_results:
-                    app.logger.info(f"FSI calculation results: {fsi_results}")
+                    payload_logger.info("FSI calculation results for project ID %s", project_id, extra={'fsi_results': fsi_results})
                     
                     if not fsi_results.get('error'):
                         if update_fsi_details(project_id, fsi_results):
-                            app.logger.info(f"FSI calculation successful for project ID {project_id}")
+                            app.logger.info("FSI calculation successful for project ID %s", project_id)
                             flash("FSI calculation completed successfully")
                         else:
                             flash("Failed to update FSI details in database")
@@ -506,16 +967,17 @@ def index():
                     flash("No FSI results returned from calculator")
                     
             except Exception as e:
-                app.logger.error(f"Error during FSI calculation: {e}")
+                app.logger.error("Error during FSI calculation: %s", e)
                 flash(f"Error during FSI calculation: {str(e)}")
 
             return redirect(url_for('index'))        
                 
         except Exception as e:
-            app.logger.error(f"Error during form submission: {e}")
+            app.logger.error("Error during form submission: %s", e)
             return jsonify({"success": False, "message": str(e)}), 500
 
     return render_template('index.html')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    warm_up()
+    app.run(debug=os.getenv('DEBUG', 'false').lower() == 'true')
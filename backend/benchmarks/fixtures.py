@@ -0,0 +1,245 @@
+"""
+Benchmark fixtures: a populated SQLite stand-in and synthetic /submit forms
+
+The rule tables follow the RULE_TABLES layouts with representative rows:
+every ULB type, road width band and plot size band the rules probe, area
+codes from the city specific areas, CRZ rows for the CRZ councils and setback
+margins for every side, boundary type and building height bracket. The forms
+are generated from a seed, so runs are reproducible.
+"""
+import random
+import sqlite3
+
+from backend.calculators.fsi_calculator import CRZ_COUNCILS
+from backend.calculators.setback_calculator import BOUNDARY_TYPES, ROAD_BOUNDARY, HEIGHT_BRACKETS
+from backend.calculators.fsi_rule_index import (
+    RULE_TABLES, TYPED_RANGE_COLUMNS, RULE_LOOKUP_INDEX, cast_decimal, rule_lookup_index_columns
+)
+from backend.utils.project_columns import PROJECT_DETAILS_COLUMNS, AREA_STATEMENT_COLUMNS, FSI_COLUMNS, SETBACK_COLUMNS
+from backend.utils.project_listing import LISTING_INDEXES
+from backend.utils.project_submission import SUBMISSION_SCHEMA, DECIMAL, ENUM, DERIVED
+
+ULB_TYPES = ('MMR', 'MMAD', 'NMNMC', 'ALL', 'PCMC')
+LOCATIONS = ('Congested', 'Non-Congested')
+
+# Stored as strings, like the range columns of the MySQL tables
+ROAD_WIDTH_BANDS = (('0', '9'), ('9', '12'), ('12', '15'), ('15', '18'), ('18', '24'), ('24', '30'), ('30', '9999'))
+PLOT_AREA_BANDS = (('0', '500'), ('500', '1000'), ('1000', '4000'), ('4000', '10000'), ('10000', '9999999'))
+PLOT_WIDTH_BANDS = (('0', '9'), ('9', '15'), ('15', '9999'))
+ANY_ROAD_WIDTH = ('0', '9999')
+
+# Choice weights for enum fields whose value decides the FSI rule
+ENUM_WEIGHTS = {
+    'crz_status': {'Yes': 1, 'No': 9},
+    'tod': {'Yes': 1, 'No': 6},
+    'type_of_proposal': {'Residential': 6, 'Commercial': 2, 'Industrial': 1, 'Mixed': 1},
+}
+
+# Share of plots with a city specific area, where the authority has any
+CITY_SPECIFIC_AREA_SHARE = 0.2
+
+# VARCHAR columns the app filters on, typed so numbers are stored as text as in MySQL
+TEXT_COLUMNS = {'council_id': 'council_id TEXT'}
+
+def _fsi_values(band, tod=False):
+    basic = 1.1 if not tod else 1.5
+    premium = round(0.3 + 0.1 * band, 2)
+    tdr = round(0.4 + 0.15 * band, 2)
+    return (str(basic), str(premium), str(tdr))
+
+
+def _rule_rows(table, reference_data):
+    # Values in RULE_TABLES column order: keys, range pairs, values
+    if table == 'dcr_setback_specificarea_restriction':
+        area_codes = sorted({area['areaCode'] for area in reference_data.collections['city_specific_area']})
+        for area_code in area_codes:
+            for band, (low, high) in enumerate(PLOT_AREA_BANDS):
+                yield (area_code, low, high, str(round(1.0 + 0.25 * band, 2)), str(round(1.1 + 0.2 * band, 2)),
+                       f"Specific area {area_code}")
+    elif table == 'crz_specificarea_restriction':
+        for council_id in sorted(CRZ_COUNCILS):
+            for location in LOCATIONS:
+                for zone in reference_data.collections['zone']:
+                    yield (council_id, location, zone['id'], '1.0', 'CRZ II')
+    elif table == 'Dcr_tod_fsi_permissible':
+        for band, road in enumerate(ROAD_WIDTH_BANDS):
+            for area in PLOT_AREA_BANDS:
+                yield road + area + _fsi_values(band, tod=True)
+    elif table == 'dcr_gunthewari_fsi_permissible':
+        for location in LOCATIONS:
+            for ulb_type in ULB_TYPES:
+                for band, road in enumerate(ROAD_WIDTH_BANDS):
+                    yield (location, ulb_type) + road + _fsi_values(band)
+    elif table == 'dcr_setback_margins':
+        for side_band, side in enumerate(('Front', 'Side', 'Rear')):
+            for boundary_type in BOUNDARY_TYPES:
+                roads = ROAD_WIDTH_BANDS if boundary_type == ROAD_BOUNDARY else (ANY_ROAD_WIDTH,)
+                for height_band, height in enumerate(HEIGHT_BRACKETS):
+                    for road_band, road in enumerate(roads):
+                        for width_band, width in enumerate(PLOT_WIDTH_BANDS):
+                            margin = 1.5 + 0.75 * (road_band + height_band + width_band) - 0.5 * side_band
+                            yield ((side, boundary_type, height) + road + width +
+                                   (str(margin), str(150 * (height_band + 1)), str(6 * (height_band + 1)), ''))
+    elif table == 'dcr_normal_fsi_permissible_industrial':
+        for band, road in enumerate(ROAD_WIDTH_BANDS):
+            for area in PLOT_AREA_BANDS:
+                yield ('N',) + road + area + _fsi_values(band)[:2]
+    else:
+        # dcr_normal_fsi_permissible and dcr_normal_fsi_permissible_nonconjusted
+        for ulb_type in ULB_TYPES:
+            for band, road in enumerate(ROAD_WIDTH_BANDS):
+                yield (ulb_type,) + road + _fsi_values(band)
+
+
+def create_database(path, reference_data):
+    """
+    Create and populate the SQLite stand-in database
+
+    :param path: Path of the SQLite database file (replaced if it exists)
+    :param reference_data: Loaded ReferenceData
+    :return: Dictionary of row counts by table
+    """
+    connection = sqlite3.connect(path)
+    counts = {}
+    try:
+        # Readers do not block a writer, as with InnoDB; the recompute job streams
+        # rows on one connection while it writes on another
+        connection.execute("PRAGMA journal_mode=WAL")
+        for table, spec in RULE_TABLES.items():
+            # The typed range columns of backend.jobs.migrate_rule_tables, filled here
+            # rather than generated
+            typed = [column for pair in spec.ranges for column in TYPED_RANGE_COLUMNS[pair]]
+            columns = list(spec.keys) + [column for pair in spec.ranges for column in pair] + list(spec.values)
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {', '.join(columns + typed)})"
+            )
+            connection.execute(
+                f"CREATE INDEX {table}_{RULE_LOOKUP_INDEX} ON {table} ({', '.join(rule_lookup_index_columns(table))})"
+            )
+            rows = []
+            for row in _rule_rows(table, reference_data):
+                ranges = row[len(spec.keys):len(spec.keys) + 2 * len(spec.ranges)]
+                rows.append(row + tuple(cast_decimal(value) for value in ranges))
+            connection.executemany(
+                f"INSERT INTO {table} ({', '.join(columns + typed)}) VALUES ({', '.join(['?'] * len(columns + typed))})",
+                rows
+            )
+            counts[table] = len(rows)
+
+        connection.execute("DROP TABLE IF EXISTS tblmaster_council")
+        connection.execute("CREATE TABLE tblmaster_council (id INTEGER PRIMARY KEY, strTalukaNm, strBasicFSIGroup)")
+        councils = [
+            (ulb['id'], ulb['talukaName'], ulb['councilName'])
+            for ulb in reference_data.collections['ulb_rp_special_authority']
+        ]
+        connection.executemany("INSERT INTO tblmaster_council VALUES (?, ?, ?)", councils)
+        counts['tblmaster_council'] = len(councils)
+
+        project_columns = (
+            PROJECT_DETAILS_COLUMNS + ('fsi_group',) + AREA_STATEMENT_COLUMNS + FSI_COLUMNS + SETBACK_COLUMNS +
+            ('calculation_status',)
+        )
+        connection.execute("DROP TABLE IF EXISTS project_details_test2")
+        connection.execute(f"""
+            CREATE TABLE project_details_test2 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT UNIQUE,
+                timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                {', '.join(TEXT_COLUMNS.get(column, column) for column in project_columns)}
+            )
+        """)
+        for name, columns in LISTING_INDEXES.items():
+            connection.execute(f"CREATE INDEX {name} ON project_details_test2 ({', '.join(columns)})")
+        connection.execute("DROP TABLE IF EXISTS project_id_sequence")
+        connection.execute("CREATE TABLE project_id_sequence (year INTEGER PRIMARY KEY, next_value INTEGER NOT NULL)")
+        connection.commit()
+    finally:
+        connection.close()
+    return counts
+
+
+def _weighted_choice(rng, name, choices):
+    weights = ENUM_WEIGHTS.get(name, {})
+    return rng.choices(choices, [weights.get(choice, 1) for choice in choices])[0]
+
+
+def synthetic_forms(reference_data, count, seed=0):
+    """
+    Generate /submit forms with consistent selections from the reference data
+
+    Authority, zone, uses, city specific area, building type and subtype
+    are picked so that every form passes the reference data checks; other
+    fields are drawn from their schema choices or plausible ranges. A city
+    specific area is left unselected, as the browser does, by omitting it.
+
+    :param reference_data: Loaded ReferenceData
+    :param count: Number of forms
+    :param seed: Random seed
+    :return: List of form dictionaries
+    """
+    rng = random.Random(seed)
+    collections = reference_data.collections
+
+    uses_by_zone, areas_by_council, subtypes_by_type = {}, {}, {}
+    for uses in collections['uses']:
+        uses_by_zone.setdefault(uses['zoneId'], []).append(uses)
+    for area in collections['city_specific_area']:
+        areas_by_council.setdefault(area['councilId'], []).append(area)
+    for subtype in collections['building_subtype']:
+        subtypes_by_type.setdefault(subtype['bldgtypeID'], []).append(subtype)
+    zones = [zone for zone in collections['zone'] if zone['id'] in uses_by_zone]
+    building_types = [building_type for building_type in collections['building_type']
+                      if building_type['id'] in subtypes_by_type]
+
+    forms = []
+    for number in range(count):
+        site_area = round(rng.uniform(100, 20000), 2)
+        form = {}
+        for name, kind, required, choices in SUBMISSION_SCHEMA:
+            if kind == DERIVED:
+                continue
+            if kind == ENUM:
+                form[name] = _weighted_choice(rng, name, choices)
+            elif kind == DECIMAL:
+                form[name] = ''
+            else:
+                form[name] = f'{name} {number}'
+
+        form.update(
+            applicant_type='Owner', contact_no=f'9{number:09d}'[-10:], email=f'applicant{number}@example.com',
+            area_plot_site_sqm=str(site_area),
+            area_plot_ownership_sqm=str(round(site_area * rng.uniform(0.95, 1.05), 2)),
+            area_plot_measurement_sqm=str(round(site_area * rng.uniform(0.95, 1.05), 2)),
+            plot_width=str(round(rng.uniform(5, 100), 2)),
+            building_height=rng.choice(HEIGHT_BRACKETS + ('',)),
+            front_boundary_type=ROAD_BOUNDARY,
+            road_details_front_meters=str(rng.choice((6, 9, 12, 15, 18, 24, 30, 45))),
+        )
+        for side in ('left', 'right', 'rear'):
+            if rng.random() < 0.3:
+                form[f'{side}_boundary_type'] = ROAD_BOUNDARY
+                form[f'road_details_{side}_meters'] = str(rng.choice((6, 9, 12, 18)))
+            else:
+                form[f'{side}_boundary_type'] = rng.choice(BOUNDARY_TYPES[1:])
+        if form['reservation_area_affected'] == 'Yes':
+            form['reservation_area_sqm'] = str(round(site_area * rng.uniform(0.01, 0.1), 2))
+        if form['dp_rp_road_affected'] == 'Yes':
+            form['dp_rp_road_area_sqm'] = str(round(site_area * rng.uniform(0.01, 0.1), 2))
+
+        ulb = rng.choice(collections['ulb_rp_special_authority'])
+        zone = rng.choice(zones)
+        building_type = rng.choice(building_types)
+        form.update(
+            taluka_id=str(ulb['id']), zone_id=str(zone['id']),
+            uses_id=str(rng.choice(uses_by_zone[zone['id']])['id']),
+            building_type_id=str(building_type['id']),
+            building_subtype_id=str(rng.choice(subtypes_by_type[building_type['id']])['id']),
+        )
+        areas = areas_by_council.get(ulb['councilId'])
+        if areas and rng.random() < CITY_SPECIFIC_AREA_SHARE:
+            form['city_specific_area_id'] = str(rng.choice(areas)['id'])
+        else:
+            del form['city_specific_area_id']
+        forms.append(form)
+    return forms
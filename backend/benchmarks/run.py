@@ -0,0 +1,303 @@
+"""
+Benchmark the calculators and the /submit path against an SQLite stand-in
+
+    python -m backend.benchmarks.run --plots 1000
+    python -m backend.benchmarks.run --compare benchmark-results/baseline.json
+
+No MySQL server is needed: the rule tables, tblmaster_council and
+project_details_test2 are created in a temporary SQLite database (see
+backend.benchmarks.fixtures) and the shared connection pool is pointed at
+it before the app is imported. Synthetic plots are generated from the
+reference data in frontend/static/data.
+
+Results are written as JSON with per-call latency percentiles. With
+--compare, the median of every benchmark is checked against an earlier
+result file and the run fails when one got slower than --threshold allows.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+from backend.benchmarks import sqlite_db
+from backend.benchmarks.fixtures import create_database, synthetic_forms
+from backend.utils.db import db_pool
+from backend.utils.reference_data import ReferenceData
+from backend.utils.project_submission import ProjectSubmission
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FOLDER = 'benchmark-results'
+SUBMIT_MODES = ('sequential', 'transactional', 'async')
+
+
+def summarize(durations):
+    """
+    :param durations: Per-call durations in seconds
+    :return: Dictionary of latency statistics in milliseconds
+    """
+    ordered = sorted(durations)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'total_s': round(total, 6),
+        'ops_per_s': round(len(ordered) / total, 1) if total else None,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+        'p50_ms': round(percentile(0.50), 4),
+        'p95_ms': round(percentile(0.95), 4),
+        'p99_ms': round(percentile(0.99), 4),
+        'min_ms': round(ordered[0] * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+
+def measure(function, items, warmup=0):
+    """
+    Time function(item) for every item, after warmup untimed calls
+
+    :return: Latency statistics from summarize()
+    """
+    for item in items[:warmup]:
+        function(item)
+
+    durations = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for item in items:
+            started = time.perf_counter()
+            function(item)
+            durations.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return summarize(durations)
+
+
+def use_database(path):
+    """
+    Point the shared connection pool at the SQLite stand-in
+    """
+    db_pool.close_all()
+    db_pool.db_config = {'database': path}
+    db_pool.connect = sqlite_db.connect
+    db_pool.reset()
+
+
+def benchmark_calculators(submissions, warmup):
+    from backend.calculators.fsi_calculator import FSICalculator
+    from backend.calculators.fsi_result_cache import FSIResultCache
+    from backend.calculators.setback_calculator import SetbackCalculator
+    from backend.calculators.area_statement_calculator import calculate_area_statement
+
+    results = {}
+    project_details = [submission.fsi_project_details() for submission in submissions]
+    for engine in ('sql', 'memory'):
+        calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine=engine)
+        errors = sum(1 for details in project_details if calculator.calculate_fsi(details).get('error'))
+        results[f'calculate_fsi[{engine}]'] = measure(calculator.calculate_fsi, project_details, warmup)
+        results[f'calculate_fsi[{engine}]']['unmatched_plots'] = errors
+
+    # The sql engine against the typed range columns and lookup indexes
+    calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine='sql', typed_ranges=True)
+    results['calculate_fsi[sql-typed]'] = measure(calculator.calculate_fsi, project_details, warmup)
+
+    # In front of the sql engine, as in the app by default; plots in the same
+    # rule table brackets share a result
+    cache = FSIResultCache(FSICalculator(db_pool.db_config, pool=db_pool, engine='sql'))
+    results['calculate_fsi[cached]'] = measure(cache.calculate_fsi, project_details, warmup)
+    results['calculate_fsi[cached]']['hit_ratio'] = round(cache.stats()['hit_ratio'], 4)
+
+    # All four sides of a plot in one grouped lookup against the in-memory setback table
+    setbacks = SetbackCalculator(db_pool)
+    setback_details = [submission.setback_project_details() for submission in submissions]
+    errors = sum(1 for details in setback_details if setbacks.calculate_setbacks(details).get('error'))
+    results['calculate_setbacks'] = measure(setbacks.calculate_setbacks, setback_details, warmup)
+    results['calculate_setbacks']['unmatched_plots'] = errors
+
+    params = [submission.params() for submission in submissions]
+    results['calculate_area_statement'] = measure(calculate_area_statement, params, warmup)
+    return results
+
+
+def benchmark_submit(forms, modes, warmup):
+    # Imported here, once the pool points at the stand-in: the app warms its
+    # caches from the database at import time
+    from backend import app as app_module
+
+    client = app_module.app.test_client()
+    results = {}
+    for mode in modes:
+        app_module.app.config['SUBMIT_MODE'] = mode
+
+        def submit(form):
+            response = client.post('/submit', data=form)
+            if response.status_code >= 400:
+                raise RuntimeError(f"/submit returned {response.status_code} in {mode} mode: {response.get_data(True)}")
+
+        results[f'submit[{mode}]'] = measure(submit, forms, warmup)
+        if mode == 'async':
+            # Report how long the queued calculations take to drain
+            started = time.perf_counter()
+            while app_module.calculation_queue.stats()['pending']:
+                time.sleep(0.01)
+            results['submit[async]']['drain_s'] = round(time.perf_counter() - started, 4)
+    return results
+
+
+def benchmark_recompute(folder, batch_size=100):
+    from backend.jobs import recompute_project_details as job
+
+    connection = db_pool.acquire()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT {', '.join(job.INPUT_COLUMNS)} FROM project_details_test2 ORDER BY id")
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    if not rows:
+        # No submit mode ran, so there is nothing stored to recompute
+        return {}
+
+    # One batch as a worker process calculates it, with the rule tables loaded once
+    job._init_worker()
+    batches = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+    results = {'recompute_rows': measure(job.recompute_rows, batches, warmup=1)}
+    results['recompute_rows']['rows_per_batch'] = batch_size
+
+    # The whole job: streaming the rows, a worker process and the batched UPDATEs
+    started = time.perf_counter()
+    count = job.recompute(
+        batch_size=batch_size, workers=1, state_file=os.path.join(folder, 'recompute_state.json'),
+        progress_interval=3600
+    )
+    results['recompute_rows']['job_rows_per_s'] = round(count / (time.perf_counter() - started))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median latencies with a baseline result file
+
+    :param results: Benchmark results of this run
+    :param baseline: Results loaded from an earlier run
+    :param threshold: Allowed relative slowdown, e.g. 0.1 for 10%
+    :return: Names of the benchmarks that regressed
+    """
+    regressions = []
+    for name, stats in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not previous.get('p50_ms'):
+            print(f"{name:40} {stats['p50_ms']:>10.4f} ms  (no baseline)")
+            continue
+        change = stats['p50_ms'] / previous['p50_ms'] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:40} {previous['p50_ms']:>10.4f} -> {stats['p50_ms']:>10.4f} ms  "
+              f"{change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(plots=500, seed=0, warmup=20, modes=SUBMIT_MODES, database=None):
+    """
+    Build the fixtures and run every benchmark
+
+    :return: Results dictionary (meta and benchmarks)
+    """
+    reference_data = ReferenceData().load()
+    with tempfile.TemporaryDirectory(prefix='citiwise-bench-') as folder:
+        path = database or os.path.join(folder, 'citiwise.sqlite3')
+        row_counts = create_database(path, reference_data)
+        use_database(path)
+
+        forms = synthetic_forms(reference_data, plots, seed)
+        submissions = []
+        for form in forms:
+            derived, errors = reference_data.resolve_selection(form)
+            submission, form_errors = ProjectSubmission.parse(form, derived)
+            if errors or form_errors:
+                raise ValueError(f"Invalid synthetic form: {errors + form_errors}")
+            submissions.append(submission)
+
+        benchmarks = {}
+        benchmarks.update(benchmark_calculators(submissions, warmup))
+        benchmarks.update(benchmark_submit(forms, modes, warmup))
+        benchmarks.update(benchmark_recompute(folder))
+        db_pool.close_all()
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'plots': plots,
+            'seed': seed,
+            'warmup': warmup,
+            'fixture_rows': row_counts,
+        },
+        'benchmarks': benchmarks,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plots', type=int, default=500, help="synthetic plots per benchmark")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the synthetic plots")
+    parser.add_argument('--warmup', type=int, default=20, help="untimed calls before each benchmark")
+    parser.add_argument('--modes', default=','.join(SUBMIT_MODES), help="comma-separated SUBMIT_MODE values to run")
+    parser.add_argument('--database', help="SQLite file to build the fixtures in (default: a temporary file)")
+    parser.add_argument('--output', help=f"results file (default: {RESULTS_FOLDER}/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed median slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    # The app logs every submission at INFO and DEBUG; keep that out of the timings
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+
+    modes = tuple(mode for mode in args.modes.split(',') if mode)
+    results = run(args.plots, args.seed, args.warmup, modes, args.database)
+
+    output = args.output or os.path.join(RESULTS_FOLDER, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    else:
+        for name, stats in results['benchmarks'].items():
+            print(f"{name:40} p50 {stats['p50_ms']:>10.4f} ms  p95 {stats['p95_ms']:>10.4f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
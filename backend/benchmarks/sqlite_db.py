@@ -0,0 +1,166 @@
+"""
+SQLite stand-in for the MySQL database, for benchmarks without a server
+
+Connections behave like mysql.connector connections as far as the app uses
+them: %s placeholders, dictionary cursors, lastrowid, CAST(... AS DECIMAL)
+with MySQL's rounding, INSERT IGNORE, LAST_INSERT_ID(expr), NOW() - INTERVAL
+%s SECOND and CHECKSUM TABLE. SET SESSION statements are ignored. SQLite errors are raised as
+mysql.connector errors, so the app's error handling runs unchanged.
+"""
+import re
+import sqlite3
+import hashlib
+from decimal import Decimal
+
+import mysql.connector
+
+from backend.calculators.fsi_rule_index import cast_decimal
+
+_CAST_DECIMAL = re.compile(r'CAST\((\w+) AS DECIMAL\)', re.I)
+_CHECKSUM_TABLE = re.compile(r'\s*CHECKSUM TABLE (.+)', re.I | re.S)
+_INSERT_IGNORE = re.compile(r'\bINSERT IGNORE\b', re.I)
+_SET_SESSION = re.compile(r'\s*SET SESSION\b', re.I)
+_NOW_MINUS_SECONDS = re.compile(r'NOW\(\) - INTERVAL %s SECOND', re.I)
+
+
+def _translate(query):
+    query = _INSERT_IGNORE.sub('INSERT OR IGNORE', _CAST_DECIMAL.sub(r'mysql_decimal(\1)', query))
+    # CURRENT_TIMESTAMP is stored in UTC, as datetime('now') returns it
+    query = _NOW_MINUS_SECONDS.sub("datetime('now', '-' || %s || ' seconds')", query)
+    return query.replace('%s', '?')
+
+
+def _parameter(value):
+    # sqlite3 has no Decimal adapter; DECIMAL columns hold numbers either way
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+        self._rows = None
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=()):
+        self._rows = None
+        try:
+            match = _CHECKSUM_TABLE.match(query)
+            if match:
+                self._rows = [self._checksum(table.strip()) for table in match.group(1).split(',')]
+                return
+            if _SET_SESSION.match(query):
+                return
+            self._cursor.execute(_translate(query), tuple(_parameter(value) for value in params))
+        except sqlite3.Error as e:
+            raise mysql.connector.errors.DatabaseError(msg=str(e)) from e
+
+    def executemany(self, query, seq_params):
+        self._rows = None
+        try:
+            self._cursor.executemany(
+                _translate(query), [tuple(_parameter(value) for value in params) for params in seq_params]
+            )
+        except sqlite3.Error as e:
+            raise mysql.connector.errors.DatabaseError(msg=str(e)) from e
+
+    def _checksum(self, table):
+        digest = hashlib.sha1()
+        for row in self._cursor.execute(f"SELECT * FROM {table} ORDER BY rowid"):
+            digest.update(repr(row).encode('utf-8'))
+        return ('Table', 'Checksum'), (f'main.{table}', int(digest.hexdigest()[:12], 16))
+
+    def _shape(self, columns, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(columns, row))
+
+    def _columns(self):
+        return [column[0] for column in self._cursor.description or ()]
+
+    def fetchone(self):
+        if self._rows is not None:
+            if not self._rows:
+                return None
+            columns, row = self._rows.pop(0)
+            return self._shape(columns, row)
+        return self._shape(self._columns(), self._cursor.fetchone())
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return [self._shape(columns, row) for columns, row in rows]
+        columns = self._columns()
+        return [self._shape(columns, row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        columns = self._columns()
+        return [self._shape(columns, row) for row in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, database):
+        """
+        mysql.connector-like connection to an SQLite database file
+
+        :param database: Path of the SQLite database
+        """
+        self._connection = sqlite3.connect(database, check_same_thread=False, timeout=30)
+        self._connection.create_function('mysql_decimal', 1, cast_decimal, deterministic=True)
+        self._connection.create_function('LAST_INSERT_ID', 1, self._set_last_insert_id)
+        self._connection.create_function('LAST_INSERT_ID', 0, lambda: self._last_insert_id)
+        self._last_insert_id = 0
+        self._open = True
+
+    def _set_last_insert_id(self, value):
+        # LAST_INSERT_ID(expr) returns expr and remembers it for this connection
+        self._last_insert_id = value
+        return value
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._connection, dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        if not self._open:
+            raise mysql.connector.errors.OperationalError(msg="Connection is closed")
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self._open = False
+        self._connection.close()
+
+
+def connect(database, **kwargs):
+    """
+    Drop-in for mysql.connector.connect; other MySQL settings are ignored
+
+    :param database: Path of the SQLite database
+    :return: SQLiteConnection
+    """
+    return SQLiteConnection(database)
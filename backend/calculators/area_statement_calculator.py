@@ -1,11 +1,48 @@
 import mysql.connector
 import logging
+import numpy as np
+
+# Plot layout types referenced by the amenity space and recreational open space rules
+SANCTION_LAYOUT = 'Sanction Layout/Sub Layout'
+GUNTHEWARI = 'Gunthewari'
+UNSANCTIONED_LAYOUTS = ('Compounding Structure', 'Non-Sanctioned Layout', 'Raw Land',
+                        'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout')
+ALL_LAYOUTS = (SANCTION_LAYOUT, GUNTHEWARI) + UNSANCTIONED_LAYOUTS
+
+# Area statement keys that are None when their rule does not apply
+NULLABLE_AREA_STATEMENT_KEYS = (
+    'amenity_space_proposed_a', 'amenity_space_proposed_b', 'amenity_space_proposed_c',
+    'recreational_open_space_a', 'recreational_open_space_b', 'recreational_open_space_c',
+    'recreational_open_space_d',
+)
 
 def calculate_area_statement(project_data):
     """
     Calculate area statement based on project data.
     
     :param project_data: Tuple containing project details
+    :return: Dictionary of calculated area statement values or None if calculation fails
+    """
+    try:
+        # Extract specific indices from project_data tuple
+        return calculate_area_statement_values(
+            project_data[30],  # area_plot_ownership_sqm
+            project_data[31],  # area_plot_measurement_sqm
+            project_data[29],  # area_plot_site_sqm
+            project_data[35],  # dp_rp_road_area_sqm
+            project_data[22],  # reservation_area_sqm
+            project_data[20],  # plot_layout_type
+        )
+    except IndexError as e:
+        logging.error("Error in area statement calculation: %s", e)
+        return None
+
+
+def calculate_area_statement_values(area_plot_ownership_sqm, area_plot_measurement_sqm, area_plot_site_sqm,
+                                    dp_rp_road_area_sqm, reservation_area_sqm, plot_layout_type):
+    """
+    Calculate area statement from the plot areas, deductions and layout type.
+
     :return: Dictionary of calculated area statement values or None if calculation fails
     """
     try:
@@ -16,13 +53,12 @@ def calculate_area_statement(project_data):
             except (ValueError, TypeError):
                 return default
 
-        # Extract specific indices from project_data tuple
-        area_as_per_ownership_document = safe_float(project_data[30])  # area_plot_ownership_sqm
-        area_as_per_tilr_or_city_survey_measurement_sheet = safe_float(project_data[31])  # area_plot_measurement_sqm
-        area_as_per_demarcated_drawing_area = safe_float(project_data[29])  # area_plot_site_sqm
-        deductions_a = safe_float(project_data[35])  # dp_rp_road_area_sqm
-        deductions_b = safe_float(project_data[22])  # reservation_area_sqm
-        plot_layout_type = str(project_data[20] or '')  # plot_layout_type
+        area_as_per_ownership_document = safe_float(area_plot_ownership_sqm)
+        area_as_per_tilr_or_city_survey_measurement_sheet = safe_float(area_plot_measurement_sqm)
+        area_as_per_demarcated_drawing_area = safe_float(area_plot_site_sqm)
+        deductions_a = safe_float(dp_rp_road_area_sqm)
+        deductions_b = safe_float(reservation_area_sqm)
+        plot_layout_type = str(plot_layout_type or '')
 
         # 1-3. Area columns
         # Use the most conservative (smallest) value
@@ -40,16 +76,16 @@ def calculate_area_statement(project_data):
 
 
         # 9-11. Amenity space calculations
-        amenity_space_proposed_a = 0 if balance_area_of_plot < 20000 and plot_layout_type in ['Sanction Layout/Sub Layout', 'Gunthewari', 'Compounding Structure', 'Non-Sanctioned Layout', 'Raw Land', 'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout'] else None
+        amenity_space_proposed_a = 0 if balance_area_of_plot < 20000 and plot_layout_type in ALL_LAYOUTS else None
         
         amenity_space_proposed_b = (
-            0 if balance_area_of_plot > 20000 and plot_layout_type in ['Sanction Layout/Sub Layout', 'Gunthewari'] 
+            0 if balance_area_of_plot > 20000 and plot_layout_type in (SANCTION_LAYOUT, GUNTHEWARI) 
             else None
         )
         
         amenity_space_proposed_c = (
             0.05 * area_of_plot 
-            if balance_area_of_plot > 20000 and plot_layout_type in ['Compounding Structure', 'Non-Sanctioned Layout', 'Raw Land', 'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout'] 
+            if balance_area_of_plot > 20000 and plot_layout_type in UNSANCTIONED_LAYOUTS 
             else None
         )
 
@@ -63,22 +99,22 @@ def calculate_area_statement(project_data):
         net_plot_area = balance_area_of_plot - amenity_space_proposed
 
         # 14-17. Recreational open space calculations
-        recreational_open_space_a = 0 if plot_layout_type == 'Sanction Layout/Sub Layout' else None
+        recreational_open_space_a = 0 if plot_layout_type == SANCTION_LAYOUT else None
         
         recreational_open_space_b = (
             0.10 * area_of_plot 
-            if net_plot_area > 4000 and plot_layout_type in ['Gunthewari', 'Compounding Structure', 'Non-Sanctioned Layout', 'Raw Land', 'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout'] 
+            if net_plot_area > 4000 and plot_layout_type in (GUNTHEWARI,) + UNSANCTIONED_LAYOUTS 
             else None
         )
         
         recreational_open_space_c = (
             max(0.10 * area_of_plot, 200) 
-            if net_plot_area < 4000 and plot_layout_type in ['Compounding Structure', 'Non-Sanctioned Layout', 'Raw Land', 'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout']
+            if net_plot_area < 4000 and plot_layout_type in UNSANCTIONED_LAYOUTS
             else None
         )
         
         recreational_open_space_d = (
-            0 if net_plot_area < 4000 and plot_layout_type == 'Gunthewari' 
+            0 if net_plot_area < 4000 and plot_layout_type == GUNTHEWARI 
             else None
         )
 
@@ -118,5 +154,130 @@ def calculate_area_statement(project_data):
 
     except Exception as e:
         # Log the error for debugging
-        logging.error(f"Error in area statement calculation: {e}")
+        logging.error("Error in area statement calculation: %s", e)
         return None
+
+
+def _safe_float_array(values):
+    """
+    Convert a column to float64 the way calculate_area_statement converts each value
+
+    :param values: NumPy array or sequence of raw values
+    :return: float64 NumPy array
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiub':
+        return values.astype(np.float64)
+
+    def safe_float(value, default=0):
+        try:
+            return float(value or default)
+        except (ValueError, TypeError):
+            return default
+
+    return np.array([safe_float(value) for value in values], dtype=np.float64)
+
+
+def _sequential_min(first, *others):
+    """Element-wise equivalent of Python's min(), including its NaN handling"""
+    result = first
+    for other in others:
+        result = np.where(other < result, other, result)
+    return result
+
+
+def calculate_area_statement_columns(columns):
+    """
+    Calculate area statements for many plots at once from columnar data
+
+    Equivalent to calling calculate_area_statement on every plot, evaluated
+    with array masks instead of per-plot branches.
+
+    :param columns: Mapping (dict of arrays, NumPy structured array, ...) with
+                    area_plot_ownership_sqm, area_plot_measurement_sqm,
+                    area_plot_site_sqm, dp_rp_road_area_sqm,
+                    reservation_area_sqm and plot_layout_type columns
+    :return: Dictionary of float64 arrays keyed like calculate_area_statement;
+             keys in NULLABLE_AREA_STATEMENT_KEYS are masked arrays, masked where
+             the scalar function returns None
+    """
+    area_as_per_ownership_document = _safe_float_array(columns['area_plot_ownership_sqm'])
+    area_as_per_tilr_or_city_survey_measurement_sheet = _safe_float_array(columns['area_plot_measurement_sqm'])
+    area_as_per_demarcated_drawing_area = _safe_float_array(columns['area_plot_site_sqm'])
+    deductions_a = _safe_float_array(columns['dp_rp_road_area_sqm'])
+    deductions_b = _safe_float_array(columns['reservation_area_sqm'])
+    plot_layout_type = np.array([str(value or '') for value in columns['plot_layout_type']], dtype=object)
+
+    area_of_plot = _sequential_min(
+        area_as_per_ownership_document,
+        area_as_per_tilr_or_city_survey_measurement_sheet,
+        area_as_per_demarcated_drawing_area
+    )
+    deductions = deductions_a + deductions_b
+    balance_area_of_plot = area_of_plot - deductions
+
+    is_sanction = plot_layout_type == SANCTION_LAYOUT
+    is_gunthewari = plot_layout_type == GUNTHEWARI
+    is_unsanctioned = np.isin(plot_layout_type, UNSANCTIONED_LAYOUTS)
+    zeros = np.zeros_like(area_of_plot)
+
+    amenity_a_applies = (balance_area_of_plot < 20000) & (is_sanction | is_gunthewari | is_unsanctioned)
+    amenity_b_applies = (balance_area_of_plot > 20000) & (is_sanction | is_gunthewari)
+    amenity_c_applies = (balance_area_of_plot > 20000) & is_unsanctioned
+    amenity_c = 0.05 * area_of_plot
+
+    # Rules that do not apply contribute +0.0, which leaves a Python sum() unchanged
+    amenity_space_proposed = 0.0 + np.where(amenity_c_applies, amenity_c, zeros)
+    net_plot_area = balance_area_of_plot - amenity_space_proposed
+
+    recreational_a_applies = is_sanction
+    recreational_b_applies = (net_plot_area > 4000) & (is_gunthewari | is_unsanctioned)
+    recreational_c_applies = (net_plot_area < 4000) & is_unsanctioned
+    recreational_d_applies = (net_plot_area < 4000) & is_gunthewari
+    recreational_b = 0.10 * area_of_plot
+    recreational_c = np.where(200 > recreational_b, 200.0, recreational_b)
+
+    recreational_open_space = (
+        0.0 +
+        np.where(recreational_b_applies, recreational_b, zeros) +
+        np.where(recreational_c_applies, recreational_c, zeros)
+    )
+
+    return {
+        'area_of_plot': area_of_plot,
+        'area_as_per_ownership_document': area_as_per_ownership_document,
+        'area_as_per_tilr_or_city_survey_measurement_sheet': area_as_per_tilr_or_city_survey_measurement_sheet,
+        'area_as_per_demarcated_drawing_area': area_as_per_demarcated_drawing_area,
+        'deductions': deductions,
+        'deductions_a': deductions_a,
+        'deductions_b': deductions_b,
+        'balance_area_of_plot': balance_area_of_plot,
+        'amenity_space_proposed': amenity_space_proposed,
+        'amenity_space_proposed_a': np.ma.masked_array(zeros, mask=~amenity_a_applies),
+        'amenity_space_proposed_b': np.ma.masked_array(zeros, mask=~amenity_b_applies),
+        'amenity_space_proposed_c': np.ma.masked_array(amenity_c, mask=~amenity_c_applies),
+        'net_plot_area': net_plot_area,
+        'recreational_open_space': recreational_open_space,
+        'recreational_open_space_a': np.ma.masked_array(zeros, mask=~recreational_a_applies),
+        'recreational_open_space_b': np.ma.masked_array(recreational_b, mask=~recreational_b_applies),
+        'recreational_open_space_c': np.ma.masked_array(recreational_c, mask=~recreational_c_applies),
+        'recreational_open_space_d': np.ma.masked_array(zeros, mask=~recreational_d_applies),
+    }
+
+
+def area_statement_records(area_statement_columns):
+    """
+    Split columnar area statements back into per-plot dictionaries
+
+    :param area_statement_columns: Result of calculate_area_statement_columns
+    :return: List of dictionaries shaped like calculate_area_statement results
+    """
+    keys = list(area_statement_columns)
+    values = []
+    for key in keys:
+        column = area_statement_columns[key]
+        if isinstance(column, np.ma.MaskedArray):
+            values.append([None if masked else value
+                           for value, masked in zip(column.data.tolist(), np.ma.getmaskarray(column).tolist())])
+        else:
+            values.append(column.tolist())
+    return [dict(zip(keys, row)) for row in zip(*values)]
@@ -0,0 +1,250 @@
+import json
+import logging
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+
+from backend.calculators.fsi_rule_index import FSIRuleIndex, RULE_TABLES, normalize_key
+
+
+def read_ndjson(stream):
+    """
+    Read one JSON document per line from a binary or text stream
+
+    Blank lines are skipped. Lines that are not valid JSON yield None so that
+    results stay aligned with the input lines.
+
+    :param stream: Iterable of lines
+    :return: Generator of parsed documents
+    """
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class RuleIntervalMatcher:
+    def __init__(self, rule_index, max_cells=1000000, scalar_probes=8):
+        """
+        Answer groups of range lookups that share a rule table and key
+
+        Each group is matched with one NumPy comparison against the key's
+        intervals, taking the first row in load order like a single lookup.
+
+        :param rule_index: FSIRuleIndex holding the tables matched against
+        :param max_cells: Upper bound on probes x intervals compared in one NumPy step
+        :param scalar_probes: Groups with fewer probes are looked up one by one in the index
+        """
+        self.rule_index = rule_index
+        self.max_cells = max_cells
+        self.scalar_probes = scalar_probes
+        self._arrays = {}
+
+    def preload(self):
+        """
+        Build the interval arrays of every key of the index's ranged tables now
+
+        :return: Number of (table, key) arrays built or already current
+        """
+        count = 0
+        for table in self.rule_index.tables:
+            if not RULE_TABLES[table].ranges:
+                continue
+            for key in self.rule_index.keys(table):
+                self._interval_arrays(table, key)
+                count += 1
+        return count
+
+    def _interval_arrays(self, table, key):
+        """
+        Return (lows, highs, rows) arrays for one key of a ranged rule table
+
+        Intervals are ordered by load order, so the first match along an axis
+        is the row a single-plot lookup would return.
+        """
+        version = self.rule_index.version(table)
+        cached = self._arrays.get((table, key))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        entries = sorted(self.rule_index.intervals(table, key), key=lambda entry: entry[1])
+        dimensions = len(RULE_TABLES[table].ranges)
+        lows = np.array([[low for low, _ in bounds] for bounds, _, _ in entries], dtype=float).reshape(-1, dimensions)
+        highs = np.array([[high for _, high in bounds] for bounds, _, _ in entries], dtype=float).reshape(-1, dimensions)
+        arrays = (lows, highs, [row for _, _, row in entries])
+        self._arrays[(table, key)] = (version, arrays)
+        return arrays
+
+    def match_group(self, table, key, probes):
+        """
+        Find the matching row for every probe of one (table, key) group
+
+        :param table: Rule table name
+        :param key: Normalized key tuple
+        :param probes: List of range value tuples, one per plot
+        :return: List of rows (or None) aligned with probes
+        """
+        if not RULE_TABLES[table].ranges:
+            columns = {column: column for column in RULE_TABLES[table].values}
+            row = self.rule_index.lookup(table, columns, key)
+            return [row] * len(probes)
+
+        if len(probes) < self.scalar_probes:
+            # For a few probes NumPy's per-call overhead outweighs the comparison
+            return [self.rule_index.match(table, key, probe) for probe in probes]
+
+        lows, highs, rows = self._interval_arrays(table, key)
+        matches = [None] * len(probes)
+        if not rows:
+            return matches
+
+        values = np.array(probes, dtype=float)
+        step = max(1, self.max_cells // len(rows))
+        for start in range(0, len(values), step):
+            chunk = values[start:start + step]
+            mask = np.ones((len(chunk), len(rows)), dtype=bool)
+            for dimension in range(lows.shape[1]):
+                column = chunk[:, dimension, None]
+                mask &= (lows[:, dimension] <= column) & (column <= highs[:, dimension])
+            found = mask.any(axis=1)
+            first = mask.argmax(axis=1)
+            for offset in np.flatnonzero(found):
+                matches[start + offset] = rows[first[offset]]
+        return matches
+
+
+class FSIBatchEvaluator:
+    def __init__(self, calculator, chunk_size=5000, max_cells=1000000, rule_index=None, scalar_probes=8):
+        """
+        Evaluate FSICalculator rules over many plots at once
+
+        Plots are planned with the calculator's own rules, grouped by rule table
+        and key, and each group's range lookups are answered with one NumPy
+        comparison against that key's intervals. Lookups that miss fall through
+        to the plot's next applicable rule, exactly like calculate_fsi.
+
+        :param calculator: FSICalculator whose rules are evaluated
+        :param chunk_size: Plots evaluated together when streaming
+        :param max_cells: Upper bound on plots x intervals compared in one NumPy step
+        :param rule_index: FSIRuleIndex to read in sql mode, to share one with other
+                           components; by default one of its own is kept
+        :param scalar_probes: Groups with fewer probes are looked up one by one in the index
+        """
+        self.calculator = calculator
+        self.chunk_size = chunk_size
+        self.rule_index = calculator.rule_index or rule_index or FSIRuleIndex(
+            calculator._connect_to_database, calculator.refresh_interval
+        )
+        self.matcher = RuleIntervalMatcher(self.rule_index, max_cells, scalar_probes)
+        self.logger = logging.getLogger(__name__)
+
+    def preload(self):
+        """
+        Load the rule tables and build the interval arrays of every key now
+
+        :return: Number of (table, key) arrays built or already current
+        """
+        self.rule_index.refresh()
+        return self.matcher.preload()
+
+    def _plan(self, project_details):
+        """
+        Collect the normalized lookups of every rule applicable to one plot
+
+        :return: List of (rule, RuleLookup, group key, probe) tuples
+        """
+        plan = []
+        for rule, lookup in self.calculator.rule_lookups(project_details):
+            key = tuple(normalize_key(value) for value in lookup.keys)
+            if None in key or any(value is None for value in lookup.ranges):
+                continue
+            probe = tuple(float(value) for value in lookup.ranges)
+            plan.append((rule, lookup, (lookup.table, key), probe))
+        return plan
+
+    def evaluate(self, rows):
+        """
+        Calculate FSI for a list of project_details dictionaries
+
+        :param rows: List of project_details dictionaries
+        :return: List of FSI calculation results in input order
+        """
+        calculator = self.calculator
+        try:
+            self.rule_index.refresh()
+        except Exception as e:
+            self.logger.error("Error loading FSI rule tables for batch: %s", e)
+            return [calculator._error_result(f"Error calculating FSI: {str(e)}") for _ in rows]
+
+        results = [None] * len(rows)
+        pending = []
+        for position, project_details in enumerate(rows):
+            if not isinstance(project_details, dict):
+                results[position] = calculator._error_result("Invalid project details")
+                continue
+            try:
+                plan = self._plan(project_details)
+            except Exception as e:
+                results[position] = calculator._error_result(f"Error calculating FSI: {str(e)}")
+                continue
+            if plan:
+                pending.append((position, plan, 0))
+            else:
+                results[position] = calculator._error_result("No matching FSI calculation rule found")
+
+        # Each round resolves the current candidate rule of every pending plot
+        while pending:
+            groups = {}
+            for item in pending:
+                position, plan, step = item
+                groups.setdefault(plan[step][2], []).append(item)
+
+            pending = []
+            for (table, key), members in groups.items():
+                matches = self.matcher.match_group(table, key, [plan[step][3] for _, plan, step in members])
+                for (position, plan, step), row in zip(members, matches):
+                    rule, lookup = plan[step][:2]
+                    if row is not None:
+                        result = {alias: row[column] for alias, column in lookup.columns.items()}
+                        results[position] = calculator._build_result(rule, result)
+                    elif step + 1 < len(plan):
+                        pending.append((position, plan, step + 1))
+                    else:
+                        results[position] = calculator._error_result("No matching FSI calculation rule found")
+        return results
+
+    def iter_results(self, rows):
+        """
+        Lazily calculate FSI for an iterable of project_details, chunk by chunk
+
+        :param rows: Iterable of project_details dictionaries
+        :return: Generator of FSI calculation results in input order
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            yield from self.evaluate(chunk)
+
+    def iter_ndjson(self, rows):
+        """
+        Lazily calculate FSI and serialize each result as one NDJSON line
+
+        :param rows: Iterable of project_details dictionaries
+        :return: Generator of newline-terminated JSON strings
+        """
+        for result in self.iter_results(rows):
+            yield json.dumps(result, default=_json_default) + '\n'
@@ -1,17 +1,129 @@
 import mysql.connector
 import logging
+from time import perf_counter
+from collections import namedtuple
+from backend.calculators.fsi_rule_index import FSIRuleIndex, RuleLookup, rule_query
+from backend.calculators.fsi_batch import FSIBatchEvaluator
+from backend.utils.metrics import Counter, Histogram, FAST_BUCKETS
+
+# Fixed sets the rules test against, built once
+NON_RESIDENTIAL_TYPES = frozenset(['Commercial', 'Mixed', 'Educational', 'Group Housing', 'Institutional'])
+VALID_PROPOSALS = NON_RESIDENTIAL_TYPES | {'Residential'}
+KNOWN_PROPOSALS = VALID_PROPOSALS | {'Industrial'}
+VALID_LAYOUT_TYPES = frozenset(['Sanction Layout/Sub Layout', 'Compounding Structure',
+                                'Non-Sanctioned Layout', 'Raw Land',
+                                'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout'])
+KNOWN_LAYOUT_TYPES = VALID_LAYOUT_TYPES | {'Gunthewari'}
+INDUSTRIAL_ZONES = frozenset(['Industrial Zone', 'Service Industries - (I-1)',
+                              'General Industries - (I-2)', 'Special Industries (I-3)'])
+YES_NO = frozenset(['Yes', 'No'])
+CRZ_COUNCILS = frozenset([183, 191, 407])
+PCMC_COUNCILS = frozenset(['443', '1014'])
+# For Pune,Nagpur, Nashik, Municipal Corporations in MMR (refer table dcr_permisible_fsi_council_group)
+MMR_COUNCILS = frozenset([418, 1011, 383, 419, 1013])
+MMAD_COUNCILS = frozenset([178, 365, 366, 367, 369, 370, 371, 372, 373, 374, 375, 376, 377,
+                           378, 381, 382, 407, 443, 1009, 1010, 1014, 1015, 1016, 1017])
+
+RULE_LOOKUPS = Counter(
+    'citiwise_fsi_rule_lookups_total',
+    "FSI rule lookups by rule and whether a rule table row matched (hit) or not (miss)",
+    ['rule', 'result']
+)
+RULE_LOOKUP_SECONDS = Histogram(
+    'citiwise_fsi_rule_lookup_seconds', "Time to look up one FSI rule in its rule table", ['rule'],
+    buckets=FAST_BUCKETS
+)
+
+# Stand-in for any value a rule does not test for
+OTHER = '*'
+
+# The attributes that decide which rules apply to a project
+RuleKey = namedtuple('RuleKey', [
+    'has_area_code', 'proposal', 'crz_status', 'tod', 'city_specific_area', 'layout',
+    'industrial_zone', 'crz_council', 'nagpur', 'pcmc'
+])
+
+# Decision table: rule name and its condition on a RuleKey, in precedence order
+RULES = (
+    # Rule 1 & 2: City Specific Area
+    ('city_specific_non_residential',
+     lambda key: key.has_area_code and key.proposal in NON_RESIDENTIAL_TYPES),
+    ('city_specific_residential',
+     lambda key: key.has_area_code and key.proposal == 'Residential'),
+    # Rule 3: CRZ Status
+    ('crz_specific',
+     lambda key: key.crz_status == 'Yes' and key.crz_council),
+    # Rule 4: Nagpur TOD
+    ('nagpur_tod',
+     lambda key: (key.crz_status == 'No' and key.tod == 'Yes' and key.city_specific_area is None and
+                  key.nagpur)),
+    # Rules 5 & 6: PCMC TOD
+    ('pcmc_tod',
+     lambda key: (key.crz_status == 'No' and key.tod == 'Yes' and key.city_specific_area is None and
+                  key.pcmc and key.layout in VALID_LAYOUT_TYPES)),
+    # Rule 7: PCMC Gunthewari TOD
+    ('pcmc_gunthewari_tod',
+     lambda key: (key.crz_status == 'No' and key.tod == 'Yes' and key.city_specific_area is None and
+                  key.pcmc and key.layout == 'Gunthewari')),
+    # Rule 8: Gunthewari Non-TOD
+    ('gunthewari_non_tod',
+     lambda key: (key.crz_status == 'No' and key.tod == 'No' and key.city_specific_area == '' and
+                  key.layout == 'Gunthewari' and key.proposal in VALID_PROPOSALS)),
+    # Rule 9: Industrial
+    ('industrial',
+     lambda key: (key.crz_status == 'No' and key.tod == 'No' and key.city_specific_area is None and
+                  (key.proposal == 'Industrial' or key.industrial_zone))),
+    # Rules 10 & 11: Normal Cases
+    ('normal_cases',
+     lambda key: (key.crz_status == 'No' and key.tod == 'No' and key.city_specific_area is None and
+                  key.layout in VALID_LAYOUT_TYPES and key.proposal in VALID_PROPOSALS)),
+)
 
 class FSICalculator:
-    def __init__(self, db_config):
+    # Result aliases for the basic/premium FSI and TDR columns of the dcr_* tables
+    FSI_COLUMNS = {
+        'basic_fsi': 'basicFSI',
+        'premium_fsi': 'FSI_Payment_Premium',
+        'tdr': 'Max_permissible_TDR_loading'
+    }
+
+    # Rules whose result carries the remark stored with the rule row
+    SPECIFIC_AREA_RULES = ('city_specific_non_residential', 'city_specific_residential', 'crz_specific')
+
+    INDUSTRIAL_REMARK = "Special building (above 24m height): Basic FSI and Premium FSI remain same, "
+
+    def __init__(self, db_config, engine='sql', refresh_interval=60, pool=None, typed_ranges=False):
         """
         Initialize the FSI Calculator with database connection details
         
         :param db_config: Dictionary containing database connection parameters
+        :param engine: 'sql' to query the rule tables on every call, 'memory' to
+                       answer rules from an in-memory index of the rule tables
+        :param refresh_interval: Seconds between rule table change checks in memory mode
+        :param pool: Optional shared ConnectionPool; connections are opened directly without one
+        :param typed_ranges: In sql mode, compare the DECIMAL range columns added by
+                             backend.jobs.migrate_rule_tables instead of casting the text columns
         """
         self.db_config = db_config
-        logging.basicConfig(level=logging.INFO)
+        self.pool = pool
+        self.typed_ranges = typed_ranges
+        self.refresh_interval = refresh_interval
         self.logger = logging.getLogger(__name__)
 
+        if engine not in ('sql', 'memory'):
+            raise ValueError(f"Unknown FSI engine: {engine}")
+        self.engine = engine
+        self.rule_index = (FSIRuleIndex(self._connect_to_database, refresh_interval)
+                           if engine == 'memory' else None)
+        self._batch_evaluator = None
+        self._dispatch = {}
+        self._lookup_builders = {rule: getattr(self, f'_lookup_{rule}') for rule, _ in RULES}
+        # (hit counter, miss counter, latency histogram) of each rule
+        self._rule_metrics = {
+            rule: (RULE_LOOKUPS.labels(rule, 'hit'), RULE_LOOKUPS.labels(rule, 'miss'), RULE_LOOKUP_SECONDS.labels(rule))
+            for rule, _ in RULES
+        }
+
     def _connect_to_database(self):
         """
         Establish a database connection
@@ -19,12 +131,29 @@ class FSICalculator:
         :return: MySQL database connection
         """
         try:
+            if self.pool is not None:
+                return self.pool.acquire()
             connection = mysql.connector.connect(**self.db_config)
             return connection
         except mysql.connector.Error as e:
-            self.logger.error(f"Database connection error: {e}")
+            self.logger.error("Database connection error: %s", e)
             return None
 
+    def _fetch_rule(self, cursor, lookup):
+        """
+        Fetch the first row of a rule table matching a rule lookup
+
+        :param cursor: Dictionary cursor (unused in memory mode)
+        :param lookup: RuleLookup built by one of the _lookup_* rules
+        :return: Dictionary keyed by result alias, or None when no row matches
+        """
+        if self.rule_index is not None:
+            return self.rule_index.lookup(*lookup)
+
+        query, params = rule_query(lookup, self.typed_ranges)
+        cursor.execute(query, params)
+        return cursor.fetchone()
+
     def _get_max_road_width(self, project_details):
         """
         Calculate the maximum road width from available road details
@@ -47,249 +176,219 @@ class FSICalculator:
         :param council_id: Council ID
         :return: ULB Type string
         """
-        mmr_councils = [418, 1011, 383, 419, 1013] # For Pune,Nagpur, Nashik, Municipal Corporations in MMR (refer table dcr_permisible_fsi_council_group)
-
-        mmad_councils = [178, 365, 366, 367, 369, 370, 371, 372, 373, 374, 375, 376, 377, 
-                        378, 381, 382, 407, 443, 1009, 1010, 1014, 1015, 1016, 1017]
-        
         council_id = int(council_id) if isinstance(council_id, str) else council_id
         
-        if council_id in mmr_councils:
+        if council_id in MMR_COUNCILS:
             return 'MMR'
-        elif council_id in mmad_councils:
+        elif council_id in MMAD_COUNCILS:
             return 'MMAD'
         elif council_id == 383:  # Special case for Nagpur Municipal Corporation
             return 'NMNMC'
         else:
             return 'ALL'
 
-    def _check_city_specific_non_residential(self, cursor, project_details):
+    def _classify(self, project_details):
         """
-        Rule 1: Check city specific area for non-residential proposals
+        Reduce project details to the attributes that decide which rules apply
+
+        Free-text values outside the sets the rules test are folded into OTHER,
+        which keeps the number of distinct keys small.
+
+        :param project_details: Dictionary containing project details
+        :return: RuleKey
+        """
+        def category(value, known):
+            return value if isinstance(value, str) and value in known else OTHER
+
+        council_id = project_details.get('council_id')
+        crz_council_id = int(council_id) if isinstance(council_id, str) else council_id
+        city_specific_area = project_details.get('city_specific_area')
+        zone = project_details.get('zone')
+
+        return RuleKey(
+            has_area_code=bool(project_details.get('city_specific_area_areaCode')),
+            proposal=category(project_details.get('type_of_proposal'), KNOWN_PROPOSALS),
+            crz_status=category(project_details.get('crz_status'), YES_NO),
+            tod=category(project_details.get('tod'), YES_NO),
+            city_specific_area=(None if city_specific_area is None
+                                else '' if isinstance(city_specific_area, str) and city_specific_area == ''
+                                else OTHER),
+            layout=category(project_details.get('plot_layout_type'), KNOWN_LAYOUT_TYPES),
+            industrial_zone=isinstance(zone, str) and zone in INDUSTRIAL_ZONES,
+            crz_council=crz_council_id in CRZ_COUNCILS,
+            nagpur=str(council_id) == '383',
+            pcmc=str(council_id) in PCMC_COUNCILS,
+        )
+
+    def _candidate_rules(self, key):
+        """
+        Look up the rules that apply to a RuleKey in the compiled dispatch table
+
+        Each distinct key is resolved against RULES once and memoized, so later
+        calls cost a single dictionary lookup.
+
+        :param key: RuleKey from _classify
+        :return: Tuple of rule names in precedence order
+        """
+        rules = self._dispatch.get(key)
+        if rules is None:
+            rules = tuple(rule for rule, applies in RULES if applies(key))
+            self._dispatch[key] = rules
+        return rules
+
+    def candidate_rules(self, project_details):
+        """
+        Names of the rules that apply to a project, in precedence order
+
+        Mutually exclusive rules yield a single candidate. Later candidates are
+        only consulted when the earlier rule's lookup finds no matching row.
+
+        :param project_details: Dictionary containing project details
+        :return: Tuple of rule names
+        """
+        return self._candidate_rules(self._classify(project_details))
+
+    def _lookup_city_specific_non_residential(self, project_details, road_width, ulb_type):
+        """
+        Rule 1: City specific area for non-residential proposals
+        """
+        return RuleLookup(
+            'dcr_setback_specificarea_restriction',
+            {'basic_fsi': 'basic_fsi_Other', 'remark_fsi': 'Remark'},
+            keys=(project_details.get('city_specific_area_areaCode'),),
+            ranges=(project_details.get('area_plot_site_sqm'),)
+        )
+
+    def _lookup_city_specific_residential(self, project_details, road_width, ulb_type):
+        """
+        Rule 2: City specific area for residential proposals
+        """
+        return RuleLookup(
+            'dcr_setback_specificarea_restriction',
+            {'basic_fsi': 'basic_fsi_res', 'remark_fsi': 'Remark'},
+            keys=(project_details.get('city_specific_area_areaCode'),),
+            ranges=(project_details.get('area_plot_site_sqm'),)
+        )
+
+    def _lookup_crz_specific(self, project_details, road_width, ulb_type):
+        """
+        Rule 3: CRZ specific restrictions
         """
-        non_residential_types = ['Commercial', 'Mixed', 'Educational', 'Group Housing', 'Institutional']
-        
-        if (project_details.get('city_specific_area_areaCode') and 
-            project_details.get('type_of_proposal') in non_residential_types):
-            
-            query = """
-            SELECT basic_fsi_Other as basic_fsi, Remark as remark_fsi 
-            FROM dcr_setback_specificarea_restriction 
-            WHERE strAreaCode = %s 
-            AND %s BETWEEN CAST(strMinPlotArea AS DECIMAL) AND CAST(strMinPlotArea2 AS DECIMAL)
-            """
-            cursor.execute(query, (
-                project_details.get('city_specific_area_areaCode'),
-                project_details.get('area_plot_site_sqm')
-            ))
-            return cursor.fetchone()
-        return None
-
-    def _check_city_specific_residential(self, cursor, project_details):
-        """
-        Rule 2: Check city specific area for residential proposals
-        """
-        if (project_details.get('city_specific_area_areaCode') and 
-            project_details.get('type_of_proposal') == 'Residential'):
-            
-            query = """
-            SELECT basic_fsi_res as basic_fsi, Remark as remark_fsi 
-            FROM dcr_setback_specificarea_restriction 
-            WHERE strAreaCode = %s 
-            AND %s BETWEEN CAST(strMinPlotArea AS DECIMAL) AND CAST(strMinPlotArea2 AS DECIMAL)
-            """
-            cursor.execute(query, (
-                project_details.get('city_specific_area_areaCode'),
-                project_details.get('area_plot_site_sqm')
-            ))
-            return cursor.fetchone()
-        return None
-
-    def _check_crz_specific(self, cursor, project_details):
-        """
-        Rule 3: Check CRZ specific restrictions
-        """
-        crz_councils = [183, 191, 407]
         council_id = int(project_details.get('council_id')) if isinstance(project_details.get('council_id'), str) else project_details.get('council_id')
-        
-        if (project_details.get('crz_status') == 'Yes' and 
-            council_id in crz_councils):
-            
-            query = """
-            SELECT basic_fsi, Remark as remark_fsi 
-            FROM crz_specificarea_restriction 
-            WHERE Councilid = %s 
-            AND strLocationType = %s 
-            AND tpzud_zone_id = %s
-            """
-            cursor.execute(query, (
-                council_id,
-                project_details.get('location'),
-                project_details.get('zone_id')
-            ))
-            return cursor.fetchone()
-        return None
-
-    def _check_nagpur_tod(self, cursor, project_details, road_width):
-        """
-        Rule 4: Check Nagpur TOD
-        """
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'Yes' and 
-            project_details.get('city_specific_area') is None and 
-            str(project_details.get('council_id')) == '383'):
-            
-            query = """
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi, 
-                   Max_permissible_TDR_loading as tdr
-            FROM Dcr_tod_fsi_permissible
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND %s BETWEEN CAST(strPlotArea_Range1 AS DECIMAL) AND CAST(strPlotArea_Range2 AS DECIMAL)
-            """
-            cursor.execute(query, (road_width, project_details.get('area_plot_site_sqm')))
-            return cursor.fetchone()
-        return None
-
-    def _check_pcmc_tod(self, cursor, project_details, road_width):
-        """
-        Rules 5 & 6: Check PCMC TOD cases
-        """
-        pcmc_councils = ['443', '1014']
-        valid_layout_types = ['Sanction Layout/Sub Layout', 'Compounding Structure', 
-                            'Non-Sanctioned Layout', 'Raw Land', 
-                            'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout']
-        
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'Yes' and 
-            project_details.get('city_specific_area') is None and 
-            str(project_details.get('council_id')) in pcmc_councils and
-            project_details.get('plot_layout_type') in valid_layout_types):
-            
-            table = ('dcr_normal_fsi_permissible' 
-                    if project_details.get('location') == 'Congested' 
-                    else 'dcr_normal_fsi_permissible_nonconjusted')
-            
-            query = f"""
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi, 
-                   Max_permissible_TDR_loading as tdr
-            FROM {table}
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND ULBType = 'PCMC'
-            """
-            cursor.execute(query, (road_width,))
-            return cursor.fetchone()
-        return None
-
-    def _check_pcmc_gunthewari_tod(self, cursor, project_details, road_width):
-        """
-        Rule 7: Check PCMC Gunthewari TOD
-        """
-        pcmc_councils = ['443', '1014']
-        
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'Yes' and 
-            project_details.get('city_specific_area') is None and 
-            str(project_details.get('council_id')) in pcmc_councils and
-            project_details.get('plot_layout_type') == 'Gunthewari'):
-            
-            query = """
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi, 
-                   Max_permissible_TDR_loading as tdr
-            FROM dcr_gunthewari_fsi_permissible
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND TypeOfConjustedArea = %s
-            AND ULBType = 'PCMC'
-            """
-            cursor.execute(query, (road_width, project_details.get('location')))
-            return cursor.fetchone()
-        return None
-
-    def _check_gunthewari_non_tod(self, cursor, project_details, road_width, ulb_type):
-        """
-        Rule 8: Check Gunthewari non-TOD
-        """
-        valid_proposals = ['Residential', 'Commercial', 'Mixed', 'Educational', 
-                         'Group Housing', 'Institutional']
-        
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'No' and 
-            project_details.get('city_specific_area') is '' and 
-            project_details.get('plot_layout_type') == 'Gunthewari' and
-            project_details.get('type_of_proposal') in valid_proposals):
-            
-            query = """
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi, 
-                   Max_permissible_TDR_loading as tdr
-            FROM dcr_gunthewari_fsi_permissible
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND TypeOfConjustedArea = %s
-            AND ULBType = %s
-            """
-            cursor.execute(query, (road_width, project_details.get('location'), ulb_type))
-            return cursor.fetchone()
-        return None
-
-    def _check_industrial(self, cursor, project_details, road_width):
-        """
-        Rule 9: Check Industrial cases
-        """
-        industrial_zones = ['Industrial Zone', 'Service Industries - (I-1)', 
-                          'General Industries - (I-2)', 'Special Industries (I-3)']
-        
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'No' and 
-            project_details.get('city_specific_area') is None and 
-            (project_details.get('type_of_proposal') == 'Industrial' or 
-             project_details.get('zone') in industrial_zones)):
-            
-            query = """
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi
-            FROM dcr_normal_fsi_permissible_industrial
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND %s BETWEEN CAST(strPlotSizeRange1 AS DECIMAL) AND CAST(strPlotSizeRange2 AS DECIMAL)
-            AND SpecialFlag = 'N'
-            """
-            cursor.execute(query, (road_width, project_details.get('area_plot_site_sqm')))
-            result = cursor.fetchone()
-            
-            if result:
-                result['remark_fsi'] = (
-                    f"Special building (above 24m height): Basic FSI and Premium FSI remain same, "
-                )
-            return result
-        return None
-
-    def _check_normal_cases(self, cursor, project_details, road_width, ulb_type):
-        """
-        Rules 10 & 11: Check normal cases (congested and non-congested)
-        """
-        valid_layout_types = ['Sanction Layout/Sub Layout', 'Compounding Structure', 
-                            'Non-Sanctioned Layout', 'Raw Land', 
-                            'Area under CTS No. (K prat/Mojni Sheet)', 'CIDCO Approved Layout']
-        valid_proposals = ['Residential', 'Commercial', 'Mixed', 'Educational', 
-                         'Group Housing', 'Institutional']
-        
-        if (project_details.get('crz_status') == 'No' and 
-            project_details.get('tod') == 'No' and 
-            project_details.get('city_specific_area') is None and 
-            project_details.get('plot_layout_type') in valid_layout_types and
-            project_details.get('type_of_proposal') in valid_proposals):
-            
-            table = ('dcr_normal_fsi_permissible' 
-                    if project_details.get('location') == 'Congested' 
-                    else 'dcr_normal_fsi_permissible_nonconjusted')
-            
-            query = f"""
-            SELECT basicFSI as basic_fsi, FSI_Payment_Premium as premium_fsi, 
-                   Max_permissible_TDR_loading as tdr
-            FROM {table}
-            WHERE %s BETWEEN CAST(strRoadWidth_Range1 AS DECIMAL) AND CAST(strRoadWidth_Range2 AS DECIMAL)
-            AND ULBType = %s
-            """
-            cursor.execute(query, (road_width, ulb_type))
-            return cursor.fetchone()
-        return None
+        return RuleLookup(
+            'crz_specificarea_restriction',
+            {'basic_fsi': 'basic_fsi', 'remark_fsi': 'Remark'},
+            keys=(council_id, project_details.get('location'), project_details.get('zone_id'))
+        )
+
+    def _lookup_nagpur_tod(self, project_details, road_width, ulb_type):
+        """
+        Rule 4: Nagpur TOD
+        """
+        return RuleLookup(
+            'Dcr_tod_fsi_permissible', self.FSI_COLUMNS,
+            ranges=(road_width, project_details.get('area_plot_site_sqm'))
+        )
+
+    def _lookup_pcmc_tod(self, project_details, road_width, ulb_type):
+        """
+        Rules 5 & 6: PCMC TOD cases (congested and non-congested)
+        """
+        return RuleLookup(self._normal_table(project_details), self.FSI_COLUMNS, keys=('PCMC',), ranges=(road_width,))
+
+    def _lookup_pcmc_gunthewari_tod(self, project_details, road_width, ulb_type):
+        """
+        Rule 7: PCMC Gunthewari TOD
+        """
+        return RuleLookup(
+            'dcr_gunthewari_fsi_permissible', self.FSI_COLUMNS,
+            keys=(project_details.get('location'), 'PCMC'),
+            ranges=(road_width,)
+        )
+
+    def _lookup_gunthewari_non_tod(self, project_details, road_width, ulb_type):
+        """
+        Rule 8: Gunthewari non-TOD
+        """
+        return RuleLookup(
+            'dcr_gunthewari_fsi_permissible', self.FSI_COLUMNS,
+            keys=(project_details.get('location'), ulb_type),
+            ranges=(road_width,)
+        )
+
+    def _lookup_industrial(self, project_details, road_width, ulb_type):
+        """
+        Rule 9: Industrial cases
+        """
+        return RuleLookup(
+            'dcr_normal_fsi_permissible_industrial',
+            {'basic_fsi': 'basicFSI', 'premium_fsi': 'FSI_Payment_Premium'},
+            keys=('N',),
+            ranges=(road_width, project_details.get('area_plot_site_sqm'))
+        )
+
+    def _lookup_normal_cases(self, project_details, road_width, ulb_type):
+        """
+        Rules 10 & 11: Normal cases (congested and non-congested)
+        """
+        return RuleLookup(self._normal_table(project_details), self.FSI_COLUMNS, keys=(ulb_type,), ranges=(road_width,))
 
+    def _normal_table(self, project_details):
+        return ('dcr_normal_fsi_permissible'
+                if project_details.get('location') == 'Congested'
+                else 'dcr_normal_fsi_permissible_nonconjusted')
+
+    def rule_lookups(self, project_details):
+        """
+        Yield the lookup of every rule that applies, in precedence order
+
+        One classification picks the candidate rules from the dispatch table;
+        a lookup is only built once all earlier candidates found no row. The
+        result cache, batch evaluator and sensitivity analysis key plots on it.
+
+        :param project_details: Dictionary containing project details
+        :return: Generator of (rule name, RuleLookup) tuples
+        """
+        rules = self._candidate_rules(self._classify(project_details))
+        if not rules:
+            return
+
+        road_width = self._get_max_road_width(project_details)
+        ulb_type = self._determine_ulb_type(project_details.get('council_id'))
+        for rule in rules:
+            yield rule, self._lookup_builders[rule](project_details, road_width, ulb_type)
+
+    def _build_result(self, rule, result):
+        """
+        Shape the matched rule row into FSI calculation results
+
+        :param rule: Name of the rule that matched
+        :param result: Row returned for the rule lookup, keyed by result alias
+        :return: Dictionary with FSI calculation results, including the rule that fired
+        """
+        if rule in self.SPECIFIC_AREA_RULES:
+            return {
+                'basic_fsi': result['basic_fsi'],
+                'premium_fsi': 0,
+                'tdr': 0,
+                'remarks_fsi': result['remark_fsi'],
+                'rule': rule
+            }
+        if rule == 'industrial':
+            return {
+                'basic_fsi': result['basic_fsi'],
+                'premium_fsi': result['premium_fsi'],
+                'tdr': None,
+                'remarks_fsi': self.INDUSTRIAL_REMARK,
+                'rule': rule
+            }
+        return {
+            'basic_fsi': result['basic_fsi'],
+            'premium_fsi': result['premium_fsi'],
+            'tdr': result['tdr'],
+            'remarks_fsi': 'NA',
+            'rule': rule
+        }
 
     def calculate_fsi(self, project_details):
         """
@@ -298,114 +397,57 @@ class FSICalculator:
         :param project_details: Dictionary containing project details
         :return: Dictionary with FSI calculation results
         """
+        connection = None
         try:
-            connection = self._connect_to_database()
-            if not connection:
-                return self._error_result("Database connection failed")
-
-            cursor = connection.cursor(dictionary=True)
-            road_width = self._get_max_road_width(project_details)
-            ulb_type = self._determine_ulb_type(project_details.get('council_id'))
-
-            # Rule 1 & 2: City Specific Area
-            result = self._check_city_specific_non_residential(cursor, project_details)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': 0,
-                    'tdr': 0,
-                    'remarks_fsi': result['remark_fsi']
-                }
-
-            result = self._check_city_specific_residential(cursor, project_details)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': 0,
-                    'tdr': 0,
-                    'remarks_fsi': result['remark_fsi']
-                }
-
-            # Rule 3: CRZ Status
-            result = self._check_crz_specific(cursor, project_details)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': 0,
-                    'tdr': 0,
-                    'remarks_fsi': result['remark_fsi']
-                }
-
-            # Rule 4: Nagpur TOD
-            result = self._check_nagpur_tod(cursor, project_details, road_width)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': result['tdr'],
-                    'remarks_fsi': 'NA'
-                }
-
-            # Rules 5 & 6: PCMC TOD
-            result = self._check_pcmc_tod(cursor, project_details, road_width)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': result['tdr'],
-                    'remarks_fsi': 'NA'
-                }
-
-            # Rule 7: PCMC Gunthewari TOD
-            result = self._check_pcmc_gunthewari_tod(cursor, project_details, road_width)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': result['tdr'],
-                    'remarks_fsi': 'NA'
-                }
-
-            # Rule 8: Gunthewari Non-TOD
-            result = self._check_gunthewari_non_tod(cursor, project_details, road_width, ulb_type)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': result['tdr'],
-                    'remarks_fsi': 'NA'
-                }
-
-            # Rule 9: Industrial
-            result = self._check_industrial(cursor, project_details, road_width)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': None,
-                    'remarks_fsi': result['remark_fsi']
-                }
-
-            # Rules 10 & 11: Normal Cases
-            result = self._check_normal_cases(cursor, project_details, road_width, ulb_type)
-            if result:
-                return {
-                    'basic_fsi': result['basic_fsi'],
-                    'premium_fsi': result['premium_fsi'],
-                    'tdr': result['tdr'],
-                    'remarks_fsi': 'NA'
-                }
+            if self.rule_index is not None:
+                self.rule_index.refresh()
+                cursor = None
+            else:
+                connection = self._connect_to_database()
+                if not connection:
+                    return self._error_result("Database connection failed")
+                cursor = connection.cursor(dictionary=True)
+
+            for rule, lookup in self.rule_lookups(project_details):
+                hits, misses, seconds = self._rule_metrics[rule]
+                started = perf_counter()
+                result = self._fetch_rule(cursor, lookup)
+                seconds.observe(perf_counter() - started)
+                if result:
+                    hits.inc()
+                    return self._build_result(rule, result)
+                misses.inc()
 
             return self._error_result("No matching FSI calculation rule found")
 
         except Exception as e:
-            self.logger.error(f"Error calculating FSI: {str(e)}")
+            self.logger.error("Error calculating FSI: %s", e)
             return self._error_result(f"Error calculating FSI: {str(e)}")
 
         finally:
-            if 'connection' in locals() and connection:
+            if connection:
                 connection.close()
 
+    def calculate_fsi_batch(self, project_details_list):
+        """
+        Calculate FSI for many plots with grouped, vectorized rule lookups
+
+        Results match calling calculate_fsi on each plot, using the rule tables
+        loaded in memory (the index is shared in memory mode).
+
+        :param project_details_list: List of project_details dictionaries
+        :return: List of FSI calculation results in input order
+        """
+        return self.batch_evaluator().evaluate(project_details_list)
+
+    def batch_evaluator(self):
+        """
+        :return: The FSIBatchEvaluator used by calculate_fsi_batch, created on first use
+        """
+        if self._batch_evaluator is None:
+            self._batch_evaluator = FSIBatchEvaluator(self)
+        return self._batch_evaluator
+
     def _error_result(self, message):
         """
         Helper method to return error results
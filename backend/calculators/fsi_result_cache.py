@@ -0,0 +1,171 @@
+import math
+import logging
+import threading
+from bisect import bisect_left
+
+from backend.calculators.fsi_rule_index import FSIRuleIndex, RULE_TABLES, cast_decimal, normalize_key
+from backend.utils.cache import TTLCache, MISSING
+
+
+def range_bucket(boundaries, value):
+    """
+    Position of a value among the sorted boundaries of a range column pair
+
+    Values equal to the same boundary, or between the same two boundaries,
+    get the same bucket, and every BETWEEN test against rows with those
+    boundaries gives them the same answer.
+
+    :param boundaries: Sorted distinct lower and upper bounds of the rule table
+    :param value: Probe value
+    :return: Bucket number
+    """
+    position = bisect_left(boundaries, value)
+    if position < len(boundaries) and boundaries[position] == value:
+        return 2 * position + 1
+    return 2 * position
+
+
+class FSIResultCache:
+    def __init__(self, calculator, maxsize=50000, maxbytes=32 * 1024 * 1024, rule_index=None):
+        """
+        Memoize FSICalculator.calculate_fsi on the inputs its rules read
+
+        A result depends only on the rules that apply to the plot and on the
+        keys and range values of their lookups, so that is the cache key. Range
+        values are replaced by their bucket between the rule table's boundaries:
+        plots in the same road width and plot area brackets share an entry.
+        Error results are not cached.
+
+        Entries are dropped when a rule table is reloaded. The tables are checked
+        like the calculator's memory engine does, once per refresh_interval; in
+        sql mode the cache keeps its own index of the tables for the boundaries.
+
+        :param calculator: FSICalculator answering cache misses
+        :param maxsize: Maximum number of cached results
+        :param maxbytes: Approximate memory bound of the cached keys and results
+        :param rule_index: FSIRuleIndex to read in sql mode instead of a new one
+        """
+        self.calculator = calculator
+        self.rule_index = calculator.rule_index or rule_index or FSIRuleIndex(
+            calculator._connect_to_database, calculator.refresh_interval
+        )
+        self.results = TTLCache(maxsize=maxsize, ttl=None, maxbytes=maxbytes)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._versions = None
+        self._generation = 0
+        self._boundaries = {}
+        self._uncached = 0
+
+    def _sync(self, force=False):
+        """
+        Pick up reloaded rule tables: recompute the boundaries and drop the entries
+        """
+        self.rule_index.refresh(force)
+        versions = tuple(self.rule_index.version(table) for table in self.rule_index.tables)
+        if versions == self._versions:
+            return
+        with self._lock:
+            if versions == self._versions:
+                return
+            self._boundaries = {table: self._table_boundaries(table) for table in self.rule_index.tables}
+            if self._versions is not None:
+                self.logger.info("FSI rule tables changed, dropping %d cached results", self.results.stats()['size'])
+            # Keys carry the generation, so results computed against the old
+            # tables and stored after this point are never served
+            self._generation += 1
+            self.results.invalidate()
+            self._versions = versions
+
+    def _table_boundaries(self, table):
+        rows = self.rule_index.rows(table)
+        return tuple(
+            sorted({bound for row in rows for bound in (cast_decimal(row[low]), cast_decimal(row[high]))
+                    if bound is not None})
+            for low, high in RULE_TABLES[table].ranges
+        )
+
+    def preload(self, force=False):
+        """
+        Load the rule tables and their boundaries now rather than on the first call
+
+        :param force: Check the rule tables for changes even if refresh_interval has not passed
+        """
+        self._sync(force)
+
+    def key(self, project_details):
+        """
+        Canonical cache key of a plot
+
+        :param project_details: Dictionary containing project details
+        :return: Hashable key, or None when the result should not be cached
+        """
+        parts = []
+        for rule, lookup in self.calculator.rule_lookups(project_details):
+            buckets = []
+            for boundaries, value in zip(self._boundaries[lookup.table], lookup.ranges):
+                if value is None:
+                    buckets.append(None)
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    return None
+                if not math.isfinite(value):
+                    return None
+                buckets.append(range_bucket(boundaries, value))
+            parts.append((rule, lookup.table, tuple(normalize_key(value) for value in lookup.keys), tuple(buckets)))
+        if not parts:
+            # No rule applies, which is an error result
+            return None
+        return self._generation, tuple(parts)
+
+    def calculate_fsi(self, project_details):
+        """
+        FSICalculator.calculate_fsi, answered from the cache when possible
+
+        :param project_details: Dictionary containing project details
+        :return: Dictionary with FSI calculation results
+        """
+        try:
+            self._sync()
+        except Exception as e:
+            # The rule index waits refresh_interval before checking the tables again
+            self.logger.warning("FSI rule tables unavailable, calculating without the cache: %s", e)
+            key = None
+        else:
+            try:
+                key = self.key(project_details)
+            except Exception as e:
+                # The calculator reports input errors itself
+                self.logger.debug("FSI result not cacheable: %s", e)
+                key = None
+
+        if key is None:
+            with self._lock:
+                self._uncached += 1
+            return self.calculator.calculate_fsi(project_details)
+
+        result = self.results.get(key)
+        if result is MISSING:
+            result = self.calculator.calculate_fsi(project_details)
+            if result.get('error'):
+                return result
+            self.results.set(key, result)
+        # Callers get their own copy to modify
+        return dict(result)
+
+    def invalidate(self):
+        """
+        Drop every cached result
+        """
+        self.results.invalidate()
+
+    def stats(self):
+        """
+        :return: Cache counters with the hit ratio, plus the calls that bypassed the cache
+        """
+        stats = self.results.stats()
+        stats['uncached'] = self._uncached
+        stats['generation'] = self._generation
+        return stats
@@ -0,0 +1,409 @@
+import re
+import time
+import logging
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import mysql.connector
+
+# Layout of a DCR rule table: equality key columns, (low, high) range column
+# pairs compared with CAST(... AS DECIMAL), and the value columns rules read
+RuleTable = namedtuple('RuleTable', ['keys', 'ranges', 'values'])
+
+# One rule's query against a rule table: result alias -> column mapping, key
+# values in RuleTable.keys order and probe values in RuleTable.ranges order
+RuleLookup = namedtuple('RuleLookup', ['table', 'columns', 'keys', 'ranges'], defaults=((), ()))
+
+ROAD_WIDTH_RANGE = ('strRoadWidth_Range1', 'strRoadWidth_Range2')
+PLOT_WIDTH_RANGE = ('strPlotWidth_Range1', 'strPlotWidth_Range2')
+FSI_VALUES = ('basicFSI', 'FSI_Payment_Premium', 'Max_permissible_TDR_loading')
+
+RULE_TABLES = {
+    'dcr_setback_specificarea_restriction': RuleTable(
+        keys=('strAreaCode',),
+        ranges=(('strMinPlotArea', 'strMinPlotArea2'),),
+        values=('basic_fsi_Other', 'basic_fsi_res', 'Remark'),
+    ),
+    'crz_specificarea_restriction': RuleTable(
+        keys=('Councilid', 'strLocationType', 'tpzud_zone_id'),
+        ranges=(),
+        values=('basic_fsi', 'Remark'),
+    ),
+    'Dcr_tod_fsi_permissible': RuleTable(
+        keys=(),
+        ranges=(ROAD_WIDTH_RANGE, ('strPlotArea_Range1', 'strPlotArea_Range2')),
+        values=FSI_VALUES,
+    ),
+    'dcr_normal_fsi_permissible': RuleTable(
+        keys=('ULBType',),
+        ranges=(ROAD_WIDTH_RANGE,),
+        values=FSI_VALUES,
+    ),
+    'dcr_normal_fsi_permissible_nonconjusted': RuleTable(
+        keys=('ULBType',),
+        ranges=(ROAD_WIDTH_RANGE,),
+        values=FSI_VALUES,
+    ),
+    'dcr_gunthewari_fsi_permissible': RuleTable(
+        keys=('TypeOfConjustedArea', 'ULBType'),
+        ranges=(ROAD_WIDTH_RANGE,),
+        values=FSI_VALUES,
+    ),
+    'dcr_normal_fsi_permissible_industrial': RuleTable(
+        keys=('SpecialFlag',),
+        ranges=(ROAD_WIDTH_RANGE, ('strPlotSizeRange1', 'strPlotSizeRange2')),
+        values=('basicFSI', 'FSI_Payment_Premium'),
+    ),
+    # Boundary margins, one row per side, boundary type and building height
+    # bracket ("Setback margin rules.txt"); read by SetbackCalculator
+    'dcr_setback_margins': RuleTable(
+        keys=('strSide', 'strBoundaryType', 'strBuildingHeight'),
+        ranges=(ROAD_WIDTH_RANGE, PLOT_WIDTH_RANGE),
+        values=('Margin', 'MinPlotArea', 'MinPlotWidth', 'Remark'),
+    ),
+}
+
+# Tables the FSI rules read, which an FSIRuleIndex loads by default. The
+# setback table is indexed on its own, so a missing or broken one leaves FSI
+# calculations alone
+FSI_RULE_TABLES = tuple(table for table in RULE_TABLES if table != 'dcr_setback_margins')
+
+# DECIMAL columns holding CAST(... AS DECIMAL) of each range column pair,
+# added by backend.jobs.migrate_rule_tables
+TYPED_RANGE_COLUMNS = {
+    ROAD_WIDTH_RANGE: ('road_width_lo', 'road_width_hi'),
+    ('strPlotArea_Range1', 'strPlotArea_Range2'): ('plot_area_lo', 'plot_area_hi'),
+    ('strPlotSizeRange1', 'strPlotSizeRange2'): ('plot_area_lo', 'plot_area_hi'),
+    ('strMinPlotArea', 'strMinPlotArea2'): ('plot_area_lo', 'plot_area_hi'),
+    PLOT_WIDTH_RANGE: ('plot_width_lo', 'plot_width_hi'),
+}
+
+# Index on the key columns and the first typed range pair of every rule table
+RULE_LOOKUP_INDEX = 'idx_rule_lookup'
+
+
+def rule_lookup_index_columns(table):
+    """
+    :param table: Rule table name
+    :return: Columns of the table's RULE_LOOKUP_INDEX, in order
+    """
+    spec = RULE_TABLES[table]
+    return spec.keys + (TYPED_RANGE_COLUMNS[spec.ranges[0]] if spec.ranges else ())
+
+
+def rule_query(lookup, typed_ranges=False):
+    """
+    SQL returning the rows of a rule table that match a RuleLookup
+
+    Without typed_ranges the text range columns are compared through
+    CAST(... AS DECIMAL), which no index can serve. With typed_ranges the
+    migrated DECIMAL columns are compared directly, so the key columns and
+    the first range narrow an index range scan.
+
+    :param lookup: RuleLookup
+    :param typed_ranges: Compare the TYPED_RANGE_COLUMNS instead of casting
+    :return: (query, parameters)
+    """
+    spec = RULE_TABLES[lookup.table]
+    conditions = [f"{column} = %s" for column in spec.keys]
+    params = list(lookup.keys)
+    for pair, value in zip(spec.ranges, lookup.ranges):
+        if typed_ranges:
+            low, high = TYPED_RANGE_COLUMNS[pair]
+            conditions.append(f"{low} <= %s AND {high} >= %s")
+            params.extend((value, value))
+        else:
+            low, high = pair
+            conditions.append(f"%s BETWEEN CAST({low} AS DECIMAL) AND CAST({high} AS DECIMAL)")
+            params.append(value)
+    query = f"""
+        SELECT {', '.join(f'{column} as {alias}' for alias, column in lookup.columns.items())}
+        FROM {lookup.table}
+        WHERE {' AND '.join(conditions)}
+        """
+    return query, tuple(params)
+
+
+_NUMERIC_PREFIX = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+_DECIMAL_LIMIT = Decimal('9999999999')
+
+
+def cast_decimal(value):
+    """
+    Mirror MySQL's CAST(value AS DECIMAL), i.e. DECIMAL(10,0)
+
+    Strings are read up to their longest numeric prefix (0 when there is none),
+    rounded half away from zero to an integer and clamped to 10 digits.
+
+    :param value: Raw column value
+    :return: float, or None for NULL
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        number = Decimal(str(value))
+    else:
+        match = _NUMERIC_PREFIX.match(str(value))
+        number = Decimal(match.group(0).strip()) if match else Decimal(0)
+    number = number.quantize(Decimal(1), rounding=ROUND_HALF_UP)
+    return float(max(-_DECIMAL_LIMIT, min(_DECIMAL_LIMIT, number)))
+
+
+def normalize_key(value):
+    """
+    Normalize a key value the way MySQL compares it in a WHERE col = %s clause
+
+    Numbers (and numeric strings) compare numerically, other strings compare
+    case-insensitively without trailing spaces. NULL never matches.
+
+    :param value: Key column value or query parameter
+    :return: Hashable normalized key, or None for NULL
+    """
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value).strip())
+        if number.is_finite():
+            return number.normalize()
+    except (InvalidOperation, ValueError):
+        pass
+    return str(value).rstrip().casefold()
+
+
+class _IntervalList:
+    """
+    Rule rows of one key, sorted by the lower bound of their first range
+
+    max_his[i] is the largest upper bound among entries[:i + 1], so a backward
+    scan from the bisect point can stop as soon as no earlier interval can
+    still contain the probe value.
+    """
+    __slots__ = ('los', 'max_his', 'entries')
+
+    def __init__(self, entries):
+        entries.sort(key=lambda entry: (entry[0][0][0], entry[1]))
+        self.entries = entries
+        self.los = [entry[0][0][0] for entry in entries]
+        self.max_his = []
+        highest = float('-inf')
+        for entry in entries:
+            highest = max(highest, entry[0][0][1])
+            self.max_his.append(highest)
+
+    def find(self, values):
+        """
+        Return the earliest loaded row whose ranges all contain values
+
+        :param values: Probe values, one per range column pair
+        :return: Row dictionary or None
+        """
+        first = values[0]
+        best = None
+        position = bisect_right(self.los, first) - 1
+        while position >= 0 and self.max_his[position] >= first:
+            bounds, ordinal, row = self.entries[position]
+            if (bounds[0][1] >= first and
+                    all(low <= value <= high for (low, high), value in zip(bounds[1:], values[1:])) and
+                    (best is None or ordinal < best[0])):
+                best = (ordinal, row)
+            position -= 1
+        return best[1] if best else None
+
+
+class FSIRuleIndex:
+    def __init__(self, connect, refresh_interval=60, tables=FSI_RULE_TABLES):
+        """
+        In-memory interval index over the DCR rule tables
+
+        :param connect: Callable returning a database connection (or None)
+        :param refresh_interval: Seconds between checks for changed rule tables
+        :param tables: RULE_TABLES names to load
+        """
+        self.connect = connect
+        self.refresh_interval = refresh_interval
+        self.tables = tuple(tables)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._rows = {}
+        self._checksums = {}
+        self._versions = {}
+        self._checked_at = None
+
+    def refresh(self, force=False):
+        """
+        Reload rule tables whose checksum changed since the last load
+
+        Checks run at most once per refresh_interval unless force is set. When the
+        database is unreachable or a check fails, the previously loaded index keeps
+        serving until the next check.
+
+        :param force: Check immediately, ignoring refresh_interval
+        :return: List of reloaded table names
+        :raises RuntimeError: If nothing is loaded yet and the database is unreachable
+        :raises mysql.connector.Error: If nothing is loaded yet and the tables cannot be read
+        """
+        now = time.monotonic()
+        if (not force and self._checked_at is not None and
+                now - self._checked_at < self.refresh_interval):
+            return []
+
+        with self._lock:
+            if (not force and self._checked_at is not None and
+                    now - self._checked_at < self.refresh_interval):
+                return []
+
+            connection = self.connect()
+            if not connection:
+                if not self._indexes:
+                    raise RuntimeError(f"Database connection failed while loading rule tables {', '.join(self.tables)}")
+                self.logger.warning("Database unavailable, serving previously loaded rule tables %s",
+                                    ', '.join(self.tables))
+                # Wait refresh_interval before trying again rather than on every call
+                self._checked_at = now
+                return []
+
+            reloaded = []
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(f"CHECKSUM TABLE {', '.join(self.tables)}")
+                checksums = {}
+                for row in cursor.fetchall():
+                    # MySQL reports tables as schema.table
+                    checksums[row['Table'].split('.')[-1].lower()] = row['Checksum']
+
+                for table in self.tables:
+                    checksum = checksums.get(table.lower())
+                    if table in self._indexes and checksum is not None and checksum == self._checksums.get(table):
+                        continue
+                    self._load_table(cursor, table)
+                    self._checksums[table] = checksum
+                    reloaded.append(table)
+                cursor.close()
+            except mysql.connector.Error as e:
+                if not self._indexes:
+                    raise
+                self.logger.warning("Error checking rule tables %s, serving previously loaded ones: %s",
+                                    ', '.join(self.tables), e)
+                self._checked_at = now
+                return reloaded
+            finally:
+                connection.close()
+
+            self._checked_at = now
+            if reloaded:
+                self.logger.info("Loaded rule tables: %s", ', '.join(reloaded))
+            return reloaded
+
+    def _load_table(self, cursor, table):
+        """
+        Load one rule table and swap in its index
+
+        :param cursor: Dictionary cursor
+        :param table: Rule table name
+        """
+        spec = RULE_TABLES[table]
+        columns = list(dict.fromkeys(
+            spec.keys + tuple(column for pair in spec.ranges for column in pair) + spec.values
+        ))
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+        rows = cursor.fetchall()
+
+        grouped = {}
+        for ordinal, row in enumerate(rows):
+            key = tuple(normalize_key(row[column]) for column in spec.keys)
+            if None in key:
+                continue
+            bounds = tuple((cast_decimal(row[low]), cast_decimal(row[high])) for low, high in spec.ranges)
+            if any(low is None or high is None for low, high in bounds):
+                continue
+            grouped.setdefault(key, []).append((bounds, ordinal, row))
+
+        if spec.ranges:
+            index = {key: _IntervalList(entries) for key, entries in grouped.items()}
+        else:
+            index = {key: entries[0][2] for key, entries in grouped.items()}
+
+        # Single reference assignments keep concurrent readers consistent
+        self._rows[table] = rows
+        self._indexes[table] = index
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+    def version(self, table):
+        """
+        Return a counter that changes every time a rule table is reloaded
+
+        :param table: Rule table name
+        :return: Reload counter, 0 before the first load
+        """
+        return self._versions.get(table, 0)
+
+    def intervals(self, table, key):
+        """
+        Return the indexed rows of a ranged rule table for one key
+
+        :param table: Rule table name with range columns
+        :param key: Tuple of normalize_key() values for the table's key columns
+        :return: List of (bounds, load order, row) tuples sorted by first lower bound
+        """
+        index = self._indexes.get(table)
+        if index is None:
+            raise RuntimeError(f"Rule table {table} is not loaded")
+        interval_list = index.get(key)
+        return interval_list.entries if interval_list is not None else []
+
+    def keys(self, table):
+        """
+        Return the keys indexed for a rule table
+
+        :param table: Rule table name
+        :return: List of normalize_key() tuples for the table's key columns
+        """
+        return list(self._indexes.get(table, {}))
+
+    def rows(self, table):
+        """
+        Return the rows of a rule table as loaded
+
+        :param table: Rule table name
+        :return: List of row dictionaries
+        """
+        return self._rows.get(table, [])
+
+    def lookup(self, table, columns, keys=(), ranges=()):
+        """
+        Find the rule row a BETWEEN query on the table would return
+
+        :param table: Rule table name
+        :param columns: Dictionary of result alias -> column name
+        :param keys: Values for the table's key columns, in RULE_TABLES order
+        :param ranges: Values tested against the table's range pairs, in RULE_TABLES order
+        :return: Dictionary keyed by alias, or None when no row matches
+        """
+        key = tuple(normalize_key(value) for value in keys)
+        if None in key or any(value is None for value in ranges):
+            return None
+
+        match = self.match(table, key, ranges)
+        if match is None:
+            return None
+        return {alias: match[column] for alias, column in columns.items()}
+
+    def match(self, table, key, ranges=()):
+        """
+        Find the rule row for a key that is already normalized
+
+        :param table: Rule table name
+        :param key: Tuple of normalize_key() values for the table's key columns
+        :param ranges: Numbers tested against the table's range pairs, in RULE_TABLES order
+        :return: Row dictionary as loaded, or None when no row matches
+        """
+        index = self._indexes.get(table)
+        if index is None:
+            raise RuntimeError(f"Rule table {table} is not loaded")
+
+        match = index.get(key)
+        if match is not None and ranges:
+            match = match.find([float(value) for value in ranges])
+        return match
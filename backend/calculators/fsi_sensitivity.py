@@ -0,0 +1,137 @@
+import logging
+
+from backend.calculators.fsi_rule_index import RULE_TABLES, ROAD_WIDTH_RANGE, normalize_key
+
+# Road detail fields; the rules read the widest road
+ROAD_FIELDS = ('road_details_front_meters', 'road_details_left_meters',
+               'road_details_right_meters', 'road_details_rear_meters')
+PLOT_AREA_FIELD = 'area_plot_site_sqm'
+
+
+def _pieces(boundaries):
+    """
+    Split [0, infinity) at the boundaries into single points and the open intervals between them
+
+    BETWEEN is inclusive, so a value on a boundary can match different rows
+    than the values on either side of it.
+
+    :param boundaries: Sorted range bounds
+    :return: List of ((min, max, min_inclusive, max_inclusive), representative value); max is None when unbounded
+    """
+    points = sorted({bound for bound in boundaries if bound >= 0} | {0.0})
+    pieces = []
+    for position, point in enumerate(points):
+        pieces.append(((point, point, True, True), point))
+        if position + 1 < len(points):
+            following = points[position + 1]
+            pieces.append(((point, following, False, False), (point + following) / 2))
+        else:
+            pieces.append(((point, None, False, False), point + 1))
+    return pieces
+
+
+def _merge(pieces, values):
+    """
+    Join adjacent pieces with equal values
+
+    :return: List of (piece, value) tuples
+    """
+    merged = []
+    for piece, value in zip(pieces, values):
+        if merged and merged[-1][1] == value:
+            (low, _, low_inclusive, _), _ = merged[-1]
+            merged[-1] = ((low, piece[1], low_inclusive, piece[3]), value)
+        else:
+            merged.append((piece, value))
+    return merged
+
+
+def _interval(piece):
+    low, high, low_inclusive, high_inclusive = piece
+    return {'min': low, 'max': high, 'min_inclusive': low_inclusive, 'max_inclusive': high_inclusive}
+
+
+class FSISensitivity:
+    def __init__(self, evaluator, max_cells=250000):
+        """
+        FSI of one site as a piecewise-constant function of road width and plot area
+
+        The pieces come from the range bounds of the rule table rows the site's
+        applicable rules can match, not from sampling: within a piece every
+        BETWEEN test has the same outcome, so one value per piece decides it.
+        All pieces are evaluated together with the batch evaluator against
+        the in-memory rule tables.
+
+        :param evaluator: FSIBatchEvaluator of the app's FSICalculator
+        :param max_cells: Upper bound on road width x plot area pieces evaluated for one site
+        """
+        self.evaluator = evaluator
+        self.calculator = evaluator.calculator
+        self.rule_index = evaluator.rule_index
+        self.max_cells = max_cells
+        self.logger = logging.getLogger(__name__)
+
+    def breakpoints(self, project_details):
+        """
+        Range bounds of the rule rows that can apply to a site
+
+        Rule selection and key columns do not depend on road width or plot
+        area, so these are the only values where the FSI can change.
+
+        :param project_details: Dictionary containing project details
+        :return: (sorted road width bounds, sorted plot area bounds)
+        """
+        road_widths, plot_areas = set(), set()
+        for _, lookup in self.calculator.rule_lookups(project_details):
+            spec = RULE_TABLES[lookup.table]
+            key = tuple(normalize_key(value) for value in lookup.keys)
+            if not spec.ranges or None in key:
+                continue
+            for bounds, _, _ in self.rule_index.intervals(lookup.table, key):
+                for pair, (low, high) in zip(spec.ranges, bounds):
+                    (road_widths if pair == ROAD_WIDTH_RANGE else plot_areas).update((low, high))
+        return sorted(road_widths), sorted(plot_areas)
+
+    def surface(self, project_details):
+        """
+        FSI results over every road width and plot area, as rectangular regions
+
+        :param project_details: Dictionary containing project details
+        :return: Dictionary with the site's current result, the applicable rules,
+                 the breakpoints and a list of regions with their FSI result
+        :raises ValueError: When the site has too many pieces to evaluate
+        """
+        self.rule_index.refresh()
+        road_widths, plot_areas = self.breakpoints(project_details)
+        road_pieces, area_pieces = _pieces(road_widths), _pieces(plot_areas)
+        if len(road_pieces) * len(area_pieces) > self.max_cells:
+            raise ValueError(f"Too many road width and plot area pieces ({len(road_pieces)} x {len(area_pieces)})")
+
+        cells = [project_details]
+        for _, road_width in road_pieces:
+            for _, plot_area in area_pieces:
+                cell = dict(project_details)
+                cell.update(dict.fromkeys(ROAD_FIELDS, 0))
+                cell[ROAD_FIELDS[0]] = road_width
+                cell[PLOT_AREA_FIELD] = plot_area
+                cells.append(cell)
+        current, *results = self.evaluator.evaluate(cells)
+
+        # Merge along plot area within each road width piece, then merge road
+        # width pieces whose rows came out the same
+        width = len(area_pieces)
+        rows = [
+            tuple(_merge([piece for piece, _ in area_pieces], results[start:start + width]))
+            for start in range(0, len(results), width)
+        ]
+        regions = []
+        for road_piece, row in _merge([piece for piece, _ in road_pieces], rows):
+            for area_piece, result in row:
+                regions.append({'road_width': _interval(road_piece), 'plot_area': _interval(area_piece), **result})
+
+        return {
+            'current': current,
+            'rules': list(self.calculator.candidate_rules(project_details)),
+            'breakpoints': {'road_width': road_widths, 'plot_area': plot_areas},
+            'regions': regions,
+        }
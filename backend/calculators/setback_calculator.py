@@ -0,0 +1,220 @@
+import logging
+from decimal import Decimal, InvalidOperation
+
+import mysql.connector
+
+from backend.calculators.fsi_batch import RuleIntervalMatcher
+from backend.calculators.fsi_rule_index import FSIRuleIndex, normalize_key
+
+SETBACK_TABLE = 'dcr_setback_margins'
+
+# Boundary side: (strSide key, boundary type column, road width column, result column)
+SIDES = (
+    ('Front', 'front_boundary_type', 'road_details_front_meters', 'front_margin'),
+    ('Side', 'left_boundary_type', 'road_details_left_meters', 'side_margin_left'),
+    ('Side', 'right_boundary_type', 'road_details_right_meters', 'side_margin_right'),
+    ('Rear', 'rear_boundary_type', 'road_details_rear_meters', 'rear_margin'),
+)
+
+# project_details_test2 columns the margins depend on
+SETBACK_INPUT_COLUMNS = tuple(column for side in SIDES for column in side[1:3]) + ('building_height', 'plot_width')
+
+# Boundary types of the form
+ROAD_BOUNDARY = 'Road'
+BOUNDARY_TYPES = (ROAD_BOUNDARY, 'Other Property', 'Layout Open Space')
+
+# Building height brackets of the form, which the rule rows are keyed on
+BELOW_15M = 'Below 15 meter'
+FROM_15M_TO_24M = '15-24 meter'
+ABOVE_24M = 'Above 24 meter'
+HEIGHT_BRACKETS = (BELOW_15M, FROM_15M_TO_24M, ABOVE_24M)
+_BRACKETS = {normalize_key(bracket): bracket for bracket in HEIGHT_BRACKETS}
+
+# Normalized rule key of every (side, boundary type, height bracket)
+_RULE_KEYS = {
+    (side, boundary_type, bracket): (normalize_key(side), normalize_key(boundary_type), normalize_key(bracket))
+    for side in dict.fromkeys(side for side, _, _, _ in SIDES)
+    for boundary_type in BOUNDARY_TYPES
+    for bracket in HEIGHT_BRACKETS
+}
+
+
+def height_bracket(building_height):
+    """
+    Building height bracket of a form value or a height in meters
+
+    The height is optional on the form; without one the plot is assessed
+    as a building below 15 m.
+
+    :param building_height: One of HEIGHT_BRACKETS, a number of meters, or blank
+    :return: One of HEIGHT_BRACKETS
+    :raises ValueError: If the value is neither a bracket nor a number
+    """
+    if building_height is None or str(building_height).strip() == '':
+        return BELOW_15M
+    bracket = _BRACKETS.get(normalize_key(building_height))
+    if bracket is not None:
+        return bracket
+    try:
+        meters = Decimal(str(building_height).strip())
+    except InvalidOperation:
+        raise ValueError(f"Unknown building height: {building_height}")
+    if not meters.is_finite():
+        raise ValueError(f"Unknown building height: {building_height}")
+    if meters < 15:
+        return BELOW_15M
+    return FROM_15M_TO_24M if meters <= 24 else ABOVE_24M
+
+
+def _float(value):
+    # Blank road widths and plot widths are 0, as in the FSI inputs
+    return float(value) if value not in (None, '') else 0.0
+
+
+def _number(value):
+    # Margins and minimums are stored as text in the rule table
+    if value is None or str(value).strip() == '':
+        return None
+    return float(value)
+
+
+class SetbackCalculator:
+    def __init__(self, pool, refresh_interval=60, scalar_probes=8):
+        """
+        Boundary margins and minimum plot size of a plot, from dcr_setback_margins
+
+        Every side is one lookup keyed on the side, its boundary type and the
+        building height bracket, with the side's road width (0 unless the
+        boundary is a road) and the plot width tested against the row's
+        ranges. The lookups of all sides, and of every plot of a batch, are
+        grouped by key and answered together against an in-memory index of
+        the table, so no query runs per side. The index is separate from the
+        FSI rule tables': a missing or broken setback table only fails setbacks.
+
+        :param pool: ConnectionPool the table is loaded through
+        :param refresh_interval: Seconds between checks for a changed table
+        :param scalar_probes: Groups with fewer probes are looked up one by one in the index
+        """
+        self.pool = pool
+        self.logger = logging.getLogger(__name__)
+        self.rule_index = FSIRuleIndex(self._connect_to_database, refresh_interval, tables=(SETBACK_TABLE,))
+        self.matcher = RuleIntervalMatcher(self.rule_index, scalar_probes=scalar_probes)
+
+    def _connect_to_database(self):
+        """
+        :return: Pooled connection, or None when the database is unreachable
+        """
+        try:
+            return self.pool.acquire()
+        except mysql.connector.Error as e:
+            self.logger.error("Database connection error: %s", e)
+            return None
+
+    def preload(self, force=False):
+        """
+        Load the setback table and its interval arrays now rather than on the first call
+
+        :param force: Check the table for changes even if refresh_interval has not passed
+        :return: Number of (table, key) arrays built or already current
+        """
+        self.rule_index.refresh(force)
+        return self.matcher.preload()
+
+    def _probes(self, project_details):
+        """
+        Lookup key and range values of every side of one plot
+
+        :return: List of (result column, normalized key, probe) tuples
+        :raises ValueError: On a missing or unknown boundary type or building height
+        """
+        bracket = height_bracket(project_details.get('building_height'))
+        plot_width = _float(project_details.get('plot_width'))
+        probes = []
+        for side, boundary_column, road_column, result_column in SIDES:
+            boundary_type = project_details.get(boundary_column)
+            if not boundary_type:
+                raise ValueError(f"Missing {boundary_column}")
+            if boundary_type not in BOUNDARY_TYPES:
+                raise ValueError(f"Unknown {boundary_column}: {boundary_type}")
+            road_width = _float(project_details.get(road_column)) if boundary_type == ROAD_BOUNDARY else 0.0
+            probes.append((result_column, _RULE_KEYS[side, boundary_type, bracket], (road_width, plot_width)))
+        return probes
+
+    def evaluate(self, rows):
+        """
+        Calculate the setbacks of a list of plots
+
+        :param rows: List of mappings with SETBACK_INPUT_COLUMNS
+        :return: List of setback results in input order, each a dictionary with
+                 SETBACK_COLUMNS and error set when some side has no matching rule
+        """
+        try:
+            self.rule_index.refresh()
+        except Exception as e:
+            self.logger.error("Error loading setback rules: %s", e)
+            return [self._error_result(f"Error calculating setbacks: {e}") for _ in rows]
+
+        results = [None] * len(rows)
+        groups = {}
+        for position, project_details in enumerate(rows):
+            try:
+                probes = self._probes(project_details)
+            except (TypeError, ValueError) as e:
+                results[position] = self._error_result(f"Error calculating setbacks: {e}")
+                continue
+            for result_column, key, probe in probes:
+                groups.setdefault(key, []).append((position, result_column, probe))
+
+        matched = [{} for _ in rows]
+        for key, members in groups.items():
+            matches = self.matcher.match_group(SETBACK_TABLE, key, [probe for _, _, probe in members])
+            for (position, result_column, _), row in zip(members, matches):
+                matched[position][result_column] = row
+
+        for position, rows_by_side in enumerate(matched):
+            if results[position] is None:
+                results[position] = self._build_result(rows_by_side)
+        return results
+
+    def calculate_setbacks(self, project_details):
+        """
+        Calculate the setbacks of one plot
+
+        :param project_details: Mapping with SETBACK_INPUT_COLUMNS
+        :return: Dictionary with SETBACK_COLUMNS, and error set on failure
+        """
+        return self.evaluate([project_details])[0]
+
+    def _build_result(self, rows_by_side):
+        """
+        :param rows_by_side: Matched rule row (or None) by result column
+        """
+        unmatched = [column for column, row in rows_by_side.items() if row is None]
+        if unmatched:
+            return self._error_result(f"No matching setback rule found for {', '.join(unmatched)}")
+
+        rows = list(rows_by_side.values())
+        result = {column: _number(row['Margin']) for column, row in rows_by_side.items()}
+        # The plot must satisfy the strictest minimum of its sides
+        for column, value_column in (('min_plot_area', 'MinPlotArea'), ('min_plot_width', 'MinPlotWidth')):
+            values = [value for value in (_number(row[value_column]) for row in rows) if value is not None]
+            result[column] = max(values) if values else None
+        remarks = list(dict.fromkeys(str(row['Remark']).strip() for row in rows if row['Remark'] is not None))
+        remarks = [remark for remark in remarks if remark]
+        result['remarks_setback'] = '; '.join(remarks)[:255] if remarks else 'NA'
+        return result
+
+    def _error_result(self, message):
+        """
+        :return: Dictionary with error information
+        """
+        return {
+            'front_margin': None,
+            'side_margin_left': None,
+            'side_margin_right': None,
+            'rear_margin': None,
+            'min_plot_area': None,
+            'min_plot_width': None,
+            'remarks_setback': message,
+            'error': True,
+        }
@@ -0,0 +1,175 @@
+"""
+Build minified, fingerprinted and precompressed copies of the static assets
+
+Run before deploying, and again whenever scripts.js, styles.css or the
+reference data change:
+
+    python -m backend.jobs.build_static_assets
+
+Each asset is minified and written to frontend/static/dist under a name
+carrying a hash of its contents, next to .gz and .br variants. The logical
+to fingerprinted path mapping is written to dist/manifest.json, which the
+app uses to rewrite asset URLs and to serve the precompressed variants.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from backend.utils.static_assets import STATIC_FOLDER, DIST_FOLDER, MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+# Assets to build, relative to STATIC_FOLDER
+ASSET_PATTERNS = ('scripts.js', 'styles.css', 'data/*.json')
+
+# Characters after which a '/' starts a regular expression rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_json(text):
+    return json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False)
+
+
+def minify_css(text):
+    # Comments, then whitespace runs, then spaces next to punctuation that never
+    # needs them; quoted strings are left as they are
+    parts = re.split(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', re.sub(r'/\*.*?\*/', '', text, flags=re.S))
+    for index in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[index])
+        parts[index] = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """
+    Drop comments, indentation and blank lines from JavaScript
+
+    Line breaks are kept, so automatic semicolon insertion behaves exactly as
+    in the source. Strings, template literals and regular expressions are
+    copied untouched.
+    """
+    out = []
+    i, length = 0, len(text)
+    previous = ''  # Last significant character written
+
+    while i < length:
+        char = text[i]
+        if char in '\'"`':
+            end = i + 1
+            while end < length and text[end] != char:
+                end += 2 if text[end] == '\\' else 1
+            out.append(text[i:end + 1])
+            previous = char
+            i = end + 1
+        elif text.startswith('//', i):
+            while i < length and text[i] != '\n':
+                i += 1
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+        elif char == '/' and (previous == '' or previous in _REGEX_PRECEDERS or
+                              re.search(r'\b(return|typeof|case|in|of)\s*$', ''.join(out[-12:]))):
+            end, in_class = i + 1, False
+            while end < length and (text[end] != '/' or in_class):
+                if text[end] == '\\':
+                    end += 1
+                elif text[end] == '[':
+                    in_class = True
+                elif text[end] == ']':
+                    in_class = False
+                end += 1
+            end += 1
+            while end < length and text[end].isalpha():
+                end += 1  # flags
+            out.append(text[i:end])
+            previous = 'a'
+            i = end
+        elif char == '\n':
+            out.append('\n')
+            i += 1
+            while i < length and text[i] in ' \t\r\n':
+                i += 1
+        else:
+            out.append(char)
+            if not char.isspace():
+                previous = char
+            i += 1
+
+    lines = (line.rstrip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+MINIFIERS = {'.json': minify_json, '.css': minify_css, '.js': minify_js}
+
+
+def _asset_paths(static_folder):
+    for pattern in ASSET_PATTERNS:
+        folder, _, name_pattern = pattern.rpartition('/')
+        directory = os.path.join(static_folder, folder)
+        regex = re.compile(re.escape(name_pattern).replace(r'\*', '.*') + '$')
+        for name in sorted(os.listdir(directory)):
+            if regex.match(name):
+                yield f"{folder}/{name}" if folder else name
+
+
+def build(static_folder=STATIC_FOLDER, dist_folder=DIST_FOLDER):
+    """
+    Rebuild dist_folder from the assets in static_folder
+
+    :return: Manifest mapping logical asset paths to fingerprinted paths
+    """
+    if brotli is None:
+        logger.warning("brotli is not installed; only gzip variants will be written")
+
+    shutil.rmtree(dist_folder, ignore_errors=True)
+    manifest = {}
+    for logical_path in _asset_paths(static_folder):
+        with open(os.path.join(static_folder, logical_path), encoding='utf-8') as source:
+            text = source.read()
+
+        stem, extension = os.path.splitext(logical_path)
+        data = MINIFIERS[extension](text).encode('utf-8')
+        fingerprinted_path = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+
+        target = os.path.join(dist_folder, fingerprinted_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as output:
+            output.write(data)
+        with open(f"{target}.gz", 'wb') as output:
+            output.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(f"{target}.br", 'wb') as output:
+                output.write(brotli.compress(data, quality=11))
+
+        manifest[logical_path] = fingerprinted_path
+        logger.info("%s: %s -> %s bytes as %s", logical_path, len(text.encode('utf-8')), len(data), fingerprinted_path)
+
+    with open(os.path.join(dist_folder, MANIFEST_FILE), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--static-folder', default=STATIC_FOLDER, help="folder holding the source assets")
+    parser.add_argument('--dist-folder', default=DIST_FOLDER, help="output folder (rebuilt from scratch)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    build(args.static_folder, args.dist_folder)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
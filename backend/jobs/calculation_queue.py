@@ -0,0 +1,142 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Job states, also stored in project_details_test2.calculation_status
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class CalculationQueue:
+    def __init__(self, calculate, workers=4, max_pending=100, status_ttl=3600):
+        """
+        Bounded pool of background threads that run submission calculations
+
+        A job is tracked in memory from submit() until status_ttl seconds after
+        it finishes. At most max_pending jobs are queued or running at once;
+        submit() refuses further jobs so the caller can fall back to
+        calculating in the request instead of letting the backlog grow.
+
+        :param calculate: Callable run as calculate(job, *args); it records its
+            progress by setting job['step'] and problems in job['errors']
+        :param workers: Number of worker threads
+        :param max_pending: Maximum queued plus running jobs
+        :param status_ttl: Seconds a job's status is kept in memory
+        """
+        self.calculate = calculate
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jobs = TTLCache(maxsize=max_pending * 10, ttl=status_ttl)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def _get_executor(self):
+        # Threads do not survive fork(), so each process starts its own pool
+        if self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='calculation')
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def _new_job(self, job_id):
+        job = {'status': QUEUED, 'step': None, 'errors': [], 'queued_at': time.time(), 'finished_at': None}
+        self.jobs.set(job_id, job)
+        return job
+
+    def submit(self, job_id, *args):
+        """
+        Queue calculate(job, *args) for a background worker
+
+        :param job_id: Key the job's status is reported under
+        :return: True if queued, False if the queue is full
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                return False
+            self._pending += 1
+            self._stats['submitted'] += 1
+
+        # Run in a copy of the caller's context, so the job keeps its correlation id
+        executor.submit(contextvars.copy_context().run, self._run_queued, job_id, self._new_job(job_id), args)
+        return True
+
+    def run(self, job_id, *args):
+        """
+        Run calculate(job, *args) in the calling thread, tracked like a queued job
+
+        :param job_id: Key the job's status is reported under
+        :return: Final job dictionary
+        """
+        job = self._new_job(job_id)
+        self._run(job_id, job, args)
+        return dict(job)
+
+    def _run_queued(self, job_id, job, args):
+        try:
+            self._run(job_id, job, args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _run(self, job_id, job, args):
+        job['status'] = RUNNING
+        try:
+            self.calculate(job, *args)
+        except Exception as e:
+            logger.error("Calculation failed for %s: %s", job_id, e)
+            job['errors'].append(str(e))
+        job['status'] = FAILED if job['errors'] else COMPLETED
+        job['finished_at'] = time.time()
+        # Re-set so the status is kept for status_ttl after the job finishes
+        self.jobs.set(job_id, job)
+        with self._lock:
+            self._stats[job['status']] += 1
+
+    def status(self, job_id):
+        """
+        Status of a job submitted by this process
+
+        :param job_id: Key passed to submit()
+        :return: Copy of the job dictionary, or None if unknown or expired
+        """
+        job = self.jobs.get(job_id, None)
+        return dict(job) if job is not None else None
+
+    def stats(self):
+        """
+        Snapshot of queue counters
+
+        :return: Dictionary with pending jobs, worker count and job totals
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+        stats['workers'] = self.workers
+        stats['max_pending'] = self.max_pending
+        return stats
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting jobs and optionally wait for queued ones to finish
+        """
+        with self._lock:
+            executor = self._executor if self._pid == os.getpid() else None
+            self._executor = None
+            self._pid = None
+        # Outside the lock, which finishing jobs need
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,62 @@
+"""
+Export project_details_test2 rows to a CSV, XLSX or Parquet file
+
+    python -m backend.jobs.export_projects --format parquet --output projects.parquet
+    python -m backend.jobs.export_projects --council-id 183 --created-from 2025-01-01 --output projects.csv
+
+Takes the filters of GET /projects and writes every column, or --fields.
+Rows are read through an unbuffered (server-side) cursor and written batch
+by batch, so memory stays flat however many rows match.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+from backend.utils.db import db_pool
+from backend.utils.project_listing import LISTING_FILTERS
+from backend.utils.project_export import EXPORT_FORMATS, parse_export_query, export_projects
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', required=True, help="file to write; '-' for standard output")
+    parser.add_argument('--format', choices=EXPORT_FORMATS,
+                        help="output format (default: from the --output extension, else csv)")
+    for column in LISTING_FILTERS:
+        parser.add_argument(f"--{column.replace('_', '-')}", dest=column, help=f"only rows with this {column}")
+    parser.add_argument('--created-from', help="only rows created at or after this ISO date")
+    parser.add_argument('--created-to', help="only rows created before this ISO date")
+    parser.add_argument('--fields', help="comma-separated columns (default: all)")
+    parser.add_argument('--limit', help="export at most this many rows")
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows fetched and written at a time")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    extension = os.path.splitext(args.output)[1].lstrip('.').lower()
+    export_format = args.format or (extension if extension in EXPORT_FORMATS else 'csv')
+    try:
+        query = parse_export_query({key: value for key, value in vars(args).items() if value is not None})
+        chunks = export_projects(db_pool.open_dedicated, query, export_format, args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.monotonic()
+    written = 0
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    logger.info("Wrote %s bytes of %s to %s in %.1fs", written, export_format, args.output, time.monotonic() - started)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
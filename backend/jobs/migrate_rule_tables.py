@@ -0,0 +1,239 @@
+"""
+Add typed DECIMAL range columns and lookup indexes to the DCR rule tables
+
+    python -m backend.jobs.migrate_rule_tables --dry-run
+    python -m backend.jobs.migrate_rule_tables
+    python -m backend.jobs.migrate_rule_tables --check
+
+The range columns of the rule tables are text, and the rule queries compare
+them through CAST(... AS DECIMAL), which no index can serve, so every
+lookup scans and converts the whole table. For every range column pair in
+RULE_TABLES this adds STORED generated DECIMAL columns holding the same
+CAST (see TYPED_RANGE_COLUMNS), so they follow later edits of the text
+columns, and an idx_rule_lookup index on the key columns followed by the
+first typed range pair. Set FSI_TYPED_RANGES=True once every table is
+migrated. Tables and columns that already exist are skipped, and so is the
+setback table until "Setback margin rules.txt" has created it.
+
+--check runs EXPLAIN on a rule query of every table, written the way
+FSICalculator issues it with FSI_TYPED_RANGES, and exits with status 1
+when one can only be answered with a full table scan.
+"""
+import sys
+import logging
+import argparse
+
+import mysql.connector
+
+from backend.calculators.fsi_rule_index import (
+    RULE_TABLES, FSI_RULE_TABLES, TYPED_RANGE_COLUMNS, RULE_LOOKUP_INDEX, RuleLookup, rule_lookup_index_columns, rule_query
+)
+from backend.utils.db import DB_CONFIG, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Text that CAST(... AS DECIMAL) reads completely; anything else is truncated with a warning
+NUMERIC_TEXT = r'^ *[+-]?([0-9]+[.]?[0-9]*|[.][0-9]+)([eE][+-]?[0-9]+)?$'
+
+# --check accepts a full scan of a table with at most this many rows, where the
+# optimizer rightly prefers reading a page or two to the index
+SMALL_TABLE_ROWS = 20
+
+
+def rule_tables(cursor):
+    """
+    Rule tables to migrate and check: every FSI rule table, and the others
+    (the setback table) only once they exist
+
+    :param cursor: Dictionary cursor
+    :return: List of table names in RULE_TABLES order
+    """
+    cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    existing = {row['TABLE_NAME'].lower() for row in cursor.fetchall()}
+    tables = []
+    for table in RULE_TABLES:
+        if table in FSI_RULE_TABLES or table.lower() in existing:
+            tables.append(table)
+        else:
+            logger.warning("Skipping %s, which does not exist yet", table)
+    return tables
+
+
+def migration_statements(cursor, table):
+    """
+    ALTER TABLE statement adding the typed range columns and index a table lacks
+
+    :param cursor: Dictionary cursor
+    :param table: Rule table name
+    :return: List with the statement, empty when the table is already migrated
+    """
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    existing = {row['COLUMN_NAME'].lower() for row in cursor.fetchall()}
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (table, RULE_LOOKUP_INDEX)
+    )
+    has_index = cursor.fetchone() is not None
+
+    changes = []
+    for pair in RULE_TABLES[table].ranges:
+        for source, typed in zip(pair, TYPED_RANGE_COLUMNS[pair]):
+            if typed.lower() not in existing:
+                changes.append(
+                    f"ADD COLUMN {typed} DECIMAL(10,0) GENERATED ALWAYS AS (CAST({source} AS DECIMAL)) STORED"
+                )
+    if not has_index:
+        changes.append(f"ADD INDEX {RULE_LOOKUP_INDEX} ({', '.join(rule_lookup_index_columns(table))})")
+    return [f"ALTER TABLE {table} {', '.join(changes)}"] if changes else []
+
+
+def non_numeric_values(cursor, table):
+    """
+    Count range values that CAST(... AS DECIMAL) only reads in part
+
+    Strict SQL modes turn those truncations into errors when the generated
+    columns are computed, on the migration and on later writes.
+
+    :return: Dictionary of column name -> number of rows
+    """
+    counts = {}
+    for pair in RULE_TABLES[table].ranges:
+        for column in pair:
+            cursor.execute(
+                f"SELECT COUNT(*) AS count FROM {table} WHERE {column} IS NOT NULL AND {column} NOT REGEXP %s",
+                (NUMERIC_TEXT,)
+            )
+            count = cursor.fetchone()['count']
+            if count:
+                counts[column] = count
+    return counts
+
+
+def migrate(dry_run=False, force=False):
+    """
+    Add the typed range columns and lookup index to every rule table
+
+    :param dry_run: Only log the statements
+    :param force: Migrate even if range columns hold non-numeric text; the ALTERs
+                  then run without strict mode, so such values are cast as queries cast them
+    :return: Number of statements run (or logged with dry_run)
+    :raises ValueError: If range columns hold non-numeric text and force is not set
+    """
+    # Not from the pool: the session's sql_mode may be changed below
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        plan = []
+        for table in rule_tables(cursor):
+            problems = non_numeric_values(cursor, table)
+            if problems:
+                details = ', '.join(f'{column}: {count} rows' for column, count in problems.items())
+                if not force:
+                    raise ValueError(f"{table} has non-numeric range values ({details}); fix them or use --force")
+                logger.warning("%s has non-numeric range values (%s)", table, details)
+            plan.extend(migration_statements(cursor, table))
+
+        if force and plan:
+            cursor.execute("SELECT @@SESSION.sql_mode AS sql_mode")
+            modes = [mode for mode in cursor.fetchone()['sql_mode'].split(',')
+                     if mode and mode not in ('STRICT_TRANS_TABLES', 'STRICT_ALL_TABLES')]
+            cursor.execute("SET SESSION sql_mode = %s", (','.join(modes),))
+        for statement in plan:
+            logger.info("%s%s", '[dry run] ' if dry_run else '', statement)
+            if not dry_run:
+                cursor.execute(statement)
+        cursor.close()
+    finally:
+        connection.close()
+
+    if not plan:
+        logger.info("Rule tables are already migrated")
+    return len(plan)
+
+
+def _sample_lookup(cursor, table):
+    """
+    A RuleLookup probing the first row of a rule table, as the rules build them
+    """
+    spec = RULE_TABLES[table]
+    lows = tuple(TYPED_RANGE_COLUMNS[pair][0] for pair in spec.ranges)
+    cursor.execute(f"SELECT {', '.join(spec.keys + lows)} FROM {table} LIMIT 1")
+    row = cursor.fetchone() or dict.fromkeys(spec.keys + lows, 0)
+    return RuleLookup(
+        table, {'value': spec.values[0]},
+        keys=tuple(row[column] for column in spec.keys),
+        ranges=tuple(row[column] for column in lows)
+    )
+
+
+def check_query_plans():
+    """
+    EXPLAIN a typed rule query on every rule table
+
+    A plan passes when it reads through an index (type other than ALL) or
+    uses idx_rule_lookup. A full scan of a table of at most SMALL_TABLE_ROWS
+    rows also passes, with table_rows added to its plan row.
+
+    :return: List of (table, plan row, passed) tuples
+    """
+    results = []
+    connection = get_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        for table in rule_tables(cursor):
+            try:
+                query, params = rule_query(_sample_lookup(cursor, table), typed_ranges=True)
+                cursor.execute(f"EXPLAIN {query}", params)
+                plan = cursor.fetchall()[0]
+            except mysql.connector.Error as e:
+                results.append((table, {'error': str(e)}, False))
+                continue
+            passed = plan.get('type') != 'ALL' or plan.get('key') == RULE_LOOKUP_INDEX
+            if not passed:
+                cursor.execute(f"SELECT COUNT(*) AS count FROM {table}")
+                plan['table_rows'] = cursor.fetchone()['count']
+                passed = plan['table_rows'] <= SMALL_TABLE_ROWS
+            results.append((table, plan, passed))
+        cursor.close()
+    finally:
+        connection.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help="log the ALTER TABLE statements without running them")
+    parser.add_argument('--force', action='store_true', help="migrate even if range columns hold non-numeric text")
+    parser.add_argument('--check', action='store_true', help="EXPLAIN the rule queries and fail on full scans")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if not args.check:
+        try:
+            migrate(dry_run=args.dry_run, force=args.force)
+        except ValueError as e:
+            logger.error("%s", e)
+            return 1
+        return 0
+
+    failures = 0
+    for table, plan, passed in check_query_plans():
+        if 'error' in plan:
+            print(f"{table:45} FAIL  {plan['error']}")
+        else:
+            print(f"{table:45} {'ok  ' if passed else 'FAIL'}  type={plan.get('type')} key={plan.get('key')} "
+                  f"possible_keys={plan.get('possible_keys')} rows={plan.get('rows')}"
+                  f"{' (small table)' if passed and 'table_rows' in plan else ''}")
+        failures += not passed
+    if failures:
+        print(f"{failures} rule table quer{'y' if failures == 1 else 'ies'} can only be answered with a full scan")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
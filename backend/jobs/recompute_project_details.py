@@ -0,0 +1,218 @@
+"""
+Recalculate FSI, area statement and setback columns for every row of project_details_test2
+
+Run after the DCR rule tables are amended:
+
+    python -m backend.jobs.recompute_project_details --workers 4 --batch-size 1000
+
+Rows are streamed in id order through an unbuffered (server-side) cursor and
+handed to a process pool in batches; results are written back with
+executemany UPDATEs, committed once per batch. Rows whose setbacks cannot be
+calculated keep their stored setback columns. After every committed batch
+the last id is saved to the state file, and --resume continues after it.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import mysql.connector
+
+from backend.calculators.fsi_calculator import FSICalculator
+from backend.calculators.setback_calculator import SetbackCalculator, SETBACK_INPUT_COLUMNS
+from backend.calculators.area_statement_calculator import (
+    calculate_area_statement_columns, area_statement_records
+)
+from backend.utils.db import DB_CONFIG, db_pool, get_connection
+from backend.utils.project_columns import (
+    AREA_STATEMENT_COLUMNS, FSI_COLUMNS, FSI_INPUT_COLUMNS, SETBACK_COLUMNS, get_fsi_values, get_setback_values,
+    get_fsi_project_details
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns read by calculate_area_statement, get_fsi_project_details and SetbackCalculator
+INPUT_COLUMNS = tuple(dict.fromkeys((
+    'id', 'area_plot_ownership_sqm', 'area_plot_measurement_sqm', 'area_plot_site_sqm', 'dp_rp_road_area_sqm',
+    'reservation_area_sqm', 'plot_layout_type',
+) + FSI_INPUT_COLUMNS + SETBACK_INPUT_COLUMNS))
+
+UPDATE_QUERY = f"""
+UPDATE project_details_test2
+SET {', '.join(f'{column} = %s' for column in AREA_STATEMENT_COLUMNS + FSI_COLUMNS + SETBACK_COLUMNS)}
+WHERE id = %s
+"""
+
+# For rows whose setback calculation failed, which keep their stored setbacks
+UPDATE_WITHOUT_SETBACKS_QUERY = f"""
+UPDATE project_details_test2
+SET {', '.join(f'{column} = %s' for column in AREA_STATEMENT_COLUMNS + FSI_COLUMNS)}
+WHERE id = %s
+"""
+
+_worker_calculator = None
+_worker_setback_calculator = None
+
+
+def _init_worker():
+    """Create one FSICalculator and SetbackCalculator per worker process, with the rule tables held in memory"""
+    global _worker_calculator, _worker_setback_calculator
+    _worker_calculator = FSICalculator(DB_CONFIG, engine='memory', pool=db_pool)
+    _worker_setback_calculator = SetbackCalculator(db_pool)
+
+
+def recompute_rows(rows):
+    """
+    Recalculate the area statement, FSI and setback columns for a batch of rows
+
+    :param rows: List of dictionaries with INPUT_COLUMNS
+    :return: (list of UPDATE_QUERY parameter tuples, list of UPDATE_WITHOUT_SETBACKS_QUERY
+             parameter tuples for the rows whose setbacks could not be calculated)
+    :raises RuntimeError, mysql.connector.Error: If the FSI rule tables cannot be loaded
+    """
+    calculator = _worker_calculator or FSICalculator(DB_CONFIG, engine='memory', pool=db_pool)
+    setback_calculator = _worker_setback_calculator or SetbackCalculator(db_pool)
+    # Raise rather than let the batch evaluator turn a load failure into error
+    # results, which would overwrite the stored FSI values of the whole batch
+    calculator.rule_index.refresh()
+
+    columns = {column: [row[column] for row in rows] for column in INPUT_COLUMNS}
+    area_statements = area_statement_records(calculate_area_statement_columns(columns))
+    fsi_results = calculator.calculate_fsi_batch([get_fsi_project_details(row) for row in rows])
+    setback_results = setback_calculator.evaluate(rows)
+
+    params, params_without_setbacks = [], []
+    for row, area_statement, fsi_result, setback_result in zip(rows, area_statements, fsi_results, setback_results):
+        values = tuple(area_statement[column] for column in AREA_STATEMENT_COLUMNS) + get_fsi_values(fsi_result)
+        if setback_result.get('error'):
+            # A missing setback table or rule is no reason to erase the stored margins
+            params_without_setbacks.append(values + (row['id'],))
+        else:
+            params.append(values + get_setback_values(setback_result) + (row['id'],))
+    return params, params_without_setbacks
+
+
+def _load_state(path):
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(path, state):
+    # Write then rename so an interruption never leaves a truncated state file
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(temporary_path, path)
+
+
+def recompute(batch_size=1000, workers=None, state_file='recompute_state.json', resume=False, progress_interval=10):
+    """
+    Recalculate every row of project_details_test2 with an id after the checkpoint
+
+    :param batch_size: Rows per worker batch and per executemany UPDATE
+    :param workers: Worker processes (defaults to the CPU count)
+    :param state_file: Path of the checkpoint file
+    :param resume: Continue after the id saved in state_file
+    :param progress_interval: Seconds between progress reports
+    :return: Number of rows updated
+    """
+    workers = workers or os.cpu_count() or 1
+    last_id = _load_state(state_file).get('last_id', 0) if resume else 0
+
+    read_connection = get_connection()
+    write_connection = get_connection()
+    try:
+        count_cursor = read_connection.cursor(buffered=True)
+        count_cursor.execute("SELECT COUNT(*) FROM project_details_test2 WHERE id > %s", (last_id,))
+        total = count_cursor.fetchone()[0]
+        # Keep the server from dropping a slow-consuming stream
+        count_cursor.execute("SET SESSION net_write_timeout = 3600")
+        count_cursor.close()
+
+        read_cursor = read_connection.cursor(dictionary=True, buffered=False)
+        read_cursor.execute(
+            f"SELECT {', '.join(INPUT_COLUMNS)} FROM project_details_test2 WHERE id > %s ORDER BY id",
+            (last_id,)
+        )
+        write_cursor = write_connection.cursor()
+
+        logger.info("Recomputing %s rows after id %s with %s workers", total, last_id, workers)
+        started = time.monotonic()
+        reported = started
+        done = 0
+
+        def write(batch):
+            nonlocal done, reported, last_id
+            params, params_without_setbacks = batch
+            if params:
+                write_cursor.executemany(UPDATE_QUERY, params)
+            if params_without_setbacks:
+                write_cursor.executemany(UPDATE_WITHOUT_SETBACKS_QUERY, params_without_setbacks)
+            write_connection.commit()
+            done += len(params) + len(params_without_setbacks)
+            last_id = max(values[-1] for values in params + params_without_setbacks)
+            _save_state(state_file, {'last_id': last_id, 'updated': done})
+
+            now = time.monotonic()
+            if now - reported >= progress_interval:
+                reported = now
+                rate = done / (now - started)
+                logger.info("%s/%s rows (%.0f rows/s), last id %s", done, total, rate, last_id)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            # Bounded window of in-flight batches keeps memory flat; results are
+            # written in submission order so the checkpoint only moves forward
+            in_flight = deque()
+            while True:
+                rows = read_cursor.fetchmany(batch_size)
+                if rows:
+                    in_flight.append(executor.submit(recompute_rows, rows))
+                if in_flight and (not rows or len(in_flight) >= workers * 2):
+                    write(in_flight.popleft().result())
+                if not rows and not in_flight:
+                    break
+
+        read_cursor.close()
+        write_cursor.close()
+        elapsed = time.monotonic() - started
+        logger.info("Recomputed %s rows in %.1fs (%.0f rows/s)", done, elapsed, done / elapsed if elapsed else 0)
+        return done
+    finally:
+        read_connection.close()
+        write_connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=1000, help="rows per worker batch and UPDATE batch")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--state-file', default='recompute_state.json', help="checkpoint file used by --resume")
+    parser.add_argument('--resume', action='store_true', help="continue after the last checkpointed id")
+    parser.add_argument('--progress-interval', type=float, default=10, help="seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        recompute(
+            batch_size=args.batch_size,
+            workers=args.workers,
+            state_file=args.state_file,
+            resume=args.resume,
+            progress_interval=args.progress_interval,
+        )
+    except (RuntimeError, mysql.connector.Error) as e:
+        # Batches after the last checkpoint were not written; --resume retries them
+        logger.error("Recompute stopped, rerun with --resume: %s", e)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
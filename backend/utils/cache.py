@@ -0,0 +1,131 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+# Returned by get() when a key is not cached, so None can be cached as a value
+MISSING = object()
+
+
+def approximate_size(value):
+    """
+    Rough memory footprint of a value and the containers inside it
+
+    Shared objects such as small ints and interned strings are counted every
+    time they appear, so this errs on the high side.
+
+    :param value: Object to measure
+    :return: Size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600, maxbytes=None):
+        """
+        Thread-safe in-process cache with LRU eviction and per-entry expiry
+
+        :param maxsize: Maximum number of entries before the least recently used is evicted
+        :param ttl: Seconds an entry stays valid, or None for no expiry
+        :param maxbytes: Approximate memory bound of keys and values, or None for no bound
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key, default=MISSING):
+        """
+        Return a cached value and mark it as recently used
+
+        :param key: Cache key
+        :param default: Returned when the key is absent or expired
+        :return: Cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Cache a value, evicting least recently used entries while over maxsize or maxbytes
+
+        :param key: Cache key
+        :param value: Value to cache (None is allowed)
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        # Only measured when there is a memory bound to enforce
+        size = approximate_size(key) + approximate_size(value) if self.maxbytes is not None else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.maxsize or
+                                     (self.maxbytes is not None and self._bytes > self.maxbytes)):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def update(self, items):
+        """
+        Cache many values at once
+
+        :param items: Mapping or iterable of (key, value) pairs
+        """
+        for key, value in dict(items).items():
+            self.set(key, value)
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when no key is given
+
+        :param key: Cache key, or None to clear the cache
+        """
+        with self._lock:
+            if key is None:
+                self._stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+                    self._stats['invalidations'] += 1
+
+    def stats(self):
+        """
+        Snapshot of cache counters
+
+        :return: Dictionary with size, hit/miss counts and hit ratio
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            if self.maxbytes is not None:
+                stats['bytes'] = self._bytes
+        stats['maxsize'] = self.maxsize
+        if self.maxbytes is not None:
+            stats['maxbytes'] = self.maxbytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
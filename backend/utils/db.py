@@ -0,0 +1,291 @@
+import os
+import time
+import queue
+import logging
+import threading
+import mysql.connector
+from dotenv import load_dotenv
+
+from backend.utils.metrics import Histogram, FAST_BUCKETS
+
+# Load environment variables
+load_dotenv()
+
+# Database configuration from environment variables
+DB_CONFIG = {
+    "host": os.getenv('DB_HOST'),
+    "user": os.getenv('DB_USER'),
+    "password": os.getenv('DB_PASSWORD'),
+    "database": os.getenv('DB_NAME')
+}
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ACQUIRE_SECONDS = Histogram(
+    'citiwise_db_connection_acquire_seconds',
+    "Time to check a connection out of the pool, including health checks and waits",
+    buckets=FAST_BUCKETS + (2.5, 5.0, 10.0)
+)
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled MySQL connection
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to its pool instead of disconnecting it, and
+    is_connected() only reports whether the proxy still holds a connection.
+    Liveness is checked by the pool on checkout, so callers avoid a ping
+    round trip before closing.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise mysql.connector.errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._connection, name)
+
+    def is_connected(self):
+        return self._connection is not None
+
+    def close(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, db_config, size=5, timeout=10, ping_after=1, connect=None):
+        """
+        Thread-safe pool of MySQL connections shared by the whole process
+
+        Connections are opened lazily up to size. A checkout reuses the most
+        recently returned connection and pings it first when it has been idle
+        for longer than ping_after seconds, replacing it if the ping fails.
+
+        :param db_config: Dictionary containing database connection parameters
+        :param size: Maximum number of open connections
+        :param timeout: Seconds to wait for a free connection before giving up
+        :param ping_after: Idle seconds after which a connection is health-checked on checkout
+        :param connect: Function opening a connection from db_config keyword
+                        arguments; defaults to mysql.connector.connect
+        """
+        self.db_config = db_config
+        self.connect = connect or mysql.connector.connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._idle = queue.LifoQueue()
+        self._open = 0
+        self._pid = os.getpid()
+        self._stats = {
+            'created': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'discarded': 0,
+        }
+
+    def _connect(self):
+        connection = self.connect(**self.db_config)
+        with self._lock:
+            self._stats['created'] += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._open -= 1
+            self._stats['discarded'] += 1
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
+
+    def _healthy(self, connection, idle_since):
+        if time.monotonic() - idle_since <= self.ping_after:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql.connector.Error as e:
+            logger.warning("Discarding pooled connection that failed its health check: %s", e)
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def acquire(self):
+        """
+        Check a connection out of the pool
+
+        :return: PooledConnection; call close() to return it
+        :raises mysql.connector.Error: If no connection can be opened or the pool stays exhausted
+        """
+        if self._pid != os.getpid():
+            # Connections inherited across fork() belong to the parent process
+            self.reset()
+
+        started = time.monotonic()
+        waited = False
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open < self.size
+                    if can_open:
+                        self._open += 1
+                if can_open:
+                    try:
+                        connection = self._connect()
+                    except mysql.connector.Error:
+                        with self._lock:
+                            self._open -= 1
+                        raise
+                    break
+
+                remaining = self.timeout - (time.monotonic() - started)
+                waited = True
+                try:
+                    connection, idle_since = self._idle.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise mysql.connector.errors.PoolError(
+                        f"No database connection available within {self.timeout}s (pool size {self.size})"
+                    )
+
+            if self._healthy(connection, idle_since):
+                break
+            self._discard(connection)
+
+        elapsed = time.monotonic() - started
+        CONNECTION_ACQUIRE_SECONDS.observe(elapsed)
+        with self._lock:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds'] += elapsed
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """
+        Return a raw connection to the pool, rolling back any open transaction
+
+        :param connection: Connection previously handed out by acquire()
+        """
+        if self._pid != os.getpid():
+            return
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except mysql.connector.Error:
+            self._discard(connection)
+            return
+        self._idle.put((connection, time.monotonic()))
+
+    def prefill(self, count=None):
+        """
+        Open connections ahead of the first requests
+
+        :param count: Connections to have open, at most size; defaults to size
+        :return: Number of connections opened
+        :raises mysql.connector.Error: If a connection cannot be opened
+        """
+        if self._pid != os.getpid():
+            self.reset()
+
+        target = min(self.size if count is None else count, self.size)
+        opened = 0
+        while True:
+            with self._lock:
+                if self._open >= target:
+                    break
+                self._open += 1
+            try:
+                connection = self._connect()
+            except mysql.connector.Error:
+                with self._lock:
+                    self._open -= 1
+                raise
+            self._idle.put((connection, time.monotonic()))
+            opened += 1
+        return opened
+
+    def open_dedicated(self):
+        """
+        Open a connection outside the pool, with the pool's settings
+
+        For long-running reads such as exports, which would otherwise hold a
+        pooled connection for minutes. close() disconnects it.
+
+        :return: Database connection
+        """
+        return self._connect()
+
+    def stats(self):
+        """
+        Snapshot of pool usage counters
+
+        :return: Dictionary of pool statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._open
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['open'] - stats['idle']
+        return stats
+
+    def close_all(self):
+        """
+        Close every idle connection
+        """
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    def reset(self):
+        """
+        Forget all connections without closing them
+
+        Used in a freshly forked process, where closing the parent's sockets
+        would tear down the parent's sessions.
+        """
+        # The parent's lock may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self._reset_state()
+
+
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=int(os.getenv('DB_POOL_SIZE', 5)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    ping_after=float(os.getenv('DB_POOL_PING_AFTER', 1)),
+)
+
+
+def get_connection():
+    """
+    Check a connection out of the shared pool
+
+    :return: PooledConnection; close() returns it to the pool
+    """
+    return db_pool.acquire()
@@ -0,0 +1,88 @@
+# Columns of project_details_test2 filled from the form, in the order of the data tuple
+PROJECT_DETAILS_COLUMNS = (
+    'applicant_type', 'applicant_name', 'contact_no', 'email', 'project_name', 'site_address', 'dp_rp_part_plan',
+    'google_image', 'ulb_rp_special_authority', 'special_scheme', 'regularization', 'type_of_development',
+    'incentive_fsi', 'incentive_fsi_rating', 'type_of_proposal', 'hilly_site', 'flood_affected_area', 'location',
+    'electrical_line', 'electrical_line_voltage', 'plot_layout_type', 'reservation_area_affected',
+    'reservation_area_sqm', 'crz_status', 'zone', 'uses_id', 'survey_type', 'survey_number', 'village_name',
+    'area_plot_site_sqm', 'area_plot_ownership_sqm', 'area_plot_measurement_sqm', 'pro_rata_fsi', 'class_of_land',
+    'dp_rp_road_affected', 'dp_rp_road_area_sqm', 'city_specific_area_id', 'building_height', 'redevelopment_proposal',
+    'plot_width', 'tod', 'building_type_id', 'building_subtype_id', 'front_boundary_type', 'road_details_front',
+    'road_details_front_meters', 'left_boundary_type', 'road_details_left', 'road_details_left_meters',
+    'right_boundary_type', 'road_details_right', 'road_details_right_meters', 'rear_boundary_type',
+    'road_details_rear', 'road_details_rear_meters', 'ulb_type', 'council_id', 'taluka_id', 'crz_location', 'zone_id',
+    'zone_landuser_id', 'uses_name', 'uses_zone_id', 'city_specific_area_name', 'city_specific_area_areaCode',
+    'city_specific_area_councilId', 'building_type_name', 'building_type_proposalId', 'building_subtype_name',
+    'building_subtype_bldgtypeID',
+)
+
+# Columns written from calculate_area_statement results
+AREA_STATEMENT_COLUMNS = (
+    'area_of_plot', 'area_as_per_ownership_document', 'area_as_per_tilr_or_city_survey_measurement_sheet',
+    'area_as_per_demarcated_drawing_area', 'deductions', 'deductions_a', 'deductions_b', 'balance_area_of_plot',
+    'amenity_space_proposed', 'amenity_space_proposed_a', 'amenity_space_proposed_b', 'amenity_space_proposed_c',
+    'net_plot_area', 'recreational_open_space', 'recreational_open_space_a', 'recreational_open_space_b',
+    'recreational_open_space_c', 'recreational_open_space_d',
+)
+
+# Columns written from FSICalculator results
+FSI_COLUMNS = ('basic_fsi', 'premium_fsi', 'tdr', 'remarks_fsi')
+
+# Columns written from SetbackCalculator results
+SETBACK_COLUMNS = (
+    'front_margin', 'side_margin_left', 'side_margin_right', 'rear_margin', 'min_plot_area', 'min_plot_width',
+    'remarks_setback',
+)
+
+# Columns read by get_fsi_project_details
+FSI_INPUT_COLUMNS = (
+    'council_id', 'city_specific_area_id', 'city_specific_area_areaCode', 'type_of_proposal', 'crz_status', 'tod',
+    'location', 'plot_layout_type', 'area_plot_site_sqm', 'zone', 'zone_id', 'road_details_front_meters',
+    'road_details_left_meters', 'road_details_right_meters', 'road_details_rear_meters',
+)
+
+def get_float_value(value):
+    """Helper function to convert values to float"""
+    try:
+        return float(value) if value else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+def get_fsi_values(fsi_results):
+    """Helper function to convert FSI results into FSI_COLUMNS order"""
+    return (
+        float(fsi_results.get('basic_fsi', 0)) if fsi_results.get('basic_fsi') is not None else None,
+        float(fsi_results.get('premium_fsi', 0)) if fsi_results.get('premium_fsi') is not None else None,
+        float(fsi_results.get('tdr', 0)) if fsi_results.get('tdr') is not None else None,
+        str(fsi_results.get('remarks_fsi', 'NA')),
+    )
+
+def get_setback_values(setback_results):
+    """Helper function to convert setback results into SETBACK_COLUMNS order, all None without results"""
+    return tuple((setback_results or {}).get(column) for column in SETBACK_COLUMNS)
+
+def get_fsi_project_details(project):
+    """
+    Build the FSICalculator input from project_details_test2 column values
+
+    :param project: Mapping of column name -> value (form values or a database row)
+    :return: project_details dictionary for FSICalculator.calculate_fsi
+    """
+    council_id = project.get('council_id')
+    return {
+        'council_id': int(council_id) if council_id not in (None, '') else None,
+        'city_specific_area': project.get('city_specific_area_id'),
+        'city_specific_area_areaCode': project.get('city_specific_area_areaCode'),
+        'type_of_proposal': project.get('type_of_proposal'),
+        'crz_status': project.get('crz_status'),
+        'tod': project.get('tod'),
+        'location': project.get('location'),
+        'plot_layout_type': project.get('plot_layout_type'),
+        'area_plot_site_sqm': get_float_value(project.get('area_plot_site_sqm')),
+        'zone': project.get('zone'),
+        'zone_id': project.get('zone_id'),
+        'road_details_front_meters': get_float_value(project.get('road_details_front_meters')),
+        'road_details_left_meters': get_float_value(project.get('road_details_left_meters')),
+        'road_details_right_meters': get_float_value(project.get('road_details_right_meters')),
+        'road_details_rear_meters': get_float_value(project.get('road_details_rear_meters'))
+    }
@@ -0,0 +1,252 @@
+import io
+import csv
+import tempfile
+from decimal import Decimal
+from datetime import datetime
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from backend.utils.project_listing import BASE_COLUMNS, filter_conditions, parse_project_query
+from backend.utils.project_submission import SUBMISSION_SCHEMA, DECIMAL
+from backend.utils.project_columns import AREA_STATEMENT_COLUMNS, FSI_COLUMNS, SETBACK_COLUMNS
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Column types of project_details_test2 that are not text, for typed formats
+DECIMAL_COLUMNS = frozenset(
+    [name for name, kind, _, _ in SUBMISSION_SCHEMA if kind == DECIMAL] +
+    list(AREA_STATEMENT_COLUMNS) + [column for column in FSI_COLUMNS if column != 'remarks_fsi'] +
+    [column for column in SETBACK_COLUMNS if column != 'remarks_setback']
+)
+INTEGER_COLUMNS = frozenset(['id', 'zone_id', 'zone_landuser_id', 'uses_zone_id', 'building_type_proposalId',
+                             'building_subtype_bldgtypeID'])
+TIMESTAMP_COLUMNS = frozenset(['timestamp'])
+
+# Scale of the DECIMAL(10,2) columns
+CENTS = Decimal('0.01')
+
+# Rows per sheet in an XLSX workbook, below the header row
+XLSX_MAX_ROWS = 1048575
+
+
+def parse_export_query(args):
+    """
+    Read export filters and columns; the same arguments as the listing
+
+    Every column except calculation_status (which exists only in async submit
+    mode) is exported unless fields is given, and limit is optional with no
+    upper bound.
+
+    :param args: Request arguments (a MultiDict or plain dictionary)
+    :return: ProjectQuery
+    :raises ValueError: On an unknown field, a bad date, limit or cursor
+    """
+    query = parse_project_query(args, default_limit=None, max_limit=None)
+    if not args.get('fields'):
+        query = query._replace(fields=BASE_COLUMNS)
+    return query
+
+
+def check_format(export_format):
+    """
+    :raises ValueError: If the format is unknown or its writer is not installed
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'xlsx' and openpyxl is None:
+        raise ValueError("XLSX export needs openpyxl, which is not installed")
+    if export_format == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet export needs pyarrow, which is not installed")
+
+
+def iter_project_batches(connection, query, batch_size=5000):
+    """
+    Stream the rows of a ProjectQuery in id order, batch by batch
+
+    Rows come from an unbuffered cursor, so only one batch is held at a time
+    on either side. Leaving the generator early leaves the result unread:
+    close the connection, do not return it to a pool.
+
+    :param connection: Connection not shared with anything else
+    :param query: ProjectQuery; fields gives the column order of the tuples
+    :param batch_size: Rows fetched per round trip
+    :return: Generator of lists of row tuples
+    """
+    conditions, params = filter_conditions(query)
+    sql = f"SELECT {', '.join(query.fields)} FROM project_details_test2"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += " ORDER BY id"
+    if query.limit:
+        sql += " LIMIT %s"
+        params.append(query.limit)
+
+    cursor = connection.cursor(buffered=False)
+    # Keep the server from dropping a slow-consuming stream
+    cursor.execute("SET SESSION net_write_timeout = 3600")
+    cursor.execute(sql, tuple(params))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+    cursor.close()
+
+
+def write_csv(fields, batches):
+    """
+    :return: Generator of CSV bytes, one chunk per batch
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(fields, batches, chunk_size=65536):
+    """
+    Write a single-sheet workbook, then yield it in chunks
+
+    The write-only workbook keeps rows in a temporary file rather than in
+    memory. A workbook can only be produced once every row is in, so the
+    first chunk comes after the last row was read.
+
+    :return: Generator of XLSX bytes
+    :raises ValueError: When there are more rows than a sheet holds
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('projects')
+    sheet.append(fields)
+    count = 0
+    for rows in batches:
+        count += len(rows)
+        if count > XLSX_MAX_ROWS:
+            raise ValueError(f"More than {XLSX_MAX_ROWS} rows do not fit in an XLSX sheet")
+        for row in rows:
+            sheet.append(row)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _DrainedStream(io.RawIOBase):
+    """
+    Write-only stream whose contents are taken out as they are written
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_type(field):
+    if field in DECIMAL_COLUMNS:
+        return pyarrow.decimal128(10, 2)
+    if field in INTEGER_COLUMNS:
+        return pyarrow.int64()
+    if field in TIMESTAMP_COLUMNS:
+        return pyarrow.timestamp('s')
+    return pyarrow.string()
+
+
+def _parquet_values(field, values):
+    # Coerced to the column type, whatever the driver returned
+    if field in DECIMAL_COLUMNS:
+        return [None if value in (None, '') else Decimal(str(value)).quantize(CENTS) for value in values]
+    if field in INTEGER_COLUMNS:
+        return [None if value in (None, '') else int(value) for value in values]
+    if field in TIMESTAMP_COLUMNS:
+        return [value if value is None or isinstance(value, datetime) else datetime.fromisoformat(str(value))
+                for value in values]
+    return [None if value is None else str(value) for value in values]
+
+
+def write_parquet(fields, batches):
+    """
+    :return: Generator of Parquet bytes, one row group per batch
+    """
+    schema = pyarrow.schema([(field, _parquet_type(field)) for field in fields])
+    stream = _DrainedStream()
+    writer = pyarrow.parquet.ParquetWriter(stream, schema, compression='snappy')
+    for rows in batches:
+        columns = zip(*rows)
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(_parquet_values(field, values), type=schema.field(field).type)
+             for field, values in zip(fields, columns)],
+            schema=schema
+        ))
+        yield stream.take()
+    writer.close()
+    yield stream.take()
+
+
+WRITERS = {'csv': write_csv, 'xlsx': write_xlsx, 'parquet': write_parquet}
+
+
+def export_projects(connect, query, export_format, batch_size=5000):
+    """
+    Stream projects matching a ProjectQuery in an export format
+
+    The connection is opened right away, so connection errors are raised
+    here rather than in the middle of a response, and closed once the
+    returned generator finishes or is closed.
+
+    :param connect: Function returning a connection of its own, such as ConnectionPool.open_dedicated
+    :param query: ProjectQuery from parse_export_query
+    :param export_format: Key of EXPORT_FORMATS
+    :param batch_size: Rows fetched and written at a time
+    :return: Generator of bytes
+    :raises ValueError: If the format is unknown or its writer is not installed
+    """
+    check_format(export_format)
+    connection = connect()
+
+    def generate():
+        try:
+            yield from WRITERS[export_format](query.fields, iter_project_batches(connection, query, batch_size))
+        finally:
+            connection.close()
+
+    return generate()
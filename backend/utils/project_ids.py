@@ -0,0 +1,109 @@
+import os
+import logging
+import threading
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ID_PREFIX = 'CW'
+
+
+def format_project_id(year, number, prefix=PROJECT_ID_PREFIX):
+    """
+    :return: Project id such as CW2025000042
+    """
+    return f"{prefix}{year}{number:06d}"
+
+
+class ProjectIdAllocator:
+    def __init__(self, connect, block_size=50, prefix=PROJECT_ID_PREFIX, today=date.today):
+        """
+        Hands out CW<year><number> project ids from blocks reserved in project_id_sequence
+
+        Each reservation moves the year's next_value forward by block_size with
+        one atomic UPDATE. The ids in the block are then handed out from memory,
+        so most inserts never touch the sequence. Numbers restart at 1 each
+        year. Ids are unique and increase within a process. A block's unused ids
+        are skipped when the process exits, so the sequence can have gaps.
+
+        :param connect: Function returning a database connection; close() is called when done
+        :param block_size: Number of ids reserved per round trip
+        :param prefix: Project id prefix
+        :param today: Function returning the current date, for the year
+        """
+        self.connect = connect
+        self.block_size = block_size
+        self.prefix = prefix
+        self.today = today
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._year = None
+        self._next = 0
+        self._limit = 0
+        self._stats = {'allocated': 0, 'reservations': 0}
+
+    def allocate(self):
+        """
+        Next project id
+
+        :return: Project id string
+        :raises mysql.connector.Error: If a new block cannot be reserved
+        """
+        year = self.today().year
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked process must not hand out the parent's reserved ids
+                self._reset_state()
+            if year != self._year or self._next >= self._limit:
+                # Held during the round trip so only one thread reserves a block
+                self._next, self._limit = self._reserve(year)
+                self._year = year
+            number = self._next
+            self._next += 1
+            self._stats['allocated'] += 1
+        return format_project_id(year, number, self.prefix)
+
+    def _reserve(self, year):
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            # LAST_INSERT_ID(expr) hands the updated value back to this
+            # connection without a locking read
+            cursor.execute(
+                "UPDATE project_id_sequence SET next_value = LAST_INSERT_ID(next_value + %s) WHERE year = %s",
+                (self.block_size, year)
+            )
+            if cursor.rowcount == 0:
+                # First id of the year; a concurrent process may create the row first
+                cursor.execute("INSERT IGNORE INTO project_id_sequence (year, next_value) VALUES (%s, 1)", (year,))
+                cursor.execute(
+                    "UPDATE project_id_sequence SET next_value = LAST_INSERT_ID(next_value + %s) WHERE year = %s",
+                    (self.block_size, year)
+                )
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            limit = int(cursor.fetchone()[0])
+            connection.commit()
+            cursor.close()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        self._stats['reservations'] += 1
+        logger.info("Reserved project ids %s to %s", format_project_id(year, limit - self.block_size, self.prefix),
+                    format_project_id(year, limit - 1, self.prefix))
+        return limit - self.block_size, limit
+
+    def stats(self):
+        """
+        :return: Dictionary with allocation counters and the ids left in the current block
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['block_size'] = self.block_size
+            stats['remaining_in_block'] = self._limit - self._next if self._pid == os.getpid() else 0
+        return stats
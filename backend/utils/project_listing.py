@@ -0,0 +1,188 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from collections import namedtuple
+
+from backend.utils.project_columns import PROJECT_DETAILS_COLUMNS, AREA_STATEMENT_COLUMNS, FSI_COLUMNS, SETBACK_COLUMNS
+
+# Equality filters of the listing; each has a (column, timestamp, id) index
+LISTING_FILTERS = ('council_id', 'ulb_rp_special_authority', 'type_of_proposal', 'fsi_group')
+
+# Columns added by the SUBMIT_MODE=async ALTER; projected only when asked for with ?fields=
+ASYNC_COLUMNS = ('calculation_status',)
+
+# Columns every project_details_test2 table has, all exported by default
+BASE_COLUMNS = (
+    ('id', 'project_id', 'timestamp') + PROJECT_DETAILS_COLUMNS + ('fsi_group',) + AREA_STATEMENT_COLUMNS +
+    FSI_COLUMNS + SETBACK_COLUMNS
+)
+
+# Columns that can be projected with ?fields=
+LISTABLE_COLUMNS = BASE_COLUMNS + ASYNC_COLUMNS
+
+# Indexes added by "Project listing indexes.txt"
+LISTING_INDEXES = {
+    'idx_project_listing': ('timestamp', 'id'),
+    'idx_project_listing_council': ('council_id', 'timestamp', 'id'),
+    'idx_project_listing_authority': ('ulb_rp_special_authority', 'timestamp', 'id'),
+    'idx_project_listing_proposal': ('type_of_proposal', 'timestamp', 'id'),
+    'idx_project_listing_fsi_group': ('fsi_group', 'timestamp', 'id'),
+}
+
+DEFAULT_FIELDS = (
+    'project_id', 'timestamp', 'applicant_name', 'project_name', 'ulb_rp_special_authority', 'council_id',
+    'type_of_proposal', 'fsi_group', 'basic_fsi', 'premium_fsi', 'tdr'
+)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# A parsed listing request; after is the (timestamp, id) of the last row of the previous page
+ProjectQuery = namedtuple('ProjectQuery', ['filters', 'fields', 'created_from', 'created_to', 'limit', 'after'])
+
+
+def _timestamp(value):
+    # Compared as text in the WHERE clause, in the column's own format
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    :return: Opaque page token for the row after which the next page starts
+    """
+    raw = json.dumps([_timestamp(timestamp), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    :return: (timestamp, id) of the last row of the previous page
+    :raises ValueError: If the token was not made by encode_cursor
+    """
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(timestamp, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return timestamp, row_id
+
+
+def _parse_datetime(name, value):
+    try:
+        return _timestamp(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or date and time")
+
+
+def parse_project_query(args, default_limit=DEFAULT_LIMIT, max_limit=MAX_LIMIT):
+    """
+    Read listing filters, projection and paging from request arguments
+
+    :param args: Request arguments (a MultiDict or plain dictionary)
+    :param default_limit: Page size when limit is not given
+    :param max_limit: Largest page size accepted, or None for no limit
+    :return: ProjectQuery
+    :raises ValueError: On an unknown field, a bad date, limit or cursor
+    """
+    filters = {column: args.get(column) for column in LISTING_FILTERS if args.get(column)}
+
+    fields = DEFAULT_FIELDS
+    if args.get('fields'):
+        fields = tuple(dict.fromkeys(field.strip() for field in args['fields'].split(',') if field.strip()))
+        unknown = [field for field in fields if field not in LISTABLE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    created_from = _parse_datetime('created_from', args['created_from']) if args.get('created_from') else None
+    created_to = _parse_datetime('created_to', args['created_to']) if args.get('created_to') else None
+
+    limit = default_limit
+    if args.get('limit'):
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1 or (max_limit is not None and limit > max_limit):
+            raise ValueError(f"limit must be between 1 and {max_limit}")
+
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    return ProjectQuery(filters, fields, created_from, created_to, limit, after)
+
+
+def filter_conditions(query):
+    """
+    WHERE conditions of a ProjectQuery, newest first paging included
+
+    Values are compared in the columns' own types (council_id is a
+    VARCHAR), so the (column, timestamp, id) indexes stay usable.
+
+    :param query: ProjectQuery
+    :return: (list of SQL conditions, list of parameters)
+    """
+    conditions, params = [], []
+    for column in LISTING_FILTERS:
+        if column in query.filters:
+            conditions.append(f"{column} = %s")
+            params.append(str(query.filters[column]))
+    if query.created_from:
+        conditions.append("timestamp >= %s")
+        params.append(query.created_from)
+    if query.created_to:
+        conditions.append("timestamp < %s")
+        params.append(query.created_to)
+    if query.after:
+        # Written out rather than as a row comparison so it reads as a range on the index
+        timestamp, row_id = query.after
+        conditions.append("(timestamp < %s OR (timestamp = %s AND id < %s))")
+        params.extend((timestamp, timestamp, row_id))
+    return conditions, params
+
+
+def list_projects(connection, query):
+    """
+    One page of projects, newest first, with keyset pagination on (timestamp, id)
+
+    The page's ids are read from the filter's (column, timestamp, id) index
+    alone; the projected columns are then fetched by primary key for those
+    rows only, so wide projections do not slow down the seek.
+
+    :param connection: Database connection
+    :param query: ProjectQuery
+    :return: (list of row dictionaries with the projected fields, next page cursor or None)
+    """
+    conditions, params = filter_conditions(query)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"SELECT id, timestamp FROM project_details_test2 {where} ORDER BY timestamp DESC, id DESC LIMIT %s",
+            tuple(params) + (query.limit + 1,)
+        )
+        keys = cursor.fetchall()
+        page = keys[:query.limit]
+        if not page:
+            return [], None
+
+        cursor.execute(
+            f"SELECT id, {', '.join(query.fields)} FROM project_details_test2 "
+            f"WHERE id IN ({', '.join(['%s'] * len(page))})",
+            tuple(key['id'] for key in page)
+        )
+        rows = {row['id']: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    projects = []
+    for key in page:
+        row = rows.get(key['id'])
+        if row is not None:
+            projects.append({
+                field: row[field].isoformat(sep=' ') if isinstance(row[field], datetime) else row[field]
+                for field in query.fields
+            })
+    next_cursor = encode_cursor(page[-1]['timestamp'], page[-1]['id']) if len(keys) > query.limit else None
+    return projects, next_cursor
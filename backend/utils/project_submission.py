@@ -0,0 +1,185 @@
+from decimal import Decimal, InvalidOperation
+from collections import namedtuple
+from operator import attrgetter
+
+from backend.calculators.area_statement_calculator import ALL_LAYOUTS, calculate_area_statement_values
+from backend.calculators.setback_calculator import SETBACK_INPUT_COLUMNS
+from backend.utils.project_columns import PROJECT_DETAILS_COLUMNS, FSI_INPUT_COLUMNS, get_fsi_project_details
+
+# Field kinds
+TEXT = 'text'          # Stored as submitted
+DECIMAL = 'decimal'    # Decimal, None when blank
+ENUM = 'enum'          # One of choices
+DERIVED = 'derived'    # Supplied by the caller (reference data, uploads), never read from the form
+
+Field = namedtuple('Field', ['name', 'kind', 'required', 'choices'], defaults=(False, None))
+
+YES_NO = ('Yes', 'No')
+PROPOSAL_TYPES = ('Residential', 'Commercial', 'Industrial', 'Mixed', 'Educational', 'Group Housing', 'Institutional')
+
+# One entry per PROJECT_DETAILS_COLUMNS column, in the same order
+SUBMISSION_SCHEMA = (
+    Field('applicant_type', TEXT, required=True),
+    Field('applicant_name', TEXT, required=True),
+    Field('contact_no', TEXT, required=True),
+    Field('email', TEXT, required=True),
+    Field('project_name', TEXT, required=True),
+    Field('site_address', TEXT, required=True),
+    Field('dp_rp_part_plan', DERIVED),
+    Field('google_image', DERIVED),
+    Field('ulb_rp_special_authority', DERIVED, required=True),
+    Field('special_scheme', TEXT),
+    Field('regularization', ENUM, required=True, choices=('Authorized', 'Unauthorized')),
+    Field('type_of_development', TEXT, required=True),
+    Field('incentive_fsi', ENUM, required=True, choices=YES_NO),
+    Field('incentive_fsi_rating', TEXT),
+    Field('type_of_proposal', ENUM, required=True, choices=PROPOSAL_TYPES),
+    Field('hilly_site', ENUM, required=True, choices=YES_NO),
+    Field('flood_affected_area', ENUM, required=True, choices=('No', 'Red', 'Blue')),
+    Field('location', ENUM, required=True, choices=('Congested', 'Non-Congested')),
+    Field('electrical_line', ENUM, required=True, choices=YES_NO),
+    Field('electrical_line_voltage', TEXT),
+    Field('plot_layout_type', ENUM, required=True, choices=ALL_LAYOUTS),
+    Field('reservation_area_affected', ENUM, required=True, choices=YES_NO),
+    Field('reservation_area_sqm', DECIMAL),
+    Field('crz_status', ENUM, required=True, choices=YES_NO),
+    Field('zone', DERIVED, required=True),
+    Field('uses_id', TEXT, required=True),
+    Field('survey_type', TEXT, required=True),
+    Field('survey_number', TEXT, required=True),
+    Field('village_name', TEXT, required=True),
+    Field('area_plot_site_sqm', DECIMAL, required=True),
+    Field('area_plot_ownership_sqm', DECIMAL, required=True),
+    Field('area_plot_measurement_sqm', DECIMAL, required=True),
+    Field('pro_rata_fsi', DECIMAL),
+    Field('class_of_land', ENUM, required=True, choices=('Class 1', 'Class 2')),
+    Field('dp_rp_road_affected', ENUM, required=True, choices=YES_NO),
+    Field('dp_rp_road_area_sqm', DECIMAL),
+    # Kept as submitted: the FSI rules tell an unselected area ('') from an absent one (None)
+    Field('city_specific_area_id', TEXT),
+    Field('building_height', TEXT),
+    Field('redevelopment_proposal', ENUM, required=True, choices=YES_NO),
+    Field('plot_width', DECIMAL, required=True),
+    Field('tod', ENUM, required=True, choices=YES_NO),
+    Field('building_type_id', TEXT, required=True),
+    Field('building_subtype_id', TEXT, required=True),
+    Field('front_boundary_type', TEXT),
+    Field('road_details_front', TEXT),
+    Field('road_details_front_meters', DECIMAL),
+    Field('left_boundary_type', TEXT),
+    Field('road_details_left', TEXT),
+    Field('road_details_left_meters', DECIMAL),
+    Field('right_boundary_type', TEXT),
+    Field('road_details_right', TEXT),
+    Field('road_details_right_meters', DECIMAL),
+    Field('rear_boundary_type', TEXT),
+    Field('road_details_rear', TEXT),
+    Field('road_details_rear_meters', DECIMAL),
+    Field('ulb_type', DERIVED),
+    Field('council_id', DERIVED),
+    Field('taluka_id', DERIVED),
+    Field('crz_location', TEXT),
+    Field('zone_id', DERIVED),
+    Field('zone_landuser_id', DERIVED),
+    Field('uses_name', DERIVED),
+    Field('uses_zone_id', DERIVED),
+    Field('city_specific_area_name', DERIVED),
+    Field('city_specific_area_areaCode', DERIVED),
+    Field('city_specific_area_councilId', DERIVED),
+    Field('building_type_name', DERIVED),
+    Field('building_type_proposalId', DERIVED),
+    Field('building_subtype_name', DERIVED),
+    Field('building_subtype_bldgtypeID', DERIVED),
+)
+
+
+def _parse_decimal(value):
+    """
+    :return: Decimal, None for a blank value
+    :raises ValueError: If value is not a finite number
+    """
+    if value is None or value.strip() == '':
+        return None
+    try:
+        number = Decimal(value.strip())
+    except InvalidOperation:
+        raise ValueError
+    if not number.is_finite():
+        raise ValueError
+    return number
+
+
+class ProjectSubmission:
+    """
+    Typed, validated /submit form data, one attribute per PROJECT_DETAILS_COLUMNS column
+    """
+    __slots__ = PROJECT_DETAILS_COLUMNS
+
+    _params = attrgetter(*PROJECT_DETAILS_COLUMNS)
+
+    @classmethod
+    def parse(cls, form, derived):
+        """
+        Parse and validate the form in one pass over SUBMISSION_SCHEMA
+
+        :param form: Mapping of submitted form values
+        :param derived: Mapping with a value for every DERIVED field
+        :return: (submission, errors) tuple; every problem is listed in errors,
+            and submission is only usable when errors is empty
+        """
+        submission = cls()
+        missing = []
+        errors = []
+        get = form.get
+
+        for name, kind, required, choices in SUBMISSION_SCHEMA:
+            if kind == DERIVED:
+                value = derived.get(name)
+            else:
+                value = get(name)
+                if kind == DECIMAL:
+                    try:
+                        value = _parse_decimal(value)
+                    except ValueError:
+                        errors.append(f"{name} must be a number")
+                        value = None
+                        required = False
+                elif kind == ENUM and value and value not in choices:
+                    errors.append(f"{name} must be one of: {', '.join(choices)}")
+                    required = False
+
+            if required and (value is None or value == ''):
+                missing.append(name)
+            setattr(submission, name, value)
+
+        if missing:
+            errors.insert(0, f"Missing required fields: {', '.join(missing)}")
+        return submission, errors
+
+    def params(self):
+        """
+        :return: Values in PROJECT_DETAILS_COLUMNS order, as SQL parameters
+        """
+        return self._params(self)
+
+    def fsi_project_details(self):
+        """
+        :return: project_details dictionary for FSICalculator.calculate_fsi, built
+                 like the recompute job builds it from a stored row
+        """
+        return get_fsi_project_details({column: getattr(self, column) for column in FSI_INPUT_COLUMNS})
+
+    def setback_project_details(self):
+        """
+        :return: SetbackCalculator input, the submitted SETBACK_INPUT_COLUMNS values
+        """
+        return {column: getattr(self, column) for column in SETBACK_INPUT_COLUMNS}
+
+    def area_statement(self):
+        """
+        :return: calculate_area_statement result for this submission
+        """
+        return calculate_area_statement_values(
+            self.area_plot_ownership_sqm, self.area_plot_measurement_sqm, self.area_plot_site_sqm,
+            self.dp_rp_road_area_sqm, self.reservation_area_sqm, self.plot_layout_type
+        )
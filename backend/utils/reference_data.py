@@ -0,0 +1,190 @@
+import os
+import json
+import hashlib
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Reference data shipped with the form
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'static', 'data')
+
+# Serialized response body and its ETag
+CachedBody = namedtuple('CachedBody', ['body', 'etag'])
+
+COLLECTIONS = (
+    'ulb_rp_special_authority', 'zone', 'uses', 'city_specific_area', 'building_type', 'building_subtype'
+)
+
+# Collections served filtered by one field: collection name -> filter field
+FILTERED_COLLECTIONS = {
+    'uses': 'zoneId',
+    'city_specific_area': 'councilId',
+    'building_subtype': 'bldgtypeID',
+}
+
+# Form fields derived from the selected ids, never taken from the client
+DERIVED_FIELDS = (
+    'ulb_rp_special_authority', 'taluka_id', 'council_id', 'ulb_type',
+    'zone', 'zone_id', 'zone_landuser_id',
+    'uses_name', 'uses_zone_id',
+    'city_specific_area_name', 'city_specific_area_areaCode', 'city_specific_area_councilId',
+    'building_type_name', 'building_type_proposalId',
+    'building_subtype_name', 'building_subtype_bldgtypeID',
+)
+
+
+def _cached_body(collection, items):
+    body = json.dumps({collection: items}, separators=(',', ':')).encode('utf-8')
+    return CachedBody(body, hashlib.sha1(body).hexdigest())
+
+
+def _parse_id(value):
+    """
+    :return: Integer id, None for a blank value, or False if value is not an id
+    """
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return False
+
+
+class ReferenceData:
+    def __init__(self, folder=DATA_FOLDER):
+        """
+        In-memory registry of the form's reference data
+
+        Items are indexed by id, and child collections by their parent id.
+        Every filtered API response is serialized once, when the indexes are
+        built, so serving a request is a dictionary lookup.
+
+        :param folder: Folder holding <collection>.json files
+        """
+        self.folder = folder
+        self.collections = {}
+        self.by_id = {}
+        self._filtered = {}
+        self._empty = {}
+        self._ulb_by_name = {}
+        self._zone_by_name = {}
+
+    def load(self):
+        """
+        Read the JSON files and build the indexes
+
+        :return: self
+        """
+        for collection in COLLECTIONS:
+            with open(os.path.join(self.folder, f'{collection}.json'), encoding='utf-8') as data_file:
+                items = json.load(data_file)[collection]
+            self.collections[collection] = items
+            self.by_id[collection] = {item['id']: item for item in items}
+
+            field = FILTERED_COLLECTIONS.get(collection)
+            if field:
+                groups = {}
+                for item in items:
+                    groups.setdefault(item[field], []).append(item)
+                self._filtered[collection] = {
+                    value: _cached_body(collection, group) for value, group in groups.items()
+                }
+                self._empty[collection] = _cached_body(collection, [])
+            logger.info("Indexed %s %s", len(items), collection)
+
+        # Names are what the ulb and zone dropdowns submit as values; the first
+        # entry wins for the few duplicated taluka names, as in the form script
+        for ulb in reversed(self.collections['ulb_rp_special_authority']):
+            self._ulb_by_name[ulb['talukaName']] = ulb
+        for zone in self.collections['zone']:
+            self._zone_by_name[zone['name']] = zone
+        return self
+
+    def filtered(self, collection, value):
+        """
+        Serialized items of a collection whose filter field equals value
+
+        :param collection: Key of FILTERED_COLLECTIONS
+        :param value: Filter value (an integer id)
+        :return: CachedBody; an empty list when nothing matches
+        """
+        if collection not in self._filtered:
+            self.load()
+        return self._filtered[collection].get(value, self._empty[collection])
+
+    def _lookup(self, collection, field, value, errors):
+        item_id = _parse_id(value)
+        if item_id is None:
+            return None
+        item = self.by_id[collection].get(item_id) if item_id is not False else None
+        if item is None:
+            errors.append(f"Unknown {field}: {value}")
+        return item
+
+    def resolve_selection(self, form):
+        """
+        Validate the submitted ids and derive every dependent form field
+
+        The authority is identified by taluka_id, or by its name when no id is
+        sent, and the zone by zone_id or its name. Uses, city specific area,
+        building type and subtype are identified by their ids, and must
+        belong to the selected zone, authority and building type.
+
+        :param form: Mapping of submitted form values
+        :return: (fields, errors) tuple; fields maps every DERIVED_FIELDS name
+            to its value (None when nothing was selected)
+        """
+        if not self.by_id:
+            self.load()
+
+        errors = []
+        fields = dict.fromkeys(DERIVED_FIELDS)
+
+        ulb = self._lookup('ulb_rp_special_authority', 'taluka_id', form.get('taluka_id'), errors)
+        if ulb is None and _parse_id(form.get('taluka_id')) is None and form.get('ulb_rp_special_authority'):
+            ulb = self._ulb_by_name.get(form.get('ulb_rp_special_authority'))
+            if ulb is None:
+                errors.append(f"Unknown ulb_rp_special_authority: {form.get('ulb_rp_special_authority')}")
+        if ulb is not None:
+            fields.update(
+                ulb_rp_special_authority=ulb['talukaName'], taluka_id=ulb['id'],
+                council_id=ulb['councilId'], ulb_type=ulb['councilName']
+            )
+
+        zone = self._lookup('zone', 'zone_id', form.get('zone_id'), errors)
+        if zone is None and _parse_id(form.get('zone_id')) is None and form.get('zone'):
+            zone = self._zone_by_name.get(form.get('zone'))
+            if zone is None:
+                errors.append(f"Unknown zone: {form.get('zone')}")
+        if zone is not None:
+            fields.update(zone=zone['name'], zone_id=zone['id'], zone_landuser_id=zone['landuserId'])
+
+        uses = self._lookup('uses', 'uses_id', form.get('uses_id'), errors)
+        if uses is not None:
+            if zone is not None and uses['zoneId'] != zone['id']:
+                errors.append(f"uses_id {uses['id']} does not belong to zone {zone['name']}")
+            fields.update(uses_name=uses['name'], uses_zone_id=uses['zoneId'])
+
+        area = self._lookup('city_specific_area', 'city_specific_area_id', form.get('city_specific_area_id'), errors)
+        if area is not None:
+            if ulb is not None and area['councilId'] != ulb['councilId']:
+                errors.append(f"city_specific_area_id {area['id']} does not belong to {ulb['talukaName']}")
+            fields.update(
+                city_specific_area_name=area['name'], city_specific_area_areaCode=area['areaCode'],
+                city_specific_area_councilId=area['councilId']
+            )
+
+        building_type = self._lookup('building_type', 'building_type_id', form.get('building_type_id'), errors)
+        if building_type is not None:
+            fields.update(building_type_name=building_type['name'], building_type_proposalId=building_type['proposalId'])
+
+        subtype = self._lookup('building_subtype', 'building_subtype_id', form.get('building_subtype_id'), errors)
+        if subtype is not None:
+            if building_type is not None and subtype['bldgtypeID'] != building_type['id']:
+                errors.append(
+                    f"building_subtype_id {subtype['id']} does not belong to building type {building_type['name']}"
+                )
+            fields.update(building_subtype_name=subtype['name'], building_subtype_bldgtypeID=subtype['bldgtypeID'])
+
+        return fields, errors
@@ -1,38 +1,93 @@
+import os
+import logging
 import mysql.connector
+from backend.utils.db import get_connection
+from backend.utils.cache import TTLCache, MISSING
 
-# Function to connect to the database
-def connect_to_database():
-    return mysql.connector.connect(
-        host="127.0.0.1",
-        user="root",
-        password="MySQL@123",
-        database="citiwise_test"
-    )
+logger = logging.getLogger(__name__)
+
+# fsi_Group by strTalukaNm; tblmaster_council changes a few times a year
+fsi_group_cache = TTLCache(
+    maxsize=int(os.getenv('COUNCIL_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('COUNCIL_CACHE_TTL', 3600))
+)
+
+# Function to load every council's fsi_Group into the cache
+def preload_fsi_groups():
+    """
+    Preload the fsi_Group of every council from tblmaster_council
+
+    Replaces whatever was cached, so councils renamed or removed since the
+    last load are dropped too; the gunicorn SIGHUP reload calls this.
+
+    :return: Number of councils cached, or None if the table could not be read
+    """
+    connection = None
+    cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT strTalukaNm, strBasicFSIGroup AS fsi_Group FROM tblmaster_council")
+        rows = cursor.fetchall()
+
+        # The first row per name wins, as it would for the single-row query below
+        fsi_groups = {}
+        for row in rows:
+            fsi_groups.setdefault(row['strTalukaNm'], row['fsi_Group'])
+        fsi_group_cache.invalidate()
+        fsi_group_cache.update(fsi_groups)
+        logger.info("Preloaded fsi_Group for %d councils", len(fsi_groups))
+        return len(fsi_groups)
+
+    except mysql.connector.Error as e:
+        logger.warning("Could not preload council fsi_Group cache: %s", e)
+        return None
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+# Function to drop cached fsi_Group values after tblmaster_council changes
+def invalidate_fsi_groups(ulb_rp_special_authority=None):
+    fsi_group_cache.invalidate(ulb_rp_special_authority)
 
 # Function to fetch  fsi_Group from the database
 def fetch_required_ids(ulb_rp_special_authority):
+    fsi_group = fsi_group_cache.get(ulb_rp_special_authority)
+    if fsi_group is not MISSING:
+        return fsi_group
+
+    connection = None
+    cursor = None
     try:
-        connection = connect_to_database()
+        connection = get_connection()
         cursor = connection.cursor(dictionary=True)
-        
+
         # Query fsi_Group
         fsigroup_query = """
         SELECT strBasicFSIGroup AS fsi_Group
         FROM tblmaster_council
         WHERE strTalukaNm = %s
         """
-        
+
         cursor.execute(fsigroup_query, (ulb_rp_special_authority,))
         fsigroup_result = cursor.fetchone()
 
 
-        # Return fsi_group value directly
-        return fsigroup_result['fsi_Group'] if fsigroup_result else None
+        # Return fsi_group value directly; unknown authorities are not cached, so
+        # a council added to tblmaster_council resolves on its first submission
+        if not fsigroup_result:
+            return None
+        fsi_group = fsigroup_result['fsi_Group']
+        fsi_group_cache.set(ulb_rp_special_authority, fsi_group)
+        return fsi_group
 
     except mysql.connector.Error as e:
-        print(f"Error fetching required IDs: {e}")
+        logger.error("Error fetching required IDs: %s", e)
         return None
     finally:
-        if connection.is_connected():
+        if cursor is not None:
             cursor.close()
+        if connection and connection.is_connected():
             connection.close()
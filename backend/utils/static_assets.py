@@ -0,0 +1,84 @@
+import os
+import json
+import logging
+import mimetypes
+
+from flask import request, send_from_directory, url_for, abort
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+STATIC_FOLDER = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'static'))
+DIST_FOLDER = os.path.join(STATIC_FOLDER, 'dist')
+MANIFEST_FILE = 'manifest.json'
+
+# Precompressed variants in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def load_manifest(dist_folder=DIST_FOLDER):
+    """
+    Read the manifest written by backend.jobs.build_static_assets
+
+    :return: Mapping of logical asset paths to fingerprinted paths; empty if
+        the assets have not been built
+    """
+    try:
+        with open(os.path.join(dist_folder, MANIFEST_FILE)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        logger.info("No static asset manifest found; serving unbuilt assets")
+        return {}
+
+
+def register_static_assets(app, dist_folder=DIST_FOLDER):
+    """
+    Serve built assets precompressed with immutable caching, and let templates
+    link to them with asset_url()
+
+    Templates get asset_url(path), which resolves a logical path such as
+    'scripts.js' to its fingerprinted URL, or to the plain static URL when the
+    assets have not been built, and asset_urls, the full mapping for scripts.
+
+    :param app: Flask application
+    :param dist_folder: Output folder of the build step
+    """
+    manifest = load_manifest(dist_folder)
+
+    def asset_url(path):
+        if path in manifest:
+            return url_for('static_asset', filename=manifest[path])
+        return url_for('static', filename=path)
+
+    @app.context_processor
+    def inject_asset_urls():
+        return {
+            'asset_url': asset_url,
+            'asset_urls': {path: url_for('static_asset', filename=built) for path, built in manifest.items()},
+        }
+
+    @app.route('/static/dist/<path:filename>')
+    def static_asset(filename):
+        if filename == MANIFEST_FILE:
+            abort(404)
+
+        response = None
+        for encoding, suffix in ENCODINGS:
+            variant = safe_join(dist_folder, filename + suffix)
+            if request.accept_encodings[encoding] and variant and os.path.isfile(variant):
+                # Typed after the uncompressed file, with the encoding declared separately
+                response = send_from_directory(dist_folder, filename + suffix, mimetype=mimetypes.guess_type(filename)[0])
+                response.content_encoding = encoding
+                break
+        if response is None:
+            response = send_from_directory(dist_folder, filename)
+
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    return manifest
+
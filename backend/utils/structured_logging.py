@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import queue
+import uuid
+import zlib
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from backend.utils.metrics import Counter
+
+# Logger for verbose payload records (form data, calculator inputs and
+# results); only a sample of requests log them
+PAYLOAD_LOGGER = 'citiwise.payload'
+
+# Correlation id of the request or job being handled in this context
+correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+# LogRecord attributes that are not user-supplied extra fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'correlation_id', 'taskName'
+}
+
+DROPPED_RECORDS = Counter(
+    'citiwise_log_records_dropped_total', "Log records dropped because the logging queue was full"
+)
+
+
+def new_correlation_id(value=None):
+    """
+    Set the correlation id of the current context
+
+    :param value: Id to use, such as an incoming X-Request-ID; a random id when empty
+    :return: The id that was set
+    """
+    value = value or uuid.uuid4().hex
+    correlation_id.set(value)
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line
+
+    Extra fields passed with extra={...} are included as top-level keys.
+    Values that are not JSON serializable are written with str().
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'correlation_id', None):
+            entry['correlation_id'] = record.correlation_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class PayloadSampler(logging.Filter):
+    def __init__(self, rate):
+        """
+        Keep payload records for a fraction of the correlation ids
+
+        The decision is made per correlation id, so a sampled request logs
+        all of its payloads and an unsampled one logs none.
+
+        :param rate: Fraction of requests to keep, between 0 and 1
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1:
+            return True
+        if self.rate <= 0:
+            return False
+        current = correlation_id.get()
+        if current is None:
+            return random.random() < self.rate
+        return zlib.crc32(current.encode('utf-8')) < self.rate * 0x100000000
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hand records to a background thread that formats and writes them
+
+    Records are queued as they are: message arguments are only formatted on
+    the listener thread, so callers pay for a queue put. When the queue is
+    full the record is dropped rather than blocking the request. The
+    correlation id is captured here, on the logging thread.
+
+    The listener thread does not survive fork(), so a forked process starts
+    its own listener on its first record.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.handlers = handlers
+        self._pid = None
+        self._lock = threading.Lock()
+        self.listener = None
+        self._start_listener()
+
+    def _start_listener(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Records queued by the parent before fork() are the parent's to write
+            self.queue = queue.Queue(self.queue.maxsize)
+            self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        record.correlation_id = correlation_id.get()
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_RECORDS.inc()
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def configure_logging(level='INFO', filename=None, payload_sample_rate=0.01, queue_size=10000):
+    """
+    Log JSON lines through a background thread
+
+    Replaces the root logger's handlers with an AsyncQueueHandler writing to
+    filename, or to stderr without one. Payload records logged on
+    PAYLOAD_LOGGER are kept for payload_sample_rate of the requests.
+
+    :param level: Root log level name or number
+    :param filename: Log file, or None for stderr
+    :param payload_sample_rate: Fraction of requests whose payloads are logged
+    :param queue_size: Records buffered before new ones are dropped
+    :return: The AsyncQueueHandler
+    """
+    output = logging.FileHandler(filename) if filename else logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter())
+    handler = AsyncQueueHandler([output], maxsize=queue_size)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER)
+    for existing in list(payload_logger.filters):
+        payload_logger.removeFilter(existing)
+    payload_logger.addFilter(PayloadSampler(payload_sample_rate))
+
+    # Write whatever is still queued when the process exits
+    atexit.register(handler.close)
+    return handler
@@ -0,0 +1,132 @@
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import magic
+from flask import Request, current_app
+
+logger = logging.getLogger(__name__)
+
+# Accepted upload types, detected from the file contents, and their stored extension
+ALLOWED_UPLOAD_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'application/pdf': '.pdf',
+}
+
+# Leading bytes kept for file type detection
+MAGIC_HEADER_SIZE = 2048
+CHUNK_SIZE = 1024 * 1024
+
+# Mode of a file created by open() under the process umask. os.umask() can only
+# be read by setting it, so this is done once at import rather than per upload
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+STORED_FILE_MODE = 0o666 & ~_UMASK
+
+
+class HashingTemporaryFile:
+    """
+    Temporary file that hashes everything written to it
+
+    Created in the upload folder so that storing the finished upload is a
+    link or rename on the same filesystem. The file is deleted when closed.
+    """
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=folder, prefix='.upload-')
+        self._hash = hashlib.sha256()
+        self.header = b''
+        self.size = 0
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def write(self, data):
+        self._hash.update(data)
+        if len(self.header) < MAGIC_HEADER_SIZE:
+            self.header += bytes(data[:MAGIC_HEADER_SIZE - len(self.header)])
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+
+class UploadRequest(Request):
+    """
+    Request that streams uploaded files straight into the upload folder
+
+    The multipart parser writes each file in chunks to a HashingTemporaryFile,
+    so uploads are never held in memory and their hash is ready once parsing
+    finishes. The temporary files are removed when the request is closed.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingTemporaryFile(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
+
+
+def _content_path(folder, digest, extension):
+    # Two-character shards keep directory sizes manageable
+    return os.path.join(folder, digest[:2], f"{digest}{extension}")
+
+
+def store_upload(file, folder):
+    """
+    Store an uploaded file under the SHA-256 of its contents
+
+    The type is detected from the file's leading bytes, not from the
+    client-supplied content type. Identical files map to the same path, so
+    a repeated upload references the stored copy instead of writing another.
+
+    :param file: werkzeug FileStorage
+    :param folder: Upload folder
+    :return: (path, mime type) tuple; path is None if the type is not allowed
+    """
+    stream = file.stream
+    if not isinstance(stream, HashingTemporaryFile):
+        # Parsed by a plain Request: copy into a hashing file chunk by chunk
+        copy = HashingTemporaryFile(folder)
+        stream.seek(0)
+        shutil.copyfileobj(stream, copy, CHUNK_SIZE)
+        stream = copy
+
+    try:
+        mime_type = magic.from_buffer(stream.header, mime=True)
+        extension = ALLOWED_UPLOAD_TYPES.get(mime_type)
+        if extension is None:
+            return None, mime_type
+
+        path = _content_path(folder, stream.hexdigest(), extension)
+        if os.path.exists(path):
+            logger.info("Upload %s is a duplicate of %s", file.filename, path)
+            return path, mime_type
+
+        stream.flush()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Temporary files are created 0600; stored files get the same mode as copies
+        os.chmod(stream.name, STORED_FILE_MODE)
+        try:
+            os.link(stream.name, path)
+        except FileExistsError:
+            # Stored by a concurrent request in the meantime
+            pass
+        except OSError:
+            # No hard links on this filesystem: copy, then rename into place
+            partial_path = f"{path}.{os.getpid()}.partial"
+            shutil.copyfile(stream.name, partial_path)
+            os.replace(partial_path, path)
+        logger.info("Stored upload %s (%d bytes) as %s", file.filename, stream.size, path)
+        return path, mime_type
+    finally:
+        if stream is not file.stream:
+            stream.close()
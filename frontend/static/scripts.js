@@ -69,7 +69,9 @@ function showFeedback(input, isValid, message) {
 // Load JSON data
 async function loadJSONData(filename) {
   try {
-    const response = await fetch(`static/data/${filename}`);
+    // Built assets are fingerprinted; ASSET_URLS is set by the page template
+    const builtUrl = window.ASSET_URLS && window.ASSET_URLS[`data/${filename}`];
+    const response = await fetch(builtUrl || `static/data/${filename}`);
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
@@ -80,6 +82,20 @@ async function loadJSONData(filename) {
   }
 }
 
+// Load one filtered slice of reference data from the API
+async function loadReferenceData(path, params) {
+  try {
+    const response = await fetch(`api/${path}?${new URLSearchParams(params)}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error(`Error loading ${path}:`, error);
+    return null;
+  }
+}
+
 // Populate dropdowns
 function populateDropdown(
   selectElement,
@@ -135,31 +151,15 @@ function toggleElement(elementId, show) {
 async function initializeForm() {
   try {
     console.log('Initializing form...');
-    // Load all JSON data
-    const [
-      ulbData,
-      buildingTypeData,
-      buildingSubtypeData,
-      zoneData,
-      usesData,
-      citySpecificAreaData,
-    ] = await Promise.all([
+    // Load the JSON data for the top-level dropdowns; uses, city specific
+    // areas and building subtypes are fetched per selection from the API
+    const [ulbData, buildingTypeData, zoneData] = await Promise.all([
       loadJSONData('ulb_rp_special_authority.json'),
       loadJSONData('building_type.json'),
-      loadJSONData('building_subtype.json'),
       loadJSONData('zone.json'),
-      loadJSONData('uses.json'),
-      loadJSONData('city_specific_area.json'),
     ]);
 
-    if (
-      !ulbData ||
-      !buildingTypeData ||
-      !buildingSubtypeData ||
-      !zoneData ||
-      !usesData ||
-      !citySpecificAreaData
-    ) {
+    if (!ulbData || !buildingTypeData || !zoneData) {
       throw new Error('Failed to load one or more required data files');
     }
 
@@ -520,7 +520,7 @@ async function initializeForm() {
     // Zone and Uses
     const zoneSelect = document.getElementById('zone');
     if (zoneSelect) {
-      zoneSelect.addEventListener('change', function () {
+      zoneSelect.addEventListener('change', async function () {
         const usesSelect = document.getElementById('uses');
 
         // Get the selected zone ID from the selected option's data attribute
@@ -533,13 +533,16 @@ async function initializeForm() {
           return;
         }
 
-        // Filter the uses based on the selected zone ID
-        const filteredUses = usesData.uses.filter(
-          (use) => use.zoneId === parseInt(selectedZoneId, 10) // Ensure proper matching of zoneId
-        );
+        // Fetch the uses of the selected zone
+        const usesData = await loadReferenceData('uses', { zone_id: selectedZoneId });
+        if (!usesData) {
+          usesSelect.innerHTML = '<option value="">Failed to load uses</option>';
+          usesSelect.disabled = true;
+          return;
+        }
 
         // Populate the uses dropdown with the filtered uses data
-        populateDropdown(usesSelect, filteredUses, 'id', 'name');
+        populateDropdown(usesSelect, usesData.uses, 'id', 'name');
 
         // Enable the uses dropdown
         usesSelect.disabled = false;
@@ -556,7 +559,7 @@ async function initializeForm() {
 
     const ulbDropdown = document.getElementById('ulb_rp_special_authority');
     if (ulbDropdown) {
-      ulbDropdown.addEventListener('change', function () {
+      ulbDropdown.addEventListener('change', async function () {
         const selectedOption = this.options[this.selectedIndex];
         const selectedTalukaName = selectedOption.textContent;
         const selectedUlb = ulbData.ulb_rp_special_authority.find(
@@ -574,9 +577,10 @@ async function initializeForm() {
           }
 
           // Update city-specific areas dropdown
-          const filteredAreas = citySpecificAreaData.city_specific_area.filter(
-            (area) => area.councilId === selectedUlb.councilId
-          );
+          const citySpecificAreaData = await loadReferenceData('city-specific-areas', {
+            council_id: selectedUlb.councilId,
+          });
+          const filteredAreas = citySpecificAreaData ? citySpecificAreaData.city_specific_area : [];
           if (filteredAreas.length > 0) {
             // Clear existing options
             citySpecificAreaSelect.innerHTML = '<option value="">Select City Specific Area</option>';
@@ -608,7 +612,7 @@ async function initializeForm() {
     // Building Type and Building Subtype
     const buildingTypeSelect = document.getElementById('building_type');
     if (buildingTypeSelect) {
-      buildingTypeSelect.addEventListener('change', function () {
+      buildingTypeSelect.addEventListener('change', async function () {
         const buildingSubtypeSelect = document.getElementById(
           'building_subtype'
         );
@@ -619,14 +623,18 @@ async function initializeForm() {
           buildingSubtypeSelect.disabled = true;
           return;
         }
-        const filteredBuildingSubtypes =
-          buildingSubtypeData.building_subtype.filter(
-            (subtype) =>
-              subtype.bldgtypeID === parseInt(selectedBuildingType, 10)
-          );
+        const buildingSubtypeData = await loadReferenceData('building-subtypes', {
+          bldgtype_id: selectedBuildingType,
+        });
+        if (!buildingSubtypeData) {
+          buildingSubtypeSelect.innerHTML =
+            '<option value="">Failed to load building subtypes</option>';
+          buildingSubtypeSelect.disabled = true;
+          return;
+        }
         populateDropdown(
           buildingSubtypeSelect,
-          filteredBuildingSubtypes,
+          buildingSubtypeData.building_subtype,
           'id',
           'name'
         );
@@ -747,85 +755,20 @@ async function initializeForm() {
         // Prepare FormData
         const formData = new FormData(this);
 
-        // Extract taluka_id and council_id from selected dropdown option
+        // Only the ids of the selected authority, zone, uses, area and building
+        // type are sent; the server derives every dependent field from them
         const selectedOption = ulbDropdown.options[ulbDropdown.selectedIndex];
         const talukaId = selectedOption.getAttribute('data-taluka-id');
-        const councilId = selectedOption.getAttribute('data-council-id');
-
-        // Log these values for debugging
-        console.log('Selected talukaId:', talukaId);
-        console.log('Selected councilId:', councilId);
-
-        // Append taluka_id and council_id to FormData
         formData.append('taluka_id', talukaId || '');
-        formData.append('council_id', councilId || '');
 
-        // Capture zone_id, zone_name, and zone_landuser_id from selected zone
         const zoneSelect = document.getElementById('zone');
         const selectedZone = zoneSelect.options[zoneSelect.selectedIndex];
-        const zoneId = selectedZone.getAttribute('data-zone-id'); // zone_id
-        const zoneName = selectedZone.value; // zone (name)
-        const zoneLanduserId = selectedZone.getAttribute('data-landuser-id'); // zone_landuser_id
+        formData.append('zone_id', selectedZone.getAttribute('data-zone-id') || '');
 
-        // Append zone_id, zone_name, and zone_landuser_id to FormData
-        formData.append('zone_id', zoneId || ''); // Capture zone_id from data attribute
-        formData.append('zone', zoneName || '');  // This should store the zone name in the 'zone' column
-        formData.append('zone_landuser_id', zoneLanduserId || ''); // Capture the correct landuser_id
-
-        // Ensure ulb_type is included in FormData
-        const ulbTypeInput = document.getElementById('ulb_type');
-        const ulbTypeValue = ulbTypeInput ? ulbTypeInput.value : '';
-        formData.append('ulb_type', ulbTypeValue);
-
-        // **Newly Added Section: Capture Uses Details**
-        const usesSelect = document.getElementById('uses');
-        const selectedUsesOption = usesSelect.options[usesSelect.selectedIndex];
-        const usesId = selectedUsesOption.value;
-        const usesName = selectedUsesOption.textContent;
-        const usesZoneId = zoneId; // Same as zone_id
-
-        // Append uses details to FormData
-        formData.append('uses_id', usesId || '');
-        formData.append('uses_name', usesName || '');
-        formData.append('uses_zone_id', usesZoneId || '');
-
-        // **Newly Added Section: Capture City Specific Area Details**
-        const citySpecificAreaSelect = document.getElementById('city_specific_area');
-        const selectedCityAreaOption = citySpecificAreaSelect.options[citySpecificAreaSelect.selectedIndex];
-        const citySpecificAreaId = selectedCityAreaOption.value;
-        const citySpecificAreaName = selectedCityAreaOption.textContent;
-        const citySpecificAreaAreaCode = selectedCityAreaOption.getAttribute('data-area-code');
-        const citySpecificAreaCouncilId = selectedCityAreaOption.getAttribute('data-council-id');
-
-        // Append city_specific_area details to FormData
-        formData.append('city_specific_area_id', citySpecificAreaId || '');
-        formData.append('city_specific_area_name', citySpecificAreaName || '');
-        formData.append('city_specific_area_areaCode', citySpecificAreaAreaCode || '');
-        formData.append('city_specific_area_councilId', citySpecificAreaCouncilId || '');
-
-        // **Newly Added Section: Capture Building Type Details**
-        const buildingTypeSelectElement = document.getElementById('building_type');
-        const selectedBuildingTypeOption = buildingTypeSelectElement.options[buildingTypeSelectElement.selectedIndex];
-        const buildingTypeId = selectedBuildingTypeOption.value;
-        const buildingTypeName = selectedBuildingTypeOption.getAttribute('data-name');
-        const buildingTypeProposalId = selectedBuildingTypeOption.getAttribute('data-proposal-id');
-
-        // Append building_type details to FormData
-        formData.append('building_type_id', buildingTypeId || '');
-        formData.append('building_type_name', buildingTypeName || '');
-        formData.append('building_type_proposalId', buildingTypeProposalId || '');
-
-        // **Newly Added Section: Capture Building Subtype Details**
-        const buildingSubtypeSelectElement = document.getElementById('building_subtype');
-        const selectedBuildingSubtypeOption = buildingSubtypeSelectElement.options[buildingSubtypeSelectElement.selectedIndex];
-        const buildingSubtypeId = selectedBuildingSubtypeOption.value;
-        const buildingSubtypeName = selectedBuildingSubtypeOption.getAttribute('data-name');
-        const buildingSubtypeBldgtypeID = selectedBuildingSubtypeOption.getAttribute('data-bldgtypeID');
-
-        // Append building_subtype details to FormData
-        formData.append('building_subtype_id', buildingSubtypeId || '');
-        formData.append('building_subtype_name', buildingSubtypeName || '');
-        formData.append('building_subtype_bldgtypeID', buildingSubtypeBldgtypeID || '');
+        formData.append('uses_id', document.getElementById('uses').value || '');
+        formData.append('city_specific_area_id', document.getElementById('city_specific_area').value || '');
+        formData.append('building_type_id', document.getElementById('building_type').value || '');
+        formData.append('building_subtype_id', document.getElementById('building_subtype').value || '');
 
         // Log the entire form data for verification
         const formEntries = {};
@@ -0,0 +1,70 @@
+"""
+Gunicorn configuration for production
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app), which then loads the
+DCR rule tables, council fsi_Groups and reference data and freezes them out
+of the garbage collector before forking, so every worker starts warm and
+shares that memory copy-on-write. Each worker fills its own connection pool
+before it accepts requests; nothing database-related crosses the fork.
+
+    kill -HUP <master pid>     re-read the rule tables, council fsi_Groups and
+                               reference data, then replace the workers gracefully
+    kill -USR2 <master pid>    start a new master on new code next to the old
+                               one; kill -TERM the old master once it is up
+"""
+import gc
+import os
+import multiprocessing
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+wsgi_app = 'backend.app:app'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# The pools, caches and calculation queue are thread-safe and per process
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+# Time a stopping worker gets to finish its requests and queued calculations
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+pidfile = os.getenv('GUNICORN_PIDFILE') or None
+
+
+def _prepare_fork(server, reload=False):
+    from backend.app import preload_shared_data
+    from backend.utils.db import db_pool
+
+    if not preload_shared_data(reload=reload):
+        server.log.warning("Rule tables not preloaded; workers will load them on their own")
+    # Workers open their own connections; the master keeps none idle
+    db_pool.close_all()
+    # Objects frozen here are never scanned by a worker's collector, which
+    # would otherwise write to their pages and un-share them
+    gc.freeze()
+
+
+def when_ready(server):
+    _prepare_fork(server)
+
+
+def on_reload(server):
+    _prepare_fork(server, reload=True)
+
+
+def post_worker_init(worker):
+    from backend.app import warm_up
+
+    if not warm_up():
+        worker.log.warning("Worker %s started cold; /health/ready reports 503 until it warms up", worker.pid)
+
+
+def worker_exit(server, worker):
+    from backend.app import calculation_queue
+
+    # Let async submissions already accepted by this worker finish
+    calculation_queue.shutdown(wait=True)
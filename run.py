@@ -1,4 +1,8 @@
-from backend.app import app
+import os
 
+from backend.app import app, warm_up
+
+# Development server; in production run gunicorn -c gunicorn.conf.py
 if __name__ == "__main__":
-    app.run(debug=True)
+    warm_up()
+    app.run(debug=os.getenv('DEBUG', 'false').lower() == 'true')
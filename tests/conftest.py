@@ -0,0 +1,45 @@
+"""
+Shared fixtures: the SQLite stand-in of backend.benchmarks and synthetic plots
+
+Run from the repository root with python -m pytest.
+"""
+import pytest
+
+from backend.benchmarks.fixtures import create_database, synthetic_forms
+from backend.benchmarks.run import use_database
+from backend.utils.db import db_pool
+from backend.utils.reference_data import ReferenceData
+from backend.utils.project_submission import ProjectSubmission
+
+PLOTS = 300
+
+
+@pytest.fixture(scope='session')
+def reference_data():
+    return ReferenceData().load()
+
+
+@pytest.fixture(scope='session')
+def database(tmp_path_factory, reference_data):
+    """
+    Path of an SQLite database with the rule tables, the shared pool pointed at it
+    """
+    path = str(tmp_path_factory.mktemp('citiwise') / 'citiwise.sqlite3')
+    create_database(path, reference_data)
+    use_database(path)
+    yield path
+    db_pool.close_all()
+
+
+@pytest.fixture(scope='session')
+def submissions(database, reference_data):
+    """
+    ProjectSubmission for every synthetic plot, parsed as /submit parses the form
+    """
+    parsed = []
+    for form in synthetic_forms(reference_data, PLOTS, seed=0):
+        derived, errors = reference_data.resolve_selection(form)
+        submission, form_errors = ProjectSubmission.parse(form, derived)
+        assert not errors and not form_errors, errors + form_errors
+        parsed.append(submission)
+    return parsed
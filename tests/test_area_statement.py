@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.calculators.area_statement_calculator import (
+    ALL_LAYOUTS, calculate_area_statement_values, calculate_area_statement_columns, area_statement_records
+)
+
+INPUT_COLUMNS = (
+    'area_plot_ownership_sqm', 'area_plot_measurement_sqm', 'area_plot_site_sqm', 'dp_rp_road_area_sqm',
+    'reservation_area_sqm', 'plot_layout_type'
+)
+
+# Plots on and around the 20000 sqm amenity space and 4000 sqm open space
+# thresholds, with blank, missing and non-numeric values
+EDGE_PLOTS = [
+    (areas + deductions + (layout,))
+    for layout in ALL_LAYOUTS + ('', None, 'Unknown layout')
+    for areas, deductions in [
+        ((20000, 20000, 20000), (0, 0)),
+        ((20001, 20500, 20002), (1, 0)),
+        ((19999.5, 25000, 30000), (0, 0)),
+        ((21000, 21000, 21000), (500, 500)),
+        ((4000, 4000, 4000), (0, 0)),
+        ((4000.01, 5000, 4500), (0, 0)),
+        ((4210.6, 4210.6, 4210.6), (0, 0)),
+        ((1500, '', None), ('', None)),
+        (('abc', 800, 900), ('x', 10)),
+        ((float('nan'), 5000, 6000), (0, 0)),
+        ((5000, float('nan'), 6000), (0, 0)),
+        ((0, 0, 0), (0, 0)),
+    ]
+]
+
+
+def _same(first, second):
+    assert first.keys() == second.keys()
+    for key, value in first.items():
+        other = second[key]
+        if isinstance(value, float) and math.isnan(value):
+            assert isinstance(other, float) and math.isnan(other), key
+        else:
+            assert value == other, key
+
+
+def _columns(plots):
+    return {column: [plot[position] for plot in plots] for position, column in enumerate(INPUT_COLUMNS)}
+
+
+@pytest.mark.parametrize('plot', EDGE_PLOTS)
+def test_columns_match_scalar(plot):
+    records = area_statement_records(calculate_area_statement_columns(_columns([plot])))
+    _same(records[0], calculate_area_statement_values(*plot))
+
+
+def test_columns_match_scalar_for_submissions(submissions):
+    plots = [tuple(getattr(submission, column) for column in INPUT_COLUMNS) for submission in submissions]
+    records = area_statement_records(calculate_area_statement_columns(_columns(plots)))
+    assert len(records) == len(plots)
+    for record, plot in zip(records, plots):
+        _same(record, calculate_area_statement_values(*plot))
+
+
+def test_numeric_arrays_match_scalar():
+    # Float64 columns skip the per-value conversion
+    plots = [plot for plot in EDGE_PLOTS if all(isinstance(value, (int, float)) for value in plot[:5])]
+    columns = {column: np.array(values, dtype=np.float64) for column, values in _columns(plots).items()
+               if column != 'plot_layout_type'}
+    columns['plot_layout_type'] = [plot[5] for plot in plots]
+    for record, plot in zip(area_statement_records(calculate_area_statement_columns(columns)), plots):
+        _same(record, calculate_area_statement_values(*plot))
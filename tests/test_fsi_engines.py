@@ -0,0 +1,52 @@
+import pytest
+
+from backend.utils.db import db_pool
+from backend.calculators.fsi_calculator import FSICalculator
+from backend.calculators.fsi_result_cache import FSIResultCache
+
+
+@pytest.fixture(scope='module')
+def project_details(submissions):
+    return [submission.fsi_project_details() for submission in submissions]
+
+
+@pytest.fixture(scope='module')
+def expected(project_details):
+    # The sql engine queries the rule tables per plot; every other engine must agree with it
+    calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine='sql')
+    return [calculator.calculate_fsi(details) for details in project_details]
+
+
+def test_plots_match_rules(expected):
+    matched = [result for result in expected if not result.get('error')]
+    assert len(matched) > len(expected) // 2
+
+
+def test_memory_engine_matches_sql(project_details, expected):
+    calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine='memory')
+    assert [calculator.calculate_fsi(details) for details in project_details] == expected
+
+
+def test_typed_ranges_match_sql(project_details, expected):
+    calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine='sql', typed_ranges=True)
+    assert [calculator.calculate_fsi(details) for details in project_details] == expected
+
+
+@pytest.mark.parametrize('engine', ['sql', 'memory'])
+def test_batch_matches_sql(engine, project_details, expected):
+    calculator = FSICalculator(db_pool.db_config, pool=db_pool, engine=engine)
+    assert calculator.calculate_fsi_batch(project_details) == expected
+
+
+def test_batch_streams_in_chunks(project_details, expected):
+    evaluator = FSICalculator(db_pool.db_config, pool=db_pool, engine='memory').batch_evaluator()
+    evaluator.chunk_size = 7
+    assert list(evaluator.iter_results(project_details)) == expected
+
+
+def test_cache_matches_sql(project_details, expected):
+    cache = FSIResultCache(FSICalculator(db_pool.db_config, pool=db_pool, engine='sql'))
+    # The second pass is answered from the cache
+    for _ in range(2):
+        assert [cache.calculate_fsi(details) for details in project_details] == expected
+    assert cache.stats()['hits'] >= len(project_details)
@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from backend.utils.db import db_pool
+from backend.utils.project_ids import ProjectIdAllocator, format_project_id
+
+
+class Today:
+    def __init__(self, day):
+        self.day = day
+
+    def __call__(self):
+        return self.day
+
+
+@pytest.fixture
+def sequence(database):
+    connection = db_pool.acquire()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM project_id_sequence")
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+    return db_pool.acquire
+
+
+def test_format_project_id():
+    assert format_project_id(2025, 42) == 'CW2025000042'
+    assert format_project_id(2025, 1234567, prefix='XY') == 'XY20251234567'
+
+
+def test_ids_continue_across_blocks(sequence):
+    allocator = ProjectIdAllocator(sequence, block_size=3, today=Today(date(2025, 6, 1)))
+    ids = [allocator.allocate() for _ in range(8)]
+    assert ids == [format_project_id(2025, number) for number in range(1, 9)]
+
+    stats = allocator.stats()
+    assert stats['allocated'] == 8
+    assert stats['reservations'] == 3
+    assert stats['remaining_in_block'] == 1
+
+
+def test_processes_share_the_sequence(sequence):
+    today = Today(date(2025, 6, 1))
+    first = ProjectIdAllocator(sequence, block_size=3, today=today)
+    second = ProjectIdAllocator(sequence, block_size=3, today=today)
+    ids = [first.allocate(), second.allocate(), first.allocate(), second.allocate(), first.allocate(),
+           first.allocate()]
+    # Each allocator hands out its own block; first's fourth id comes from a third block
+    assert ids == [format_project_id(2025, number) for number in (1, 4, 2, 5, 3, 7)]
+
+
+def test_new_year_restarts_numbering(sequence):
+    today = Today(date(2025, 12, 31))
+    allocator = ProjectIdAllocator(sequence, block_size=3, today=today)
+    assert [allocator.allocate() for _ in range(2)] == [format_project_id(2025, 1), format_project_id(2025, 2)]
+
+    # The block reserved in 2025 still has an id left; it must not be used in 2026
+    today.day = date(2026, 1, 1)
+    assert [allocator.allocate() for _ in range(4)] == [format_project_id(2026, number) for number in range(1, 5)]
+    assert allocator.stats()['reservations'] == 3
+
+    # Back on the old year's row, numbering continues after its reserved block
+    today.day = date(2025, 12, 31)
+    assert allocator.allocate() == format_project_id(2025, 4)
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from backend.utils.db import db_pool
+from backend.utils.project_export import parse_export_query
+from backend.utils.project_listing import (
+    ASYNC_COLUMNS, encode_cursor, decode_cursor, list_projects, parse_project_query, ProjectQuery
+)
+
+
+@pytest.mark.parametrize('timestamp, expected', [
+    ('2025-03-01 09:30:00', '2025-03-01 09:30:00'),
+    (datetime(2025, 3, 1, 9, 30), '2025-03-01 09:30:00'),
+    (datetime(2025, 12, 31, 23, 59, 59, 999999), '2025-12-31 23:59:59'),
+])
+def test_cursor_round_trip(timestamp, expected):
+    token = encode_cursor(timestamp, 12345)
+    assert '=' not in token
+    assert decode_cursor(token) == (expected, 12345)
+
+
+@pytest.mark.parametrize('token', ['', 'not a cursor', 'bnVsbA', encode_cursor('2025-03-01', 1)[:-3] + '!!!'])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_cursor_requires_integer_id():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor('2025-03-01 09:30:00', '12345'))
+
+
+def test_default_fields_exist_without_async_columns():
+    # calculation_status is only there after the async submit mode's ALTER
+    for query in (parse_project_query({}), parse_export_query({})):
+        assert not set(query.fields) & set(ASYNC_COLUMNS)
+    assert parse_project_query({'fields': 'project_id,calculation_status'}).fields == (
+        'project_id', 'calculation_status'
+    )
+
+
+def _walk(connection, filters, limit):
+    rows, pages, after = [], 0, None
+    while True:
+        query = ProjectQuery(filters, ('project_id', 'timestamp'), None, None, limit, after)
+        page, token = list_projects(connection, query)
+        rows.extend(page)
+        pages += 1
+        if token is None:
+            return rows, pages
+        after = decode_cursor(token)
+
+
+@pytest.mark.parametrize('filters, where', [({}, ''), ({'council_id': 1}, "WHERE council_id = '1'")])
+def test_pages_walk_every_row_once(database, filters, where):
+    connection = db_pool.acquire()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM project_details_test2")
+        # Shared timestamps, so pages must break ties on id
+        cursor.executemany(
+            "INSERT INTO project_details_test2 (project_id, timestamp, council_id) VALUES (%s, %s, %s)",
+            [(f"CW2025{number:06d}", f"2025-03-{1 + number % 3:02d} 10:00:00", str(number % 2)) for number in range(23)]
+        )
+        connection.commit()
+
+        seen, pages = _walk(connection, filters, limit=5)
+        cursor.execute(
+            f"SELECT project_id, timestamp FROM project_details_test2 {where} ORDER BY timestamp DESC, id DESC"
+        )
+        expected = cursor.fetchall()
+        assert [(row['project_id'], row['timestamp']) for row in seen] == expected
+        assert pages == max(1, -(-len(expected) // 5))
+
+        cursor.execute("DELETE FROM project_details_test2")
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
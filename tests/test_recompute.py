@@ -0,0 +1,75 @@
+import mysql.connector
+import pytest
+
+from backend.jobs import recompute_project_details as job
+from backend.utils.db import db_pool
+from backend.utils.project_columns import AREA_STATEMENT_COLUMNS, FSI_COLUMNS
+from backend.calculators.setback_calculator import SetbackCalculator
+
+UNSET = -1
+
+
+class UnreachablePool:
+    def acquire(self):
+        raise mysql.connector.errors.InterfaceError(msg="Database unreachable")
+
+
+@pytest.fixture
+def stored_rows(database, submissions):
+    """
+    Rows of project_details_test2 for the synthetic plots, with every margin set to UNSET
+
+    Every fifth row has a building height no setback rule is keyed on.
+    """
+    columns = [column for column in job.INPUT_COLUMNS if column != 'id']
+    connection = db_pool.acquire()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("DELETE FROM project_details_test2")
+        cursor.executemany(
+            f"INSERT INTO project_details_test2 ({', '.join(columns)}, front_margin) "
+            f"VALUES ({', '.join(['%s'] * (len(columns) + 1))})",
+            [tuple(getattr(submission, column) for column in columns) + (UNSET,) for submission in submissions]
+        )
+        cursor.execute("UPDATE project_details_test2 SET building_height = 'Unknown' WHERE id % 5 = 0")
+        connection.commit()
+        cursor.execute(f"SELECT {', '.join(job.INPUT_COLUMNS)} FROM project_details_test2 ORDER BY id")
+        rows = cursor.fetchall()
+        yield rows
+
+        cursor.execute("DELETE FROM project_details_test2")
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def test_failed_setbacks_are_not_written(stored_rows, monkeypatch):
+    monkeypatch.setattr(job, '_worker_setback_calculator', SetbackCalculator(UnreachablePool()))
+    params, params_without_setbacks = job.recompute_rows(stored_rows)
+    assert params == []
+    assert [values[-1] for values in params_without_setbacks] == [row['id'] for row in stored_rows]
+    assert {len(values) for values in params_without_setbacks} == {len(AREA_STATEMENT_COLUMNS + FSI_COLUMNS) + 1}
+
+
+def test_recompute_keeps_margins_without_a_rule(stored_rows, tmp_path):
+    expected = SetbackCalculator(db_pool).evaluate(stored_rows)
+    unmatched = sum(1 for result in expected if result.get('error'))
+    assert unmatched == len(stored_rows) // 5
+
+    count = job.recompute(batch_size=40, workers=1, state_file=str(tmp_path / 'state.json'))
+    assert count == len(stored_rows)
+
+    connection = db_pool.acquire()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT id, front_margin, basic_fsi FROM project_details_test2 ORDER BY id")
+        stored = cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    for row, result in zip(stored, expected):
+        if result.get('error'):
+            assert float(row['front_margin']) == UNSET
+        else:
+            assert row['front_margin'] == result['front_margin']
@@ -0,0 +1,52 @@
+import time
+
+import mysql.connector
+import pytest
+
+from backend.benchmarks.fixtures import synthetic_forms
+from backend.jobs.calculation_queue import COMPLETED, FAILED
+from backend.calculators.setback_calculator import SetbackCalculator, SETBACK_TABLE
+
+
+class UnreachablePool:
+    def acquire(self):
+        raise mysql.connector.errors.ProgrammingError(msg=f"Table '{SETBACK_TABLE}' doesn't exist")
+
+
+@pytest.fixture(scope='module')
+def app_module(database):
+    # Imported once the pool points at the stand-in: the app warms its caches at import time
+    from backend import app as app_module
+    return app_module
+
+
+@pytest.fixture
+def without_setback_rules(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'setback_calculator', SetbackCalculator(UnreachablePool()))
+
+
+def _status(client, project_id):
+    for _ in range(500):
+        status = client.get(f'/projects/{project_id}/status').get_json()
+        if status['status'] in (COMPLETED, FAILED):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"{project_id} is still {status['status']}")
+
+
+@pytest.mark.parametrize('mode', ['sequential', 'transactional', 'async'])
+def test_submit_without_setback_rules(app_module, reference_data, without_setback_rules, monkeypatch, mode):
+    monkeypatch.setitem(app_module.app.config, 'SUBMIT_MODE', mode)
+    client = app_module.app.test_client()
+    form = synthetic_forms(reference_data, 1, seed=1)[0]
+
+    response = client.post('/submit', data=form)
+    assert response.status_code < 400
+    with client.session_transaction() as session:
+        messages = [message for _, message in session.get('_flashes', [])]
+    assert not any('Setback' in message for message in messages), messages
+
+    if mode == 'async':
+        status = _status(client, response.get_json()['project_id'])
+        assert status['status'] == COMPLETED and not status['errors'], status
+        assert set(status['results']['setbacks'].values()) == {None}